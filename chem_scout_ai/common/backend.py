@@ -8,6 +8,7 @@ import time
 from pathlib import Path
 from typing import Any
 
+import httpx
 import openai
 from dataclasses import field
 
@@ -26,6 +27,11 @@ _OPENAI_API_KEY_ENV_VAR = "OPENAI_API_KEY"
 
 _LLAMA_CPP_API_KEY_ENV_VAR = "LLAMA_CPP_API_KEY"
 
+# Keep-alive limits for the HTTP pool of one async backend. The pool is owned
+# by that backend (and reused by its rate-limit fallbacks), never shared across
+# backends: an httpx.AsyncClient is bound to one event loop and not thread-safe.
+_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=60.0)
+
 
 class LLMBackend:
     """
@@ -99,6 +105,7 @@ class AsyncLLMBackend:
     _ratelimiter: ratelimit.RateLimiter | None
     _fallback_configs: list["LLMBackendConfig"]
     _chat_store_dir: Path | None
+    _http_client: httpx.AsyncClient | None
 
     def __init__(
         self,
@@ -108,12 +115,14 @@ class AsyncLLMBackend:
         ratelimiter: ratelimit.RateLimiter | None,
         fallbacks: list["LLMBackendConfig"] | None = None,
         chat_store_dir: Path | None = None,
+        http_client: httpx.AsyncClient | None = None,
     ) -> None:
         self._client = client
         self._model = model
         self._ratelimiter = ratelimiter
         self._fallback_configs = fallbacks or []
         self._chat_store_dir = chat_store_dir
+        self._http_client = http_client
 
     async def __call__(
         self,
@@ -213,6 +222,7 @@ class AsyncLLMBackend:
             backend = cfg.get_async_backend(
                 fallback_configs=remaining,
                 chat_store_dir=self._chat_store_dir,
+                http_client=self._http_client,
             )
             try:
                 logger.info(
@@ -289,8 +299,15 @@ class LLMBackendConfig:
         *,
         fallback_configs: list["LLMBackendConfig"] | None = None,
         chat_store_dir: Path | None = None,
+        http_client: httpx.AsyncClient | None = None,
     ) -> AsyncLLMBackend:
-        client = openai.AsyncClient(base_url=self.base_url, api_key=self.api_key)
+        """
+        Builds an async backend with its own keep-alive HTTP pool; pass
+        `http_client` to reuse the pool of the backend this one falls back from.
+        """
+        if http_client is None:
+            http_client = openai.DefaultAsyncHttpxClient(limits=_HTTP_LIMITS)
+        client, _ = self.get_async_client(http_client=http_client)
         rate = ratelimit.RateLimiter(self.ratelimit) if self.ratelimit else None
         return AsyncLLMBackend(
             client=client,
@@ -298,10 +315,17 @@ class LLMBackendConfig:
             ratelimiter=rate,
             fallbacks=fallback_configs,
             chat_store_dir=chat_store_dir,
+            http_client=http_client,
         )
 
-    def get_async_client(self) -> tuple[openai.AsyncClient, str]:
-        client = openai.AsyncClient(base_url=self.base_url, api_key=self.api_key)
+    def get_async_client(
+        self, http_client: httpx.AsyncClient | None = None
+    ) -> tuple[openai.AsyncClient, str]:
+        client = openai.AsyncClient(
+            base_url=self.base_url,
+            api_key=self.api_key,
+            http_client=http_client,
+        )
         return client, self.model_name
 
     def get_client(self) -> tuple[openai.Client, str]:
@@ -54,27 +54,33 @@ class ChatDisplay(abc.ABC, chat.ChatObserver):
         return None
 
     # ------------------------------------------------------------------
+    # Role -> handler method name (looked up on the instance, so subclass
+    # overrides are respected)
+    _ROLE_HANDLERS: typing.ClassVar[dict[str, str]] = {
+        "system": "display_system",
+        "assistant": "_display_assistant_message",
+        "user": "display_user",
+        "tool": "display_tool_call_output",
+    }
+
     def display(self, message: types.Message) -> None:
         """
         Displays a message depending on its role.
         """
         role = self.role(message)
 
-        match role:
-            case "system":
-                self.display_system(message)
-            case "assistant":
-                if message.content:
-                    self.display_assistant(message)
-                if message.tool_calls:
-                    for tool_call in message.tool_calls:
-                        self.display_tool_call(tool_call)
-            case "user":
-                self.display_user(message)
-            case "tool":
-                self.display_tool_call_output(message)
-            case _:
-                raise ValueError(f"Unknown message role: {role}")
+        handler = self._ROLE_HANDLERS.get(role)
+        if handler is None:
+            raise ValueError(f"Unknown message role: {role}")
+        getattr(self, handler)(message)
+
+    def _display_assistant_message(self, message: types.AssistantMessage) -> None:
+        """Assistant messages may carry text and/or tool calls."""
+        if message.content:
+            self.display_assistant(message)
+        if message.tool_calls:
+            for tool_call in message.tool_calls:
+                self.display_tool_call(tool_call)
 
     # ------------------------------------------------------------------
     @abc.abstractmethod
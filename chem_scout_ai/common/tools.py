@@ -1,6 +1,7 @@
 """Provides MCP tool integration for the agent system (HTTP version for FastMCP)."""
 
 import contextlib
+import contextvars
 import json
 from collections.abc import AsyncGenerator, Callable
 from typing import Any
@@ -48,25 +49,73 @@ def mcp_session_factory(url: str, **kwargs: Any) -> ClientSessionFactory:
     return lambda: mcp_session(url, **kwargs)
 
 
+# -------------------------------------------------------------------------
+# Per-turn tool result cache
+# -------------------------------------------------------------------------
+
+ToolCacheKey = tuple[str, str]
+
+# Set once per user turn (start_tool_cache); every ToolManager in the same
+# asyncio context – router agent and handoff target – shares the dict.
+tool_call_cache: contextvars.ContextVar[dict[ToolCacheKey, list[dict]] | None] = (
+    contextvars.ContextVar("tool_call_cache", default=None)
+)
+
+
+def start_tool_cache() -> dict[ToolCacheKey, list[dict]]:
+    """Starts a fresh tool result cache for the current turn and returns it."""
+    cache: dict[ToolCacheKey, list[dict]] = {}
+    tool_call_cache.set(cache)
+    return cache
+
+
 # -------------------------------------------------------------------------
 # Tool Manager
 # -------------------------------------------------------------------------
 
+class ToolCatalog:
+    """Tool discovery of one MCP server, fetched once and shared by all managers."""
+
+    def __init__(self, session_factory: ClientSessionFactory) -> None:
+        self._session_factory = session_factory
+        self._tools: list[types.Tool] | None = None
+
+    async def tools(self) -> list[types.Tool]:
+        if self._tools is None:
+            async with self._session_factory() as session:
+                resp = await session.list_tools()
+            self._tools = [tool_from_mcp(t) for t in resp.tools]
+        return self._tools
+
+
 class ToolManager:
     """Manages MCP tools for LLM-driven tool calls."""
 
     def __init__(
         self,
         session_factory: ClientSessionFactory,
-        allowed_tools: set[str] | None = None,
+        allowed_tools: set[str] | frozenset[str] | None = None,
+        catalog: ToolCatalog | None = None,
+        cacheable_tools: set[str] | frozenset[str] | None = None,
     ) -> None:
         self._session_factory = session_factory
-        self._allowed_tools = allowed_tools
+        self._allowed_tools = frozenset(allowed_tools) if allowed_tools is not None else None
+        self._catalog = catalog or ToolCatalog(session_factory)
+        self._cacheable_tools = frozenset(cacheable_tools or ())
+
+    def with_allowed_tools(
+        self, allowed_tools: set[str] | frozenset[str] | None
+    ) -> "ToolManager":
+        """Same server and tool catalog, different whitelist (one discovery per process)."""
+        return type(self)(
+            session_factory=self._session_factory,
+            allowed_tools=allowed_tools,
+            catalog=self._catalog,
+            cacheable_tools=self._cacheable_tools,
+        )
 
     async def available_tools(self) -> list[types.Tool]:
-        async with self._session_factory() as session:
-            resp = await session.list_tools()
-            return [tool_from_mcp(t) for t in resp.tools]
+        return list(await self._catalog.tools())
 
     async def tools(self) -> list[types.Tool]:
         tools = await self.available_tools()
@@ -107,14 +156,45 @@ class ToolManager:
                 "content": f"Tool '{tool_name}' not allowed.",
             }]
 
+        # batch_execute dispatches server-side, so check the nested calls too
+        if self._allowed_tools is not None and tool_name == "batch_execute":
+            calls = args.get("calls") if isinstance(args, dict) else None
+            nested = [
+                call.get("tool") if isinstance(call, dict) else None
+                for call in (calls if isinstance(calls, list) else [])
+            ]
+            blocked = [name for name in nested if name not in self._allowed_tools]
+            if blocked:
+                return [{
+                    "role": "tool",
+                    "tool_call_id": tool_call.id,
+                    "content": f"Tools {blocked} not allowed in batch_execute.",
+                }]
+
+        # Read-only tools are answered from the per-turn cache; any other tool
+        # may change data, so it invalidates everything cached so far
+        cache = tool_call_cache.get()
+        cache_key = None
+        if cache is not None:
+            if tool_name in self._cacheable_tools:
+                cache_key = (tool_name, json.dumps(args, sort_keys=True))
+                cached = cache.get(cache_key)
+                if cached is not None:
+                    return [{**r, "tool_call_id": tool_call.id} for r in cached]
+            else:
+                cache.clear()
+
         try:
             async with self._session_factory() as session:
                 result = await session.call_tool(tool_name, args)
 
-                return [
+                results = [
                     tool_call_result_from_mcp(tool_call.id, content)
                     for content in result.content
                 ]
+            if cache_key is not None and not result.isError:
+                cache[cache_key] = results
+            return results
         except Exception as e:
             # Return error as tool output so LLM can handle it
             return [{
@@ -132,12 +212,14 @@ class ToolManager:
     def from_url(
         cls,
         url: str,
-        allowed_tools: set[str] | None = None,
+        allowed_tools: set[str] | frozenset[str] | None = None,
+        cacheable_tools: set[str] | frozenset[str] | None = None,
         **kwargs: Any,
     ):
         return cls(
             session_factory=mcp_session_factory(url, **kwargs),
             allowed_tools=allowed_tools,
+            cacheable_tools=cacheable_tools,
         )
 
 
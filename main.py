@@ -13,6 +13,7 @@ from src.utils.logger import get_logger
 from src.tools.chem_scout_mcp_tools import SERVER
 from chem_scout_ai.common.backend import Gemini2p5Flash, Gemini2p5FlashLite, Gemini3Flash
 from chem_scout_ai.common import types
+from chem_scout_ai.common.tools import start_tool_cache
 from src.agents.router import classify_intent
 from src.agents.factory import build_agents
 from src.interfaces.rich_chat_display import RichChatDisplay
@@ -20,6 +21,7 @@ from src.interfaces.rich_chat_display import RichChatDisplay
 from src.database.db import init_db
 from src.config import RATE_LIMIT_CHAT_DIR
 from src.utils.chat_history_logger import create_full_observer_suite
+from src.utils.audit_retention import start_audit_retention
 
 logger = get_logger(__name__)
 
@@ -43,6 +45,29 @@ def start_mcp_background():
     return thread
 
 
+async def wait_for_mcp(timeout: float = 5.0) -> bool:
+    """
+    Wait until the MCP server accepts connections, probing with exponential
+    backoff (50 ms, doubling, capped at 0.8 s) instead of a fixed sleep.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    delay = 0.05
+    while True:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", 8000)
+        except OSError:
+            if loop.time() >= deadline:
+                logger.warning(f"MCP server not reachable after {timeout}s, continuing anyway.")
+                return False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.8)
+        else:
+            writer.close()
+            await writer.wait_closed()
+            return True
+
+
 # ================================================================
 # Cross-agent handoff helper
 # ================================================================
@@ -55,10 +80,10 @@ async def process_handoff(message, user_text: str, agents, display) -> bool:
     the target agent. Returns True if a handoff was processed.
     """
     # Only assistant messages with string content can trigger a handoff
-    if getattr(message, "role", None) != "assistant":
+    if not isinstance(message, types.AssistantMessage):
         return False
 
-    content = getattr(message, "content", None)
+    content = message.content
     if not (isinstance(content, str) and content.startswith(HANDOFF_PREFIX)):
         return False
 
@@ -93,8 +118,7 @@ async def process_handoff(message, user_text: str, agents, display) -> bool:
 
     # Invoke the target agent and display its outputs
     handoff_responses = await target_agent(chat=target_chat)
-    for hmsg in handoff_responses:
-        display.display(hmsg)
+    display.display_many(handoff_responses)
 
     return True
 
@@ -108,9 +132,10 @@ async def main():
     # Initialize DB
     init_db()
     logger.info("Database initialized.")
+    start_audit_retention()
     # 1. Start MCP server
     start_mcp_background()
-    await asyncio.sleep(1.2)
+    await wait_for_mcp()
 
     # 2. Init backend
     backend = Gemini2p5Flash().get_async_backend(
@@ -141,11 +166,12 @@ async def main():
     # MAIN INPUT LOOP
     # ============================================================
     while True:
-        user_text = input("You: ").strip()
+        # Read input in a worker thread so the event loop keeps running while waiting
+        user_text = (await asyncio.to_thread(input, "You: ")).strip()
         if not user_text:
-            # End session for all observers
-            observers["history"].log_session_end()
-            observers["audit"].log_session_end(reason="user_exit")
+            # End session for all observers (after the queued messages are
+            # through) and close their log files
+            composite_observer.end_session(reason="user_exit")
             
             # Print analytics summary
             stats = observers["analytics"].get_summary()
@@ -157,6 +183,9 @@ async def main():
             print("\nSession ended.")
             break
 
+        # Fresh per-turn tool cache: router agent and handoff target share it
+        start_tool_cache()
+
         # 1) First classify intent using LLM
         intent = await classify_intent(user_text, backend)
         logger.info(f"Router selected agent: {intent}")
@@ -1,5 +1,9 @@
 # src/agents/router.py
 
+import re
+import time
+from collections import OrderedDict
+
 from chem_scout_ai.common import chat as chat_lib
 from chem_scout_ai.common import types
 
@@ -40,12 +44,100 @@ Just the label, nothing else.
 """
 
 
-async def classify_intent(user_input: str, backend) -> str:
+# -----------------------------
+# Intent cache
+# -----------------------------
+ROUTER_CACHE_SIZE = 256
+ROUTER_CACHE_TTL_SECONDS = 3600.0
+
+
+class RouterCache:
+    """
+    LRU cache query -> intent with TTL, so repeated prompts skip the router LLM call.
+
+    Keys are the query lowercased with collapsed whitespace, or a caller
+    supplied key for templated prompts (e.g. one key per Streamlit form).
+    """
+
+    def __init__(self, maxsize: int = ROUTER_CACHE_SIZE, ttl: float = ROUTER_CACHE_TTL_SECONDS):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    def get(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, intent = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return intent
+
+    def put(self, key: str, intent: str) -> None:
+        self._entries[key] = (time.monotonic() + self._ttl, intent)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+_intent_cache = RouterCache()
+
+
+# -----------------------------
+# Rule-based fast path
+# -----------------------------
+# Deterministic version of the "ALWAYS classify" rules in INTENT_SYSTEM_PROMPT
+# (plus the tool names the Streamlit forms spell out); data rules win, as
+# inventory corrections sent by the order agent also mention orders.
+_DATA_RE = re.compile(
+    r"inventory[ _]correction|process (?:inventory|alert)|(?:update|revise) inventory"
+    r"|reduce quantity|adjust stock|revise remaining quantity"
+    r"|\badd_product_tool\b|search the product database",
+    re.IGNORECASE,
+)
+_ORDER_RE = re.compile(
+    r"automated order request|\b(?:create|place) (?:an )?order\b"
+    r"|\b(?:buy|purchase|reorder)\b|show notifications|sent emails",
+    re.IGNORECASE,
+)
+
+
+def fast_classify(user_input: str) -> str | None:
+    """Returns "data"/"order" for unambiguous inputs, None if the LLM has to decide."""
+    if _DATA_RE.search(user_input):
+        return "data"
+    if _ORDER_RE.search(user_input):
+        return "order"
+    return None
+
+
+async def classify_intent(user_input: str, backend, cache_key: str | None = None) -> str:
     """
     Uses the LLM backend to decide whether the intent is:
     - "data"
     - "order"
+
+    Obvious cases are decided by fast_classify without an LLM call.
+    Results are cached per normalized query; templated prompts whose intent
+    does not depend on the filled-in values can pass a stable cache_key.
     """
+    intent = fast_classify(user_input)
+    if intent is not None:
+        return intent
+
+    key = cache_key or RouterCache.normalize(user_input)
+    cached = _intent_cache.get(key)
+    if cached is not None:
+        return cached
 
     # Temporary chat
     temp_chat = chat_lib.Chat(
@@ -67,9 +159,10 @@ async def classify_intent(user_input: str, backend) -> str:
     try:
         content = result.choices[0].message.content.strip().lower()
     except Exception:
-        return "data"   # fail-safe fallback
+        return "data"   # fail-safe fallback (not cached)
 
     if content not in ("data", "order"):
         return "data"
 
+    _intent_cache.put(key, content)
     return content
@@ -9,6 +9,12 @@ DATA_DIR.mkdir(exist_ok=True)
 
 DB_PATH = DATA_DIR / "chem_scout.db"
 
+# How long a connection waits for a lock before raising "database is locked"
+DB_BUSY_TIMEOUT_MS = 5000
+
+# Number of pooled read connections (writes use one dedicated connection)
+DB_POOL_SIZE = 4
+
 # ---------------------------------------------------------------------
 # Rate-limit handling
 # ---------------------------------------------------------------------
@@ -21,9 +27,10 @@ RATE_LIMIT_CHAT_DIR.mkdir(exist_ok=True)
 MCP_SERVER_URL = "http://127.0.0.1:8000/mcp"
 
 # Allowed tools per agent (database ops restricted to Data Agent)
-ALLOWED_TOOLS_DATA = {
+ALLOWED_TOOLS_DATA = frozenset({
     "search_products_tool",
     "add_product_tool",
+    "add_products_bulk_tool",
     "update_product_tool",
     "delete_product_tool",
     "get_order_status_tool",
@@ -33,13 +40,16 @@ ALLOWED_TOOLS_DATA = {
     "list_products_tool",
     "read_json_file_tool",
     "import_products_from_json_tool",
+    "import_products_from_json_batch_tool",
     "process_inventory_alert_tool",
     "get_audit_log_tool",
-}
+    "batch_execute",
+})
 
-ALLOWED_TOOLS_ORDER = {
+ALLOWED_TOOLS_ORDER = frozenset({
     "search_products_tool",
     "create_order_tool",
+    "create_orders_bulk_tool",
     "get_order_status_tool",
     "list_open_orders_tool",
     "notify_customer_tool",
@@ -47,7 +57,22 @@ ALLOWED_TOOLS_ORDER = {
     "list_notifications_tool",
     "get_notification_tool",
     "get_audit_log_tool",
-}
+    "batch_execute",
+})
+
+# Read-only tools whose results may be reused within one user turn
+# (e.g. router agent and handoff target searching the same product)
+CACHEABLE_TOOLS = frozenset({
+    "search_products_tool",
+    "list_products_tool",
+    "get_order_status_tool",
+    "list_open_orders_tool",
+    "list_all_orders_tool",
+    "monthly_spending_tool",
+    "read_json_file_tool",
+    "list_notifications_tool",
+    "get_notification_tool",
+})
 
 # ---------------------------------------------------------------------
 # Notification & inventory handoff storage
@@ -73,6 +98,13 @@ ANALYTICS_DIR.mkdir(exist_ok=True)
 AUDIT_LOG_DIR = DATA_DIR / "audit-logs"
 AUDIT_LOG_DIR.mkdir(exist_ok=True)
 
+# Audit retention: older DB rows and audit-log files are pruned periodically
+AUDIT_LOG_RETENTION_DAYS = 90
+AUDIT_LOG_COMPRESS_AFTER_DAYS = 7        # audit_*.jsonl older than this get gzipped
+AUDIT_LOG_PRUNE_INTERVAL_SECONDS = 24 * 3600
+# Default time window of get_audit_log_tool when no "since" is given
+AUDIT_LOG_DEFAULT_WINDOW_DAYS = 30
+
 # ---------------------------------------------------------------------
 # Rate limiting configuration
 # ---------------------------------------------------------------------
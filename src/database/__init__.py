@@ -9,27 +9,40 @@ from src.database.db import (
     
     # Product operations
     add_product,
+    add_products_bulk,
+    add_product_rows_bulk,
+    PRODUCT_IMPORT_FIELDS,
     update_product,
     delete_product,
     search_products,
+    search_products_json,
     list_all_products,
+    list_all_products_json,
+    iter_all_products,
     get_product,
     reduce_product_quantity,
     
     # Order operations
     create_order,
+    create_orders_bulk,
     get_order_status,
     list_open_orders,
+    list_open_orders_json,
     list_all_orders,
+    list_all_orders_columns,
+    iter_all_orders,
     calculate_monthly_spending,
     
     # Audit logging
     log_audit,
+    log_audit_many,
     get_audit_log,
+    prune_audit_log,
     
     # Inventory alert tracking
     is_inventory_alert_processed,
     mark_inventory_alert_processed,
+    apply_inventory_alert,
     get_processed_inventory_alerts,
 )
 
@@ -39,21 +52,34 @@ __all__ = [
     "set_agent_context",
     "get_agent_context",
     "add_product",
+    "add_products_bulk",
+    "add_product_rows_bulk",
+    "PRODUCT_IMPORT_FIELDS",
     "update_product",
     "delete_product",
     "search_products",
+    "search_products_json",
     "list_all_products",
+    "list_all_products_json",
+    "iter_all_products",
     "get_product",
     "reduce_product_quantity",
     "create_order",
+    "create_orders_bulk",
     "get_order_status",
     "list_open_orders",
+    "list_open_orders_json",
     "list_all_orders",
+    "list_all_orders_columns",
+    "iter_all_orders",
     "calculate_monthly_spending",
     "log_audit",
+    "log_audit_many",
     "get_audit_log",
+    "prune_audit_log",
     "is_inventory_alert_processed",
     "mark_inventory_alert_processed",
+    "apply_inventory_alert",
     "get_processed_inventory_alerts",
 ]
 
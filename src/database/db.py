@@ -1,16 +1,121 @@
 import sqlite3
+import itertools
 import json
+import queue
+import re
+import secrets
+import time
 from contextlib import contextmanager
-from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
-from src.config import DB_PATH
+from src.config import DB_PATH, DB_BUSY_TIMEOUT_MS, DB_POOL_SIZE
+from src.utils.timestamps import utc_now_iso as _utc_now_iso
 
 # Thread-local storage for agent context
 import threading
 _agent_context = threading.local()
 
+# UPDATE ... RETURNING gibt es erst ab SQLite 3.35
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# ---------------------------------------------------------------------
+# SQL STATEMENTS
+# ---------------------------------------------------------------------
+# Einmal definiert, damit jeder Aufruf denselben SQL-Text verwendet und
+# sqlite3 das vorbereitete Statement aus seinem Cache wiederverwendet.
+_PRODUCT_COLUMNS_SQL = (
+    "id, name, cas_number, supplier, purity, package_size, price, currency, "
+    "delivery_time_days, available_quantity, available_unit"
+)
+_ORDER_COLUMNS_SQL = (
+    "order_id, product_id, quantity, unit, status, customer_reference, "
+    "external_name, external_supplier, external_purity, "
+    "external_package_size, external_price_range, created_at"
+)
+
+# json_object()-Ausdrücke mit denselben Keys wie die dicts der Lesefunktionen
+_PRODUCT_JSON_SQL = "json_object(" + ", ".join(
+    f"'{col}', {col}" for col in _PRODUCT_COLUMNS_SQL.split(", ")
+) + ")"
+_ORDER_JSON_SQL = "json_object(" + ", ".join(
+    f"'{col}', {col}" for col in _ORDER_COLUMNS_SQL.split(", ")
+) + ")"
+
+# Spaltenformat {"columns": [...], "data": [[...], ...]}: Keys nur einmal statt pro Zeile
+_PRODUCT_COLUMNS = tuple(_PRODUCT_COLUMNS_SQL.split(", "))
+_ORDER_COLUMNS = tuple(_ORDER_COLUMNS_SQL.split(", "))
+_PRODUCT_ARRAY_SQL = f"json_array({_PRODUCT_COLUMNS_SQL})"
+_PRODUCT_COLUMNS_JSON = json.dumps(list(_PRODUCT_COLUMNS))
+
+_INSERT_PRODUCT_SQL = """
+    INSERT INTO products (
+        name, cas_number, supplier, purity, package_size,
+        price, currency, delivery_time_days, available_quantity, available_unit, last_updated
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+# Statisches UPDATE: None-Parameter lassen die Spalte per COALESCE unverändert
+_UPDATE_PRODUCT_SQL = """
+    UPDATE products SET
+        name = COALESCE(?, name),
+        cas_number = COALESCE(?, cas_number),
+        supplier = COALESCE(?, supplier),
+        purity = COALESCE(?, purity),
+        package_size = COALESCE(?, package_size),
+        price = COALESCE(?, price),
+        currency = COALESCE(?, currency),
+        delivery_time_days = COALESCE(?, delivery_time_days),
+        available_quantity = COALESCE(?, available_quantity),
+        available_unit = COALESCE(?, available_unit),
+        last_updated = ?
+    WHERE id = ?
+"""
+_UPDATE_PRODUCT_RETURNING_SQL = _UPDATE_PRODUCT_SQL + f" RETURNING {_PRODUCT_COLUMNS_SQL}"
+_GET_PRODUCT_SQL = f"SELECT {_PRODUCT_COLUMNS_SQL} FROM products WHERE id = ?"
+_LIST_PRODUCTS_SQL = f"SELECT {_PRODUCT_COLUMNS_SQL} FROM products"
+_LIST_PRODUCTS_JSON_SQL = f"SELECT json_group_array({_PRODUCT_JSON_SQL}) FROM products"
+_LIST_PRODUCTS_ARRAYS_SQL = f"SELECT json_group_array({_PRODUCT_ARRAY_SQL}) FROM products"
+
+_INSERT_ORDER_SQL = """
+    INSERT INTO orders (
+        order_id, product_id, quantity, unit, status,
+        customer_reference,
+        external_name, external_supplier, external_purity,
+        external_package_size, external_price_range,
+        created_at
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+# RETURNING liefert REAL-Spalten teils als int (5.0 gespeichert als 5), daher CAST
+_INSERT_ORDER_RETURNING_SQL = _INSERT_ORDER_SQL + (
+    " RETURNING " + _ORDER_COLUMNS_SQL.replace("quantity", "CAST(quantity AS REAL) AS quantity", 1)
+)
+_GET_ORDER_SQL = f"SELECT {_ORDER_COLUMNS_SQL} FROM orders WHERE order_id = ?"
+_LIST_OPEN_ORDERS_SQL = f"SELECT {_ORDER_COLUMNS_SQL} FROM orders WHERE status = 'OPEN'"
+_LIST_OPEN_ORDERS_JSON_SQL = f"SELECT json_group_array({_ORDER_JSON_SQL}) FROM orders WHERE status = 'OPEN'"
+
+# Single UPDATE instead of SELECT-then-UPDATE:
+#  - no quantity set -> skip reduction (cannot reduce from NULL)
+#  - we only reduce if units match (can be enhanced later with unit conversion)
+_REDUCE_QUANTITY_SQL = """
+    UPDATE products
+    SET available_quantity = MAX(0.0, available_quantity - ?), last_updated = ?
+    WHERE id = ?
+      AND available_quantity IS NOT NULL
+      AND (available_unit IS NULL OR available_unit = '' OR available_unit = ?)
+"""
+_REDUCE_QUANTITY_RETURNING_SQL = _REDUCE_QUANTITY_SQL + " RETURNING available_quantity"
+
+_INSERT_AUDIT_SQL = """
+    INSERT INTO audit_log (timestamp, agent_name, action, table_name, record_id, old_values, new_values, details)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+_MARK_ALERT_PROCESSED_SQL = """
+    INSERT OR REPLACE INTO processed_inventory_alerts (order_id, processed_at, processed_by, result, details)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
 
 def set_agent_context(agent_name: str | None) -> None:
     """Set the current agent context for audit logging."""
@@ -22,23 +127,102 @@ def get_agent_context() -> str:
     return getattr(_agent_context, 'name', None) or 'unknown'
 
 
-@contextmanager
-def get_connection():
-    """Contextmanager für eine SQLite-Verbindung."""
+# ---------------------------------------------------------------------
+# CONNECTION POOL
+# ---------------------------------------------------------------------
+# Verbindungen werden einmal geöffnet und wiederverwendet statt pro Aufruf
+# connect()/close(). Lesezugriffe teilen sich bis zu DB_POOL_SIZE Verbindungen,
+# Schreibzugriffe laufen über eine dedizierte, per Lock serialisierte Verbindung.
+_read_pool: queue.LifoQueue[sqlite3.Connection] = queue.LifoQueue()
+_read_pool_lock = threading.Lock()
+_read_pool_created = 0
+
+_write_conn: sqlite3.Connection | None = None
+_write_lock = threading.Lock()
+
+
+def _connect(write: bool = False) -> sqlite3.Connection:
+    """Öffnet eine neue Verbindung für den Pool."""
     DB_PATH.parent.mkdir(exist_ok=True)
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(
+        DB_PATH,
+        check_same_thread=False,
+        cached_statements=256,
+        # Schreibtransaktionen mit BEGIN IMMEDIATE: die Schreibsperre wird sofort
+        # geholt (bzw. per busy_timeout abgewartet), statt später beim Upgrade
+        # von einer Lese- zur Schreibsperre mit SQLITE_BUSY abzubrechen, z.B.
+        # wenn Streamlit-App und MCP-Server parallel in dieselbe Datei schreiben.
+        isolation_level="IMMEDIATE" if write else "",
+    )
+    # sqlite3.Row: Zugriff per Index und Spaltenname, dict(row) ohne Tuple-Unpacking
+    conn.row_factory = sqlite3.Row
+    # Bei Sperren in SQLite warten statt sofort "database is locked" zu werfen
+    conn.execute(f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}")
+    # Diese PRAGMAs gelten pro Verbindung (journal_mode=WAL setzt init_db in der Datei)
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("PRAGMA temp_store = MEMORY")
+    conn.execute("PRAGMA mmap_size = 268435456")
+    conn.execute("PRAGMA cache_size = -65536")
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+
+def _acquire_read_connection() -> sqlite3.Connection:
+    global _read_pool_created
+    try:
+        return _read_pool.get_nowait()
+    except queue.Empty:
+        pass
+    with _read_pool_lock:
+        if _read_pool_created < DB_POOL_SIZE:
+            _read_pool_created += 1
+            return _connect()
+    return _read_pool.get()
+
+
+@contextmanager
+def get_connection(write: bool = False):
+    """
+    Contextmanager für eine SQLite-Verbindung aus dem Pool.
+
+    write=True liefert die dedizierte Schreibverbindung (exklusiv für die
+    Dauer des with-Blocks). Offene Transaktionen werden beim Verlassen committed,
+    bei einer Exception auf der Schreibverbindung zurückgerollt.
+    """
+    global _write_conn
+    if write:
+        with _write_lock:
+            if _write_conn is None:
+                _write_conn = _connect(write=True)
+            try:
+                yield _write_conn
+            except BaseException:
+                # Halbfertige Schreibvorgänge nicht committen
+                if _write_conn.in_transaction:
+                    _write_conn.rollback()
+                raise
+            if _write_conn.in_transaction:
+                _write_conn.commit()
+        return
+
+    conn = _acquire_read_connection()
     try:
         yield conn
     finally:
-        conn.commit()
-        conn.close()
+        if conn.in_transaction:
+            conn.commit()
+        _read_pool.put(conn)
 
 
 def init_db() -> None:
     """Initialisiert die Datenbanktabellen, falls sie nicht existieren."""
-    with get_connection() as conn:
+    with get_connection(write=True) as conn:
         cur = conn.cursor()
 
+        # WAL: Leser blockieren Schreiber nicht, Commits ohne fsync pro Transaktion.
+        # Der Modus wird in der DB-Datei gespeichert und gilt für alle Verbindungen.
+        cur.execute("PRAGMA journal_mode = WAL")
+
         # -------------------------
         # PRODUCTS TABLE
         # -------------------------
@@ -72,6 +256,13 @@ def init_db() -> None:
         except sqlite3.OperationalError:
             pass  # Column already exists
 
+        # Indizes für die Filter in search_products
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_products_cas ON products(cas_number)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_products_price ON products(price)")
+
+        # Volltextindex für name LIKE '%...%' (Trigram-Tokenizer unterstützt LIKE direkt)
+        _create_products_fts(cur)
+
         # -------------------------
         # ORDERS TABLE (FIXED)
         # -------------------------
@@ -97,6 +288,14 @@ def init_db() -> None:
             """
         )
 
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS idx_orders_created_at ON orders(created_at)"
+        )
+        # Partieller Index für list_open_orders
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS idx_orders_open ON orders(order_id) WHERE status = 'OPEN'"
+        )
+
         # -------------------------
         # AUDIT LOG TABLE
         # -------------------------
@@ -115,6 +314,13 @@ def init_db() -> None:
             )
             """
         )
+        # Neueste Einträge ohne Filter (ORDER BY timestamp DESC LIMIT) und
+        # gefilterte Abfragen von get_audit_log laufen über einen Index
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_audit_timestamp ON audit_log(timestamp)")
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS idx_audit_filter "
+            "ON audit_log(table_name, agent_name, action, timestamp)"
+        )
 
         # -------------------------
         # PROCESSED INVENTORY ALERTS TABLE
@@ -132,6 +338,67 @@ def init_db() -> None:
         )
 
 
+# ---------------------------------------------------------------------
+# PRODUCT NAME FULL-TEXT INDEX (FTS5)
+# ---------------------------------------------------------------------
+# None = noch nicht geprüft; False, wenn SQLite ohne FTS5/Trigram gebaut ist
+_products_fts_available: bool | None = None
+
+
+def _create_products_fts(cur) -> None:
+    """Legt products_fts samt Sync-Triggern an (falls FTS5 verfügbar ist)."""
+    global _products_fts_available
+    cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'")
+    exists = cur.fetchone() is not None
+    try:
+        cur.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+                name, content='products', content_rowid='id', tokenize='trigram'
+            )
+            """
+        )
+    except sqlite3.OperationalError:
+        _products_fts_available = False
+        return
+
+    cur.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+            INSERT INTO products_fts(rowid, name) VALUES (new.id, new.name);
+        END
+        """
+    )
+    cur.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+            INSERT INTO products_fts(products_fts, rowid, name) VALUES ('delete', old.id, old.name);
+        END
+        """
+    )
+    cur.execute(
+        """
+        CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name ON products
+        WHEN old.name IS NOT new.name BEGIN
+            INSERT INTO products_fts(products_fts, rowid, name) VALUES ('delete', old.id, old.name);
+            INSERT INTO products_fts(rowid, name) VALUES (new.id, new.name);
+        END
+        """
+    )
+    if not exists:
+        # Bestehende Produkte einmalig indexieren
+        cur.execute("INSERT INTO products_fts(products_fts) VALUES ('rebuild')")
+    _products_fts_available = True
+
+
+def _has_products_fts(cur) -> bool:
+    global _products_fts_available
+    if _products_fts_available is None:
+        cur.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'")
+        _products_fts_available = cur.fetchone() is not None
+    return _products_fts_available
+
+
 def add_product(
     name: str,
     cas_number: str | None = None,
@@ -145,16 +412,11 @@ def add_product(
     available_unit: str = "g",
 ) -> int:
     """Fügt ein Produkt hinzu und gibt die ID zurück."""
-    now = datetime.utcnow().isoformat()
-    with get_connection() as conn:
+    now = _utc_now_iso()
+    with get_connection(write=True) as conn:
         cur = conn.cursor()
         cur.execute(
-            """
-            INSERT INTO products (
-                name, cas_number, supplier, purity, package_size,
-                price, currency, delivery_time_days, available_quantity, available_unit, last_updated
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
+            _INSERT_PRODUCT_SQL,
             (
                 name,
                 cas_number,
@@ -169,7 +431,68 @@ def add_product(
                 now,
             ),
         )
-        return cur.lastrowid
+        product_id = cur.lastrowid
+    _invalidate_product_cache(product_id)
+    return product_id
+
+
+def add_products_bulk(products: list[dict]) -> list[int]:
+    """
+    Fügt mehrere Produkte in einer Transaktion ein (executemany) und gibt die IDs zurück.
+
+    Jedes dict nutzt dieselben Keys wie add_product; fehlende Keys bekommen die
+    gleichen Defaults (currency 'CHF', available_unit 'g').
+    """
+    if not products:
+        return []
+
+    now = _utc_now_iso()
+    return _insert_product_rows(
+        [
+            (
+                p["name"],
+                p.get("cas_number"),
+                p.get("supplier"),
+                p.get("purity"),
+                p.get("package_size"),
+                p.get("price"),
+                p.get("currency") or "CHF",
+                p.get("delivery_time_days"),
+                p.get("available_quantity"),
+                p.get("available_unit") or "g",
+                now,
+            )
+            for p in products
+        ]
+    )
+
+
+# Feldreihenfolge der Tupel für add_product_rows_bulk
+PRODUCT_IMPORT_FIELDS = ("name", "cas_number", "supplier", "purity", "package_size", "price", "currency")
+
+
+def add_product_rows_bulk(rows: list[tuple]) -> list[int]:
+    """
+    Wie add_products_bulk, aber mit Tupeln in PRODUCT_IMPORT_FIELDS-Reihenfolge
+    statt dicts (spart beim JSON-Import ein dict pro Produkt).
+    """
+    if not rows:
+        return []
+
+    now = _utc_now_iso()
+    return _insert_product_rows([(*row, None, None, "g", now) for row in rows])
+
+
+def _insert_product_rows(rows: list[tuple]) -> list[int]:
+    with get_connection(write=True) as conn:
+        cur = conn.cursor()
+        cur.executemany(_INSERT_PRODUCT_SQL, rows)
+        # Die Schreibverbindung ist exklusiv und alles läuft in einer Transaktion,
+        # daher sind die AUTOINCREMENT-IDs fortlaufend.
+        cur.execute("SELECT last_insert_rowid()")
+        last_id = cur.fetchone()[0]
+    _invalidate_product_cache()
+    return list(range(last_id - len(rows) + 1, last_id + 1))
 
 
 def update_product(
@@ -184,50 +507,135 @@ def update_product(
     delivery_time_days: int | None = None,
     available_quantity: float | None = None,
     available_unit: str | None = None,
-) -> bool:
-    """Aktualisiert ein Produkt. Gibt True zurück, wenn ein Datensatz betroffen war."""
-    fields = []
-    values: list[object] = []
-
-    mapping = {
-        "name": name,
-        "cas_number": cas_number,
-        "supplier": supplier,
-        "purity": purity,
-        "package_size": package_size,
-        "price": price,
-        "currency": currency,
-        "delivery_time_days": delivery_time_days,
-        "available_quantity": available_quantity,
-        "available_unit": available_unit,
-    }
-    for col, val in mapping.items():
-        if val is not None:
-            fields.append(f"{col} = ?")
-            values.append(val)
+    return_row: bool = False,
+) -> bool | dict | None:
+    """
+    Aktualisiert ein Produkt. Gibt True zurück, wenn ein Datensatz betroffen war.
 
-    if not fields:
-        return False
+    Mit return_row=True wird stattdessen das aktualisierte Produkt als dict
+    zurückgegeben (bzw. None, wenn kein Datensatz betroffen war).
+    """
+    values = (
+        name,
+        cas_number,
+        supplier,
+        purity,
+        package_size,
+        price,
+        currency,
+        delivery_time_days,
+        available_quantity,
+        available_unit,
+    )
+    if all(val is None for val in values):
+        return None if return_row else False
 
-    fields.append("last_updated = ?")
-    values.append(datetime.utcnow().isoformat())
-    values.append(product_id)
+    values += (_utc_now_iso(), product_id)
+    sql = _UPDATE_PRODUCT_RETURNING_SQL if return_row and _HAS_RETURNING else _UPDATE_PRODUCT_SQL
 
-    with get_connection() as conn:
+    with get_connection(write=True) as conn:
         cur = conn.cursor()
-        cur.execute(
-            f"UPDATE products SET {', '.join(fields)} WHERE id = ?",
-            values,
-        )
-        return cur.rowcount > 0
+        cur.execute(sql, values)
+        row = cur.fetchone() if return_row and _HAS_RETURNING else None
+        updated = row is not None if return_row and _HAS_RETURNING else cur.rowcount > 0
+    _invalidate_product_cache(product_id)
+
+    if not return_row:
+        return updated
+    if not updated:
+        return None
+    if row is None:
+        return get_product(product_id)
+    # RETURNING liefert REAL-Spalten teils als int (SQLite speichert 13.0 als 13)
+    return {
+        "id": row[0],
+        "name": row[1],
+        "cas_number": row[2],
+        "supplier": row[3],
+        "purity": row[4],
+        "package_size": row[5],
+        "price": float(row[6]) if row[6] is not None else None,
+        "currency": row[7],
+        "delivery_time_days": row[8],
+        "available_quantity": float(row[9]) if row[9] is not None else None,
+        "available_unit": row[10],
+    }
 
 
 def delete_product(product_id: int) -> bool:
     """Löscht ein Produkt. Gibt True zurück, wenn etwas gelöscht wurde."""
-    with get_connection() as conn:
+    with get_connection(write=True) as conn:
         cur = conn.cursor()
         cur.execute("DELETE FROM products WHERE id = ?", (product_id,))
-        return cur.rowcount > 0
+        deleted = cur.rowcount > 0
+    _invalidate_product_cache(product_id)
+    return deleted
+
+
+@lru_cache(maxsize=64)
+def _build_search_sql(
+    as_json: bool,
+    as_arrays: bool,
+    has_query: bool,
+    use_fts: bool,
+    has_cas: bool,
+    has_supplier: bool,
+    has_max_price: bool,
+) -> str:
+    """Baut das Such-SQL einmal pro Kombination aktiver Filter."""
+    if as_arrays:
+        head = f"json_group_array({_PRODUCT_ARRAY_SQL})"
+    elif as_json:
+        head = f"json_group_array({_PRODUCT_JSON_SQL})"
+    else:
+        head = _PRODUCT_COLUMNS_SQL
+    sql = f"SELECT {head} FROM products WHERE 1=1"
+    if has_query:
+        if use_fts:
+            sql += " AND id IN (SELECT rowid FROM products_fts WHERE name LIKE ?)"
+        else:
+            sql += " AND name LIKE ?"
+    if has_cas:
+        sql += " AND cas_number = ?"
+    if has_supplier:
+        sql += " AND supplier LIKE ?"
+    if has_max_price:
+        sql += " AND price <= ?"
+    return sql
+
+
+def _search_products_query(
+    cur,
+    as_json: bool,
+    as_arrays: bool,
+    query: str | None,
+    cas_number: str | None,
+    supplier: str | None,
+    max_price: float | None,
+) -> tuple[str, list[object]]:
+    """Liefert SQL und Parameter für search_products / search_products_json."""
+    params: list[object] = []
+    if query:
+        params.append(f"%{query}%")
+    if cas_number:
+        params.append(cas_number)
+    if supplier:
+        params.append(f"%{supplier}%")
+    if max_price is not None:
+        params.append(max_price)
+
+    # Trigram-Index braucht mindestens 3 Zeichen, sonst normaler LIKE-Scan
+    use_fts = bool(query) and len(query) >= 3 and _has_products_fts(cur)
+    sql = _build_search_sql(
+        as_json,
+        as_arrays,
+        bool(query),
+        use_fts,
+        bool(cas_number),
+        bool(supplier),
+        max_price is not None,
+    )
+    return sql, params
 
 
 def search_products(
@@ -237,58 +645,37 @@ def search_products(
     max_price: float | None = None,
 ) -> list[dict]:
     """Einfacher Produktsuch-Helper."""
-    sql = "SELECT id, name, cas_number, supplier, purity, package_size, price, currency, delivery_time_days, available_quantity, available_unit FROM products WHERE 1=1"
-    params: list[object] = []
+    with get_connection() as conn:
+        cur = conn.cursor()
+        sql, params = _search_products_query(cur, False, False, query, cas_number, supplier, max_price)
+        cur.execute(sql, params)
+        return [dict(row) for row in cur]
 
-    if query:
-        sql += " AND name LIKE ?"
-        params.append(f"%{query}%")
-    if cas_number:
-        sql += " AND cas_number = ?"
-        params.append(cas_number)
-    if supplier:
-        sql += " AND supplier LIKE ?"
-        params.append(f"%{supplier}%")
-    if max_price is not None:
-        sql += " AND price <= ?"
-        params.append(max_price)
 
+def search_products_json(
+    query: str | None = None,
+    cas_number: str | None = None,
+    supplier: str | None = None,
+    max_price: float | None = None,
+    columns: bool = False,
+) -> str:
+    """
+    Wie search_products, liefert das Ergebnis aber als JSON-Array-String.
+    Das JSON baut SQLite (json_group_array), ohne dicts in Python.
+
+    Mit columns=True: {"columns": [...], "data": [[...], ...]}.
+    """
     with get_connection() as conn:
         cur = conn.cursor()
+        sql, params = _search_products_query(cur, True, columns, query, cas_number, supplier, max_price)
         cur.execute(sql, params)
-        rows = cur.fetchall()
+        result = cur.fetchone()[0]
+    return _columns_json(result) if columns else result
 
-    products: list[dict] = []
-    for row in rows:
-        (
-            pid,
-            name,
-            cas,
-            sup,
-            purity,
-            package_size,
-            price,
-            currency,
-            delivery_time_days,
-            available_quantity,
-            available_unit,
-        ) = row
-        products.append(
-            {
-                "id": pid,
-                "name": name,
-                "cas_number": cas,
-                "supplier": sup,
-                "purity": purity,
-                "package_size": package_size,
-                "price": price,
-                "currency": currency,
-                "delivery_time_days": delivery_time_days,
-                "available_quantity": available_quantity,
-                "available_unit": available_unit,
-            }
-        )
-    return products
+
+def _columns_json(data: str) -> str:
+    """Setzt das Spaltenformat aus dem JSON-Array der Zeilen-Arrays zusammen."""
+    return f'{{"columns": {_PRODUCT_COLUMNS_JSON}, "data": {data}}}'
 
 
 def create_order(
@@ -304,230 +691,222 @@ def create_order(
     auto_reduce_inventory: bool = True,
 ) -> dict:
     """Erstellt interne oder externe Orders. Automatisch reduziert verfügbare Menge bei internen Orders."""
-    from uuid import uuid4
+    order_id = f"ORD-{secrets.token_hex(4).upper()}"
+    now = _utc_now_iso()
 
-    order_id = f"ORD-{uuid4().hex[:8].upper()}"
-    now = datetime.utcnow().isoformat()
-    status = "OPEN"
-
-    with get_connection() as conn:
+    with get_connection(write=True) as conn:
         cur = conn.cursor()
-        cur.execute(
-            """
-            INSERT INTO orders (
-                order_id, product_id, quantity, unit, status,
-                customer_reference,
-                external_name, external_supplier, external_purity,
-                external_package_size, external_price_range,
-                created_at
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
-                order_id,
-                product_id,
-                quantity,
-                unit,
-                status,
-                customer_reference,
-                external_name,
-                external_supplier,
-                external_purity,
-                external_package_size,
-                external_price_range,
-                now,
-            ),
+        params = (
+            order_id,
+            product_id,
+            quantity,
+            unit,
+            "OPEN",
+            customer_reference,
+            external_name,
+            external_supplier,
+            external_purity,
+            external_package_size,
+            external_price_range,
+            now,
         )
+        # Gespeicherte Zeile direkt zurückgeben statt sie in Python nachzubauen
+        if _HAS_RETURNING:
+            cur.execute(_INSERT_ORDER_RETURNING_SQL, params)
+            order = dict(cur.fetchone())
+        else:
+            cur.execute(_INSERT_ORDER_SQL, params)
+            cur.execute(_GET_ORDER_SQL, (order_id,))
+            order = dict(cur.fetchone())
         
         # Automatically reduce available quantity for internal orders (product_id > 0)
         if auto_reduce_inventory and product_id > 0:
             # Use the same connection to avoid locking issues
             _reduce_product_quantity_with_cursor(cur, product_id, quantity, unit, now)
+    if auto_reduce_inventory and product_id > 0:
+        _invalidate_product_cache(product_id)
+    _invalidate_order_cache(order_id)
+
+    return order
+
+
+def create_orders_bulk(orders: list[dict], auto_reduce_inventory: bool = True) -> list[dict]:
+    """
+    Erstellt mehrere Orders in einer Transaktion (executemany).
+
+    Jedes dict nutzt die Keys von create_order (product_id, quantity, unit, ...).
+    Gibt die erstellten Orders in derselben Form wie create_order zurück.
+    """
+    if not orders:
+        return []
+
+    now = _utc_now_iso()
+    created: list[dict] = []
+    for i, o in enumerate(orders):
+        # Vor der Transaktion prüfen: keine halb geschriebenen Batches
+        if o.get("quantity") is None:
+            raise ValueError(f"Order at position {i}: quantity is required")
+        created.append(
+            {
+                "order_id": f"ORD-{secrets.token_hex(4).upper()}",
+                "product_id": int(o.get("product_id") or 0),
+                "quantity": o["quantity"],
+                "unit": o.get("unit") or "g",
+                "status": "OPEN",
+                "customer_reference": o.get("customer_reference"),
+                "external_name": o.get("external_name"),
+                "external_supplier": o.get("external_supplier"),
+                "external_purity": o.get("external_purity"),
+                "external_package_size": o.get("external_package_size"),
+                "external_price_range": o.get("external_price_range"),
+                "created_at": now,
+            }
+        )
+
+    reduced: list[int] = []
+    with get_connection(write=True) as conn:
+        cur = conn.cursor()
+        cur.executemany(
+            _INSERT_ORDER_SQL,
+            [tuple(order.values()) for order in created],
+        )
+
+        if auto_reduce_inventory:
+            for order in created:
+                if order["product_id"] > 0:
+                    _reduce_product_quantity_with_cursor(
+                        cur, order["product_id"], order["quantity"], order["unit"], now
+                    )
+                    reduced.append(order["product_id"])
+    if reduced:
+        _invalidate_product_cache(*reduced)
+    _invalidate_order_cache(*(order["order_id"] for order in created))
+
+    return created
+
+
+# ---------------------------------------------------------------------
+# ORDER STATUS CACHE
+# ---------------------------------------------------------------------
+# order_id -> (Zeitpunkt, Order). Einträge verfallen nach _ORDER_CACHE_TTL Sekunden,
+# damit auch Änderungen außerhalb dieses Prozesses sichtbar werden.
+_ORDER_CACHE_TTL = 30.0
+_ORDER_CACHE_MAX = 1024
+_order_cache: dict[str, tuple[float, dict]] = {}
+_order_cache_lock = threading.Lock()
 
-    return {
-        "order_id": order_id,
-        "product_id": product_id,
-        "quantity": quantity,
-        "unit": unit,
-        "status": status,
-        "customer_reference": customer_reference,
-        "external_name": external_name,
-        "external_supplier": external_supplier,
-        "external_purity": external_purity,
-        "external_package_size": external_package_size,
-        "external_price_range": external_price_range,
-        "created_at": now,
-    }
+
+def _invalidate_order_cache(*order_ids: str) -> None:
+    """Entfernt Orders aus dem Cache; bei jedem Schreibzugriff auf orders aufrufen."""
+    with _order_cache_lock:
+        for order_id in order_ids:
+            _order_cache.pop(order_id, None)
 
 
 def get_order_status(order_id: str) -> dict | None:
     """Liest den Status einer Order."""
+    now = time.monotonic()
+    with _order_cache_lock:
+        entry = _order_cache.get(order_id)
+    if entry is not None and now - entry[0] < _ORDER_CACHE_TTL:
+        return dict(entry[1])
+
     with get_connection() as conn:
         cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT order_id, product_id, quantity, unit, status,
-                   customer_reference,
-                   external_name, external_supplier, external_purity,
-                   external_package_size, external_price_range,
-                   created_at
-            FROM orders WHERE order_id = ?
-            """,
-            (order_id,),
-        )
+        cur.execute(_GET_ORDER_SQL, (order_id,))
         row = cur.fetchone()
 
     if row is None:
         return None
 
-    (
-        oid,
-        product_id,
-        quantity,
-        unit,
-        status,
-        customer_reference,
-        external_name,
-        external_supplier,
-        external_purity,
-        external_package_size,
-        external_price_range,
-        created_at,
-    ) = row
-
-    return {
-        "order_id": oid,
-        "product_id": product_id,
-        "quantity": quantity,
-        "unit": unit,
-        "status": status,
-        "customer_reference": customer_reference,
-        "external_name": external_name,
-        "external_supplier": external_supplier,
-        "external_purity": external_purity,
-        "external_package_size": external_package_size,
-        "external_price_range": external_price_range,
-        "created_at": created_at,
-    }
+    order = dict(row)
+    with _order_cache_lock:
+        if len(_order_cache) >= _ORDER_CACHE_MAX:
+            _order_cache.clear()
+        _order_cache[order_id] = (now, order)
+    # Kopie zurückgeben, damit Aufrufer den Cache-Eintrag nicht verändern
+    return dict(order)
 
 
 def list_open_orders() -> list[dict]:
     """Listet offene Orders."""
     with get_connection() as conn:
         cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT order_id, product_id, quantity, unit, status,
-                   customer_reference,
-                   external_name, external_supplier, external_purity,
-                   external_package_size, external_price_range,
-                   created_at
-            FROM orders WHERE status = 'OPEN'
-            """
-        )
-        rows = cur.fetchall()
+        cur.execute(_LIST_OPEN_ORDERS_SQL)
+        return [dict(row) for row in cur]
 
-    orders: list[dict] = []
-    for row in rows:
-        (
-            oid,
-            product_id,
-            quantity,
-            unit,
-            status,
-            customer_reference,
-            external_name,
-            external_supplier,
-            external_purity,
-            external_package_size,
-            external_price_range,
-            created_at,
-        ) = row
-        orders.append(
-            {
-                "order_id": oid,
-                "product_id": product_id,
-                "quantity": quantity,
-                "unit": unit,
-                "status": status,
-                "customer_reference": customer_reference,
-                "external_name": external_name,
-                "external_supplier": external_supplier,
-                "external_purity": external_purity,
-                "external_package_size": external_package_size,
-                "external_price_range": external_price_range,
-                "created_at": created_at,
-            }
-        )
-    return orders
-
-
-def list_all_products():
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-
-    cur.execute("""
-        SELECT id, name, cas_number, supplier, purity, package_size, price, currency, delivery_time_days, available_quantity, available_unit
-        FROM products
-    """)
-
-    rows = cur.fetchall()
-    conn.close()
-
-    results = []
-    for r in rows:
-        results.append({
-            "id": r[0],
-            "name": r[1],
-            "cas_number": r[2],
-            "supplier": r[3],
-            "purity": r[4],
-            "package_size": r[5],
-            "price": r[6],
-            "currency": r[7],
-            "delivery_time_days": r[8],
-            "available_quantity": r[9] if len(r) > 9 else None,
-            "available_unit": r[10] if len(r) > 10 else None,
-        })
-    return results
+
+def list_open_orders_json() -> str:
+    """Listet offene Orders als JSON-Array-String (von SQLite erzeugt)."""
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(_LIST_OPEN_ORDERS_JSON_SQL)
+        return cur.fetchone()[0]
+
+
+def iter_all_products():
+    """
+    Generator über alle Produkte als sqlite3.Row (Zugriff per row["name"],
+    dict(row) bei Bedarf) – ohne ein dict pro Zeile anzulegen.
+
+    Liest direkt vom Cursor statt fetchall(); die Pool-Verbindung bleibt belegt,
+    bis der Generator erschöpft oder geschlossen ist.
+    """
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(_LIST_PRODUCTS_SQL)
+        yield from cur
+
+
+def list_all_products() -> list[dict]:
+    """Listet alle Produkte."""
+    with get_connection() as conn:
+        return [dict(row) for row in conn.execute(_LIST_PRODUCTS_SQL)]
+
+
+def list_all_products_json(columns: bool = False) -> str:
+    """
+    Listet alle Produkte als JSON-Array-String (von SQLite erzeugt).
+
+    Mit columns=True im Spaltenformat wie search_products_json.
+    Das Ergebnis wird gecacht, bis sich die products-Tabelle ändert.
+    """
+    # Version vor der Abfrage lesen: ein gleichzeitiger Schreibzugriff erhöht
+    # sie danach, der Eintrag ist dann höchstens unnötig, nie veraltet
+    version = _products_version
+    cached = _products_json_cache.get(columns)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    with get_connection() as conn:
+        if columns:
+            result = _columns_json(conn.execute(_LIST_PRODUCTS_ARRAYS_SQL).fetchone()[0])
+        else:
+            result = conn.execute(_LIST_PRODUCTS_JSON_SQL).fetchone()[0]
+    _products_json_cache[columns] = (version, result)
+    return result
 
 
-def _reduce_product_quantity_with_cursor(cur, product_id: int, quantity: float, unit: str, timestamp: str) -> bool:
+def _reduce_product_quantity_with_cursor(cur, product_id: int, quantity: float, unit: str, timestamp: str) -> float | None:
     """
     Internal helper to reduce product quantity using an existing cursor.
     Used within create_order to avoid connection locking.
+
+    Returns the new available_quantity, or None if nothing was reduced
+    (unknown product, no quantity set, or units don't match).
     """
-    # Get current available_quantity
-    cur.execute(
-        "SELECT available_quantity, available_unit FROM products WHERE id = ?",
-        (product_id,)
-    )
-    row = cur.fetchone()
-    
-    if row is None:
-        return False
-    
-    current_quantity, current_unit = row
-    
-    # If no quantity was set, skip reduction (cannot reduce from NULL)
-    if current_quantity is None:
-        return False
-    
-    # For now, we only reduce if units match (can be enhanced later with unit conversion)
-    if current_unit and current_unit != unit:
-        # Units don't match - skip automatic reduction but don't fail
-        return False
-    
-    # Calculate new quantity
-    new_quantity = max(0.0, current_quantity - quantity)
-    
-    # Update the product
-    cur.execute(
-        "UPDATE products SET available_quantity = ?, last_updated = ? WHERE id = ?",
-        (new_quantity, timestamp, product_id)
-    )
-    
-    return cur.rowcount > 0
+    params = (quantity, timestamp, product_id, unit)
+
+    if _HAS_RETURNING:
+        cur.execute(_REDUCE_QUANTITY_RETURNING_SQL, params)
+        row = cur.fetchone()
+        return float(row[0]) if row is not None else None
+
+    cur.execute(_REDUCE_QUANTITY_SQL, params)
+    if cur.rowcount == 0:
+        return None
+    cur.execute("SELECT available_quantity FROM products WHERE id = ?", (product_id,))
+    return cur.fetchone()[0]
 
 
 def reduce_product_quantity(product_id: int, quantity: float, unit: str) -> bool:
@@ -538,42 +917,106 @@ def reduce_product_quantity(product_id: int, quantity: float, unit: str) -> bool
     Note: Diese Funktion führt keine Unit-Konvertierung durch.
     Es wird erwartet, dass quantity und unit mit der vorhandenen available_unit übereinstimmen.
     """
-    with get_connection() as conn:
+    with get_connection(write=True) as conn:
         cur = conn.cursor()
-        timestamp = datetime.utcnow().isoformat()
-        return _reduce_product_quantity_with_cursor(cur, product_id, quantity, unit, timestamp)
+        timestamp = _utc_now_iso()
+        reduced = _reduce_product_quantity_with_cursor(cur, product_id, quantity, unit, timestamp) is not None
+    _invalidate_product_cache(product_id)
+    return reduced
 
 
-def get_product(product_id: int) -> dict | None:
-    """Retrieves a single product by ID."""
+@lru_cache(maxsize=1024)
+def _get_product_cached(product_id: int, version: int) -> dict | None:
+    # version ist nur Teil des Cache-Keys: nach einem Schreibzugriff auf das
+    # Produkt greift der neue Key, alte Einträge verdrängt das LRU von selbst
     with get_connection() as conn:
         cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT id, name, cas_number, supplier, purity, package_size, price, currency, 
-                   delivery_time_days, available_quantity, available_unit
-            FROM products WHERE id = ?
-            """,
-            (product_id,)
-        )
+        cur.execute(_GET_PRODUCT_SQL, (product_id,))
         row = cur.fetchone()
         
     if row is None:
         return None
     
-    return {
-        "id": row[0],
-        "name": row[1],
-        "cas_number": row[2],
-        "supplier": row[3],
-        "purity": row[4],
-        "package_size": row[5],
-        "price": row[6],
-        "currency": row[7],
-        "delivery_time_days": row[8],
-        "available_quantity": row[9],
-        "available_unit": row[10],
-    }
+    return dict(row)
+
+
+# Wird bei jedem Schreibzugriff auf products erhöht (Schlüssel für list_all_products_json).
+# next() auf itertools.count ist atomar, ein "+= 1" könnte Erhöhungen verlieren.
+_products_version_counter = itertools.count(1)
+_products_version = 0
+# columns-Flag -> (Version, JSON)
+_products_json_cache: dict[bool, tuple[int, str]] = {}
+# Version pro Produkt-ID für _get_product_cached (fehlend = 0)
+_product_versions: dict[int, int] = {}
+
+
+def _invalidate_product_cache(*product_ids: int) -> None:
+    """
+    Verwirft die Produkt-Caches; nach jedem Schreibzugriff auf products aufrufen.
+
+    Mit IDs werden nur diese Produkte neu gelesen, ohne IDs der ganze Cache.
+    """
+    global _products_version
+    version = next(_products_version_counter)
+    if product_ids:
+        for product_id in product_ids:
+            _product_versions[product_id] = version
+    else:
+        _product_versions.clear()
+        _get_product_cached.cache_clear()
+    _products_version = version
+
+
+def get_product(product_id: int) -> dict | None:
+    """Retrieves a single product by ID."""
+    product = _get_product_cached(product_id, _product_versions.get(product_id, 0))
+    # Kopie zurückgeben, damit Aufrufer den Cache-Eintrag nicht verändern
+    return dict(product) if product is not None else None
+
+
+_ORDER_SORT_COLUMNS = ("created_at", "order_id", "quantity", "status", "product_id")
+
+# Fertige SQL-Texte pro (sort_by, sort_order, has_status_filter), damit
+# derselbe Text den Statement-Cache von sqlite3 trifft
+_LIST_ORDERS_SQL: dict[tuple[str, str, bool], str] = {
+    (col, direction, has_status): (
+        f"SELECT {_ORDER_COLUMNS_SQL} FROM orders"
+        + (" WHERE status = ?" if has_status else "")
+        + f" ORDER BY {col} {direction} LIMIT ?"
+    )
+    for col in _ORDER_SORT_COLUMNS
+    for direction in ("ASC", "DESC")
+    for has_status in (False, True)
+}
+
+
+def iter_all_orders(
+    status: str | None = None,
+    sort_by: str = "created_at",
+    sort_order: str = "DESC",
+    limit: int | None = None,
+):
+    """
+    Generator variant of list_all_orders.
+
+    Yields sqlite3.Row objects straight from the cursor instead of
+    materializing the full result set; callers can stop early and read
+    fields by name (row["status"]) without building a dict per row.
+    """
+    # Validate sort_by / sort_order to prevent SQL injection
+    if sort_by not in _ORDER_SORT_COLUMNS:
+        sort_by = "created_at"
+    sort_order = "DESC" if sort_order.upper() not in ("ASC", "DESC") else sort_order.upper()
+
+    sql = _LIST_ORDERS_SQL[(sort_by, sort_order, bool(status))]
+    params: list[object] = [status.upper()] if status else []
+    # LIMIT -1 = kein Limit, so bleibt der SQL-Text gleich
+    params.append(limit if limit is not None and limit > 0 else -1)
+
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(sql, params)
+        yield from cur
 
 
 def list_all_orders(
@@ -594,72 +1037,24 @@ def list_all_orders(
     Returns:
         List of order dictionaries.
     """
-    # Validate sort_by to prevent SQL injection
-    valid_columns = {"created_at", "order_id", "quantity", "status", "product_id"}
-    if sort_by not in valid_columns:
-        sort_by = "created_at"
-    
-    # Validate sort_order
-    sort_order = "DESC" if sort_order.upper() not in ("ASC", "DESC") else sort_order.upper()
-    
-    sql = """
-        SELECT order_id, product_id, quantity, unit, status,
-               customer_reference,
-               external_name, external_supplier, external_purity,
-               external_package_size, external_price_range,
-               created_at
-        FROM orders
+    return [dict(row) for row in iter_all_orders(status, sort_by, sort_order, limit)]
+
+
+def list_all_orders_columns(
+    status: str | None = None,
+    sort_by: str = "created_at",
+    sort_order: str = "DESC",
+    limit: int | None = None,
+) -> dict:
     """
-    params: list[object] = []
-    
-    if status:
-        sql += " WHERE status = ?"
-        params.append(status.upper())
-    
-    sql += f" ORDER BY {sort_by} {sort_order}"
-    
-    if limit is not None and limit > 0:
-        sql += " LIMIT ?"
-        params.append(limit)
-    
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute(sql, params)
-        rows = cur.fetchall()
-    
-    orders: list[dict] = []
-    for row in rows:
-        (
-            oid,
-            product_id,
-            quantity,
-            unit,
-            status,
-            customer_reference,
-            external_name,
-            external_supplier,
-            external_purity,
-            external_package_size,
-            external_price_range,
-            created_at,
-        ) = row
-        orders.append(
-            {
-                "order_id": oid,
-                "product_id": product_id,
-                "quantity": quantity,
-                "unit": unit,
-                "status": status,
-                "customer_reference": customer_reference,
-                "external_name": external_name,
-                "external_supplier": external_supplier,
-                "external_purity": external_purity,
-                "external_package_size": external_package_size,
-                "external_price_range": external_price_range,
-                "created_at": created_at,
-            }
-        )
-    return orders
+    Wie list_all_orders, aber im Spaltenformat {"columns": [...], "data": [[...], ...]}.
+
+    Die Zeilen bleiben Tupel, es wird kein dict pro Order gebaut.
+    """
+    return {
+        "columns": list(_ORDER_COLUMNS),
+        "data": [tuple(row) for row in iter_all_orders(status, sort_by, sort_order, limit)],
+    }
 
 
 def calculate_monthly_spending(year: int, month: int) -> dict:
@@ -673,8 +1068,6 @@ def calculate_monthly_spending(year: int, month: int) -> dict:
       - '30'
     """
 
-    import re
-
     def parse_price_range(pr):
         if not pr:
             return 0.0
@@ -698,24 +1091,32 @@ def calculate_monthly_spending(year: int, month: int) -> dict:
             except:
                 return 0.0
 
+    # ISO-Zeitstempel sind lexikographisch sortierbar: [Monatsanfang, nächster Monat)
+    month_start = f"{year:04d}-{month:02d}-01"
+    next_year, next_month = (year + 1, 1) if month == 12 else (year, month + 1)
+    month_end = f"{next_year:04d}-{next_month:02d}-01"
+
     with get_connection() as conn:
         cur = conn.cursor()
 
+        # Bereichsabfrage statt strftime(), damit idx_orders_created_at greift.
+        # Produktpreis nur per Subquery für interne Orders nachschlagen.
         cur.execute(
             """
             SELECT
                 o.order_id, o.product_id, o.quantity, o.unit,
                 o.created_at,
-                p.price,
+                CASE WHEN o.product_id != 0
+                     THEN (SELECT price FROM products WHERE id = o.product_id)
+                END AS price,
                 o.external_price_range,
                 o.external_name,
                 o.external_supplier
             FROM orders o
-            LEFT JOIN products p ON o.product_id = p.id
-            WHERE strftime('%Y', o.created_at) = ?
-              AND strftime('%m', o.created_at) = ?
+            WHERE o.created_at >= ?
+              AND o.created_at < ?
             """,
-            (str(year), f"{month:02d}")
+            (month_start, month_end)
         )
 
         rows = cur.fetchall()
@@ -762,12 +1163,19 @@ def calculate_monthly_spending(year: int, month: int) -> dict:
 # AUDIT LOGGING FUNCTIONS
 # ---------------------------------------------------------------------
 
+def _audit_json(values: dict | str | None) -> str | None:
+    """Bereits serialisierte Werte (str) werden unverändert gespeichert."""
+    if not values:
+        return None
+    return values if type(values) is str else json.dumps(values)
+
+
 def log_audit(
     action: str,
     table_name: str,
     record_id: str | int | None = None,
-    old_values: dict | None = None,
-    new_values: dict | None = None,
+    old_values: dict | str | None = None,
+    new_values: dict | str | None = None,
     details: str | None = None,
     agent_name: str | None = None,
 ) -> int:
@@ -778,43 +1186,103 @@ def log_audit(
         action: The action performed (INSERT, UPDATE, DELETE, etc.)
         table_name: The table affected
         record_id: The primary key of the affected record
-        old_values: Previous values (for UPDATE/DELETE)
-        new_values: New values (for INSERT/UPDATE)
+        old_values: Previous values (for UPDATE/DELETE), dict or JSON string
+        new_values: New values (for INSERT/UPDATE), dict or JSON string
         details: Additional details/notes
         agent_name: Override agent context (defaults to current context)
     
     Returns:
         The ID of the audit log entry
     """
-    timestamp = datetime.utcnow().isoformat()
+    timestamp = _utc_now_iso()
     agent = agent_name or get_agent_context()
     
-    with get_connection() as conn:
+    with get_connection(write=True) as conn:
         cur = conn.cursor()
         cur.execute(
-            """
-            INSERT INTO audit_log (timestamp, agent_name, action, table_name, record_id, old_values, new_values, details)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """,
+            _INSERT_AUDIT_SQL,
             (
                 timestamp,
                 agent,
                 action,
                 table_name,
                 str(record_id) if record_id is not None else None,
-                json.dumps(old_values) if old_values else None,
-                json.dumps(new_values) if new_values else None,
+                _audit_json(old_values),
+                _audit_json(new_values),
                 details,
             ),
         )
         return cur.lastrowid
 
 
+def log_audit_many(
+    action: str,
+    table_name: str,
+    entries: list[tuple[str | int | None, dict | str | None, str | None]],
+    agent_name: str | None = None,
+) -> None:
+    """
+    Schreibt mehrere Audit-Einträge in einer Transaktion (executemany).
+
+    entries: (record_id, new_values, details) pro Eintrag, wie bei log_audit.
+    """
+    if not entries:
+        return
+    timestamp = _utc_now_iso()
+    agent = agent_name or get_agent_context()
+
+    with get_connection(write=True) as conn:
+        conn.executemany(
+            _INSERT_AUDIT_SQL,
+            [
+                (
+                    timestamp,
+                    agent,
+                    action,
+                    table_name,
+                    str(record_id) if record_id is not None else None,
+                    None,
+                    _audit_json(new_values),
+                    details,
+                )
+                for record_id, new_values, details in entries
+            ],
+        )
+
+
+@lru_cache(maxsize=32)
+def _build_audit_sql(
+    has_table: bool,
+    has_agent: bool,
+    has_action: bool,
+    has_since: bool = False,
+    has_until: bool = False,
+) -> str:
+    """
+    Baut das Audit-SQL einmal pro Filterkombination. Nur aktive Filter kommen
+    ins WHERE (kein "? IS NULL OR ..."), damit SQLite idx_audit_filter nutzen kann.
+    """
+    sql = "SELECT id, timestamp, agent_name, action, table_name, record_id, old_values, new_values, details FROM audit_log WHERE 1=1"
+    if has_table:
+        sql += " AND table_name = ?"
+    if has_agent:
+        sql += " AND agent_name = ?"
+    if has_action:
+        sql += " AND action = ?"
+    if has_since:
+        sql += " AND timestamp >= ?"
+    if has_until:
+        sql += " AND timestamp < ?"
+    return sql + " ORDER BY timestamp DESC LIMIT ?"
+
+
 def get_audit_log(
     limit: int = 100,
     table_name: str | None = None,
     agent_name: str | None = None,
     action: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
 ) -> list[dict]:
     """
     Retrieves audit log entries with optional filtering.
@@ -824,25 +1292,17 @@ def get_audit_log(
         table_name: Filter by table name
         agent_name: Filter by agent name
         action: Filter by action type
+        since: Only entries at or after this UTC ISO timestamp/date
+        until: Only entries before this UTC ISO timestamp/date
     
     Returns:
         List of audit log entries (newest first)
     """
-    sql = "SELECT id, timestamp, agent_name, action, table_name, record_id, old_values, new_values, details FROM audit_log WHERE 1=1"
-    params: list[Any] = []
-    
-    if table_name:
-        sql += " AND table_name = ?"
-        params.append(table_name)
-    if agent_name:
-        sql += " AND agent_name = ?"
-        params.append(agent_name)
-    if action:
-        sql += " AND action = ?"
-        params.append(action)
-    
-    sql += " ORDER BY timestamp DESC LIMIT ?"
+    params: list[Any] = [v for v in (table_name, agent_name, action, since, until) if v]
     params.append(limit)
+    sql = _build_audit_sql(
+        bool(table_name), bool(agent_name), bool(action), bool(since), bool(until)
+    )
     
     with get_connection() as conn:
         cur = conn.cursor()
@@ -865,6 +1325,14 @@ def get_audit_log(
     return entries
 
 
+def prune_audit_log(older_than: str) -> int:
+    """Löscht Audit-Einträge älter als `older_than` (UTC ISO). Gibt die Anzahl gelöschter Zeilen zurück."""
+    with get_connection(write=True) as conn:
+        cur = conn.cursor()
+        cur.execute("DELETE FROM audit_log WHERE timestamp < ?", (older_than,))
+        return cur.rowcount
+
+
 # ---------------------------------------------------------------------
 # PROCESSED INVENTORY ALERTS FUNCTIONS
 # ---------------------------------------------------------------------
@@ -887,18 +1355,85 @@ def mark_inventory_alert_processed(
     processed_by: str | None = None,
 ) -> None:
     """Mark an inventory alert as processed."""
-    timestamp = datetime.utcnow().isoformat()
+    timestamp = _utc_now_iso()
     agent = processed_by or get_agent_context()
     
-    with get_connection() as conn:
+    with get_connection(write=True) as conn:
+        cur = conn.cursor()
+        cur.execute(_MARK_ALERT_PROCESSED_SQL, (order_id, timestamp, agent, result, details))
+
+
+def apply_inventory_alert(
+    order_id: str,
+    product_id: int,
+    quantity: float,
+    unit: str,
+    processed_by: str | None = None,
+) -> dict:
+    """
+    Reduces a product's quantity for an inventory alert and records the result.
+
+    Bestandsänderung, Audit-Eintrag und processed_inventory_alerts-Zeile laufen
+    in einer Schreib-Transaktion statt in fünf einzelnen Aufrufen.
+
+    Returns a dict with result ("ok", "warning" or "not_found"),
+    previous_quantity, new_quantity and available_unit.
+    """
+    timestamp = _utc_now_iso()
+    agent = processed_by or get_agent_context()
+
+    with get_connection(write=True) as conn:
         cur = conn.cursor()
         cur.execute(
-            """
-            INSERT OR REPLACE INTO processed_inventory_alerts (order_id, processed_at, processed_by, result, details)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (order_id, timestamp, agent, result, details),
+            "SELECT available_quantity, available_unit FROM products WHERE id = ?",
+            (product_id,),
         )
+        row = cur.fetchone()
+        if row is None:
+            cur.execute(
+                _MARK_ALERT_PROCESSED_SQL,
+                (order_id, timestamp, agent, "error", f"Product {product_id} not found"),
+            )
+            return {"result": "not_found", "previous_quantity": None, "new_quantity": None, "available_unit": None}
+
+        previous_quantity, available_unit = row[0], row[1]
+        new_quantity = _reduce_product_quantity_with_cursor(cur, product_id, quantity, unit, timestamp)
+        if new_quantity is None:
+            cur.execute(
+                _MARK_ALERT_PROCESSED_SQL,
+                (order_id, timestamp, agent, "warning", "Could not reduce quantity (units mismatch or NULL)"),
+            )
+            return {
+                "result": "warning",
+                "previous_quantity": previous_quantity,
+                "new_quantity": None,
+                "available_unit": available_unit,
+            }
+
+        cur.execute(
+            _INSERT_AUDIT_SQL,
+            (
+                timestamp,
+                agent,
+                "UPDATE",
+                "products",
+                str(product_id),
+                json.dumps({"available_quantity": previous_quantity}),
+                json.dumps({"available_quantity": new_quantity}),
+                f"Inventory reduced via alert for order {order_id}",
+            ),
+        )
+        cur.execute(
+            _MARK_ALERT_PROCESSED_SQL,
+            (order_id, timestamp, agent, "ok", f"Reduced product {product_id} by {quantity} {unit}"),
+        )
+    _invalidate_product_cache(product_id)
+    return {
+        "result": "ok",
+        "previous_quantity": previous_quantity,
+        "new_quantity": new_quantity,
+        "available_unit": available_unit,
+    }
 
 
 def get_processed_inventory_alerts(limit: int = 100) -> list[dict]:
@@ -1,48 +1,64 @@
 from rich.console import Console
 from rich.panel import Panel
+from rich.style import Style
 
 class RichChatDisplay:
     def __init__(self):
-        self.console = Console()
+        # Message content is plain text: skip Rich's markup parser and highlighter
+        self.console = Console(highlight=False, markup=False)
+
+        # Parse panel styles once instead of on every print
+        self._user_style = Style.parse("bold blue")
+        self._assistant_style = Style.parse("bold green")
+        self._system_style = Style.parse("bold yellow")
+        self._tool_style = Style.parse("bold magenta")
+        self._error_style = Style.parse("red")
+
+        self._dispatch = {
+            "assistant": self.display_assistant,
+            "user": self.display_user,
+            "system": self.display_system,
+            "tool": self.display_tool_call_output,
+        }
 
     # -------------------------
     # Safe extractors
     # -------------------------
+    # System/user/tool messages are TypedDicts (plain dicts), only
+    # AssistantMessage is a model object -> check dict first, then one getattr
     @staticmethod
     def get_role(message):
-        if hasattr(message, "role"):
-            return message.role
         if isinstance(message, dict):
             return message.get("role", "assistant")
-        return "assistant"
+        return getattr(message, "role", "assistant")
 
     @staticmethod
     def get_content(message):
-        if hasattr(message, "content"):
-            return message.content
         if isinstance(message, dict):
             return message.get("content", "")
-        return ""
+        return getattr(message, "content", "")
 
     def clear(self):
         self.console.clear()
 
+    def display_many(self, messages):
+        """Render a batch of messages, flushing the terminal once at the end."""
+        # Console as context manager buffers all prints until exit
+        with self.console:
+            for message in messages:
+                self.display(message)
+
     # -------------------------
     # Central Display Router
     # -------------------------
     def display(self, message):
         role = self.get_role(message)
 
-        if role == "assistant":
-            self.display_assistant(message)
-        elif role == "user":
-            self.display_user(message)
-        elif role == "system":
-            self.display_system(message)
-        elif role == "tool":
-            self.display_tool_call_output(message)
+        handler = self._dispatch.get(role)
+        if handler is not None:
+            handler(message)
         else:
-            self.console.print(f"[red]Unknown message role: {role}[/]")
+            self.console.print(f"Unknown message role: {role}", style=self._error_style)
 
     # -------------------------
     # Display Methods
@@ -58,23 +74,23 @@ class RichChatDisplay:
     def display_user(self, message):
         content = self._render_safe(self.get_content(message))
         self.console.print(
-            Panel(content, title="YOU", style="bold blue")
+            Panel(content, title="YOU", style=self._user_style)
         )
 
     def display_assistant(self, message):
         content = self._render_safe(self.get_content(message))
         self.console.print(
-            Panel(content, title="ASSISTANT", style="bold green")
+            Panel(content, title="ASSISTANT", style=self._assistant_style)
         )
 
     def display_system(self, message):
         content = self._render_safe(self.get_content(message))
         self.console.print(
-            Panel(content, title="SYSTEM", style="bold yellow")
+            Panel(content, title="SYSTEM", style=self._system_style)
         )
 
     def display_tool_call_output(self, message):
         content = self._render_safe(self.get_content(message))
         self.console.print(
-            Panel(content, title="TOOL OUTPUT", style="bold magenta")
+            Panel(content, title="TOOL OUTPUT", style=self._tool_style)
         )
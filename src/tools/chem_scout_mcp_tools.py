@@ -1,39 +1,59 @@
 """MCP Tool Server for ChemScout AI (compatible with FastMCP and MCP 1.22.0)."""
 
 import asyncio
+import itertools
 import json
+import mmap
+import os
+import queue
 import re
-from datetime import datetime
+import threading
+from functools import lru_cache, wraps
 from pathlib import Path
-from typing import Any
+from typing import Any, Awaitable, BinaryIO, Callable, Iterator, Literal
 
+import orjson
 from mcp.server.fastmcp import FastMCP
 
+try:
+    # Optional: streaming parser for large imports (without it, files are parsed in memory)
+    import ijson
+except ImportError:
+    ijson = None
+
 from src.config import (
     INVENTORY_ALERTS_DIR,
     NOTIFICATIONS_DIR,
     BASE_DIR,
     DATA_DIR,
+    AUDIT_LOG_DEFAULT_WINDOW_DAYS,
 )
 from src.database.db import (
     init_db,
     add_product,
+    add_products_bulk,
+    add_product_rows_bulk,
     update_product,
     delete_product,
-    search_products,
+    search_products_json,
+    list_all_products_json,
     create_order,
+    create_orders_bulk,
     get_order_status,
-    list_open_orders,
+    list_open_orders_json,
     list_all_orders,
+    list_all_orders_columns,
     calculate_monthly_spending,
-    reduce_product_quantity,
     get_product,
     log_audit,
+    log_audit_many,
     set_agent_context,
     is_inventory_alert_processed,
     mark_inventory_alert_processed,
+    apply_inventory_alert,
     get_audit_log,
 )
+from src.utils.timestamps import utc_days_ago_iso, utc_now_iso_seconds
 
 # -----------------------------
 # FastMCP server instance
@@ -41,10 +61,47 @@ from src.database.db import (
 SERVER = FastMCP()   # HTTP-basiert, kein WebSocket!
 
 
+def _offload(func: Callable[..., Any]) -> Callable[..., Awaitable[Any]]:
+    """
+    Macht aus einem blockierenden Tool ein async Tool, das in einem Worker-Thread läuft.
+
+    So blockieren SQLite- und Datei-Zugriffe nicht den Event-Loop von FastMCP.
+    Der ganze Body läuft im selben Thread, damit set_agent_context (thread-local)
+    für die anschliessenden DB-Aufrufe gilt. Signatur und Docstring bleiben für
+    das Tool-Schema erhalten (functools.wraps).
+    """
+
+    @wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    return wrapper
+
+
+# Serialisiert schreibende Tools als Ganzes. Die DB-Schicht serialisiert zwar
+# einzelne Schreibzugriffe, aber Tools wie update_product_tool (alte Werte lesen,
+# schreiben, Audit) oder process_inventory_alert_tool (prüfen, reduzieren,
+# als verarbeitet markieren) bestehen aus mehreren Schritten, die sich sonst
+# bei parallelen Requests verschränken (z.B. doppelte Bestandsreduktion).
+_WRITE_LOCK = threading.Lock()
+
+
+def _write_locked(func: Callable[..., Any]) -> Callable[..., Any]:
+    """Führt ein (blockierendes) Tool unter _WRITE_LOCK aus; Lese-Tools bleiben lock-frei."""
+
+    @wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with _WRITE_LOCK:
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
 # -----------------------------
 # Database Init
 # -----------------------------
 @SERVER.tool()
+@_offload
 def init_database() -> str:
     """Initialisiert die ChemScout-Datenbank."""
     init_db()
@@ -54,7 +111,39 @@ def init_database() -> str:
 # -----------------------------
 # Product Tools
 # -----------------------------
+# Produktfelder der add/update-Tools (für die Audit-Werte)
+_PRODUCT_FIELDS = (
+    "name",
+    "cas_number",
+    "supplier",
+    "purity",
+    "package_size",
+    "price",
+    "currency",
+    "delivery_time_days",
+    "available_quantity",
+    "available_unit",
+)
+
+
+def _audit_values(values: dict, fields: tuple, skip_none: bool = False) -> str:
+    """
+    Serialisiert die Audit-Werte einmal mit orjson; log_audit speichert den String direkt.
+
+    fields enthält Argumentnamen oder (Audit-Key, Argumentname)-Paare.
+    """
+    out = {}
+    for field in fields:
+        key, arg = field if type(field) is tuple else (field, field)
+        value = values[arg]
+        if value is not None or not skip_none:
+            out[key] = value
+    return orjson.dumps(out).decode()
+
+
 @SERVER.tool()
+@_offload
+@_write_locked
 def add_product_tool(
     name: str,
     cas_number: str | None = None,
@@ -69,6 +158,7 @@ def add_product_tool(
     agent_name: str = "data_agent",
 ) -> dict:
     """Fügt ein neues Produkt in die Datenbank ein."""
+    values = locals()
     set_agent_context(agent_name)
     
     product_id = add_product(
@@ -89,18 +179,7 @@ def add_product_tool(
         action="INSERT",
         table_name="products",
         record_id=product_id,
-        new_values={
-            "name": name,
-            "cas_number": cas_number,
-            "supplier": supplier,
-            "purity": purity,
-            "package_size": package_size,
-            "price": price,
-            "currency": currency,
-            "delivery_time_days": delivery_time_days,
-            "available_quantity": available_quantity,
-            "available_unit": available_unit,
-        },
+        new_values=_audit_values(values, _PRODUCT_FIELDS),
         agent_name=agent_name,
     )
     
@@ -108,6 +187,37 @@ def add_product_tool(
 
 
 @SERVER.tool()
+@_offload
+@_write_locked
+def add_products_bulk_tool(products: list[dict], agent_name: str = "data_agent") -> dict:
+    """
+    Fügt mehrere Produkte auf einmal ein (eine Transaktion).
+
+    Jedes Produkt ist ein Objekt mit denselben Feldern wie bei add_product_tool
+    (name ist Pflicht).
+    """
+    set_agent_context(agent_name)
+
+    missing = [i for i, p in enumerate(products) if not p.get("name")]
+    if missing:
+        return {"status": "error", "message": f"Products without name at positions {missing}"}
+
+    product_ids = add_products_bulk(products)
+
+    log_audit(
+        action="INSERT",
+        table_name="products",
+        new_values={"product_ids": product_ids},
+        details=f"Bulk insert of {len(product_ids)} products",
+        agent_name=agent_name,
+    )
+
+    return {"status": "ok", "product_ids": product_ids}
+
+
+@SERVER.tool()
+@_offload
+@_write_locked
 def update_product_tool(
     product_id: int,
     name: str | None = None,
@@ -123,6 +233,7 @@ def update_product_tool(
     agent_name: str = "data_agent",
 ) -> dict:
     """Aktualisiert ein Produkt."""
+    values = locals()
     set_agent_context(agent_name)
     
     # Get old values before update
@@ -143,28 +254,8 @@ def update_product_tool(
     )
     
     if success:
-        # Build new_values dict with only changed fields
-        new_values = {}
-        if name is not None:
-            new_values["name"] = name
-        if cas_number is not None:
-            new_values["cas_number"] = cas_number
-        if supplier is not None:
-            new_values["supplier"] = supplier
-        if purity is not None:
-            new_values["purity"] = purity
-        if package_size is not None:
-            new_values["package_size"] = package_size
-        if price is not None:
-            new_values["price"] = price
-        if currency is not None:
-            new_values["currency"] = currency
-        if delivery_time_days is not None:
-            new_values["delivery_time_days"] = delivery_time_days
-        if available_quantity is not None:
-            new_values["available_quantity"] = available_quantity
-        if available_unit is not None:
-            new_values["available_unit"] = available_unit
+        # Nur die geänderten Felder loggen
+        new_values = _audit_values(values, _PRODUCT_FIELDS, skip_none=True)
         
         log_audit(
             action="UPDATE",
@@ -179,6 +270,8 @@ def update_product_tool(
 
 
 @SERVER.tool()
+@_offload
+@_write_locked
 def delete_product_tool(product_id: int, agent_name: str = "data_agent") -> dict:
     """Löscht ein Produkt."""
     set_agent_context(agent_name)
@@ -201,31 +294,42 @@ def delete_product_tool(product_id: int, agent_name: str = "data_agent") -> dict
 
 
 @SERVER.tool()
+@_offload
 def search_products_tool(
     query: str | None = None,
     cas_number: str | None = None,
     supplier: str | None = None,
     max_price: float | None = None,
-) -> dict:
+    format: Literal["rows", "columns"] = "rows",
+) -> str:
     """
     Durchsucht die Produktdatenbank.
 
-    Gibt IMMER ein Objekt mit 'results' zurück.
+    Gibt IMMER ein Objekt mit 'results' zurück. Mit format='columns' ist
+    'results' {"columns": [...], "data": [[...], ...]} statt einer Liste von Objekten
+    (kompakter bei vielen Treffern).
     """
-    results = search_products(
+    # JSON kommt fertig aus SQLite und wird unverändert durchgereicht
+    results = search_products_json(
         query=query,
         cas_number=cas_number,
         supplier=supplier,
         max_price=max_price,
+        columns=format == "columns",
     )
-    return {"results": results}
+    return f'{{"results": {results}}}'
 
 
 @SERVER.tool()
-def list_products_tool() -> list[dict]:
-    """Listet alle Produkte in der Datenbank."""
-    from src.database.db import list_all_products
-    return list_all_products()
+@_offload
+def list_products_tool(format: Literal["rows", "columns"] = "rows") -> str:
+    """
+    Listet alle Produkte in der Datenbank.
+
+    format='columns' liefert {"columns": [...], "data": [[...], ...]} statt einer Liste von Objekten.
+    """
+    # JSON-Array direkt aus SQLite, gecacht bis zum nächsten Schreibzugriff
+    return list_all_products_json(columns=format == "columns")
 
 
 # -----------------------------
@@ -238,12 +342,31 @@ JSON_SEARCH_ROOTS: list[Path] = [
 ]
 
 
+# read_json_file_tool returns the full document; larger files must be streamed
+READ_JSON_MAX_BYTES = 50 * 1024 * 1024
+
+# Products per executemany transaction in import_products_from_json_tool
+IMPORT_BATCH_SIZE = 500
+
+# Files from this size on are streamed with ijson instead of parsed in one go
+IMPORT_STREAM_MIN_BYTES = 1024 * 1024
+
+# Parsed batches that may wait for insertion before the parser pauses
+IMPORT_QUEUE_SIZE = 4
+
+# Files imported at the same time by import_products_from_json_batch_tool
+IMPORT_MAX_PARALLEL_FILES = 4
+
+
+@lru_cache(maxsize=256)
 def _resolve_json_path(relative_or_absolute_path: str) -> Path:
     """
     Resolves a JSON path for the import tools.
 
     - If an absolute path is given and exists, we use it.
     - Otherwise we search relative to known roots (data/, src/database/).
+
+    Results are cached; use _open_json_path, which re-resolves stale entries.
     """
     p = Path(relative_or_absolute_path)
     if p.is_absolute():
@@ -267,6 +390,20 @@ def _resolve_json_path(relative_or_absolute_path: str) -> Path:
     )
 
 
+class _PriceCharTable(dict):
+    """str.translate table keeping only decimal digits, '.' and '-' (cached per char)."""
+
+    def __missing__(self, code: int) -> int | None:
+        ch = chr(code)
+        keep = code if ch.isdecimal() or ch in ".-" else None
+        self[code] = keep
+        return keep
+
+
+_PRICE_STRIP = _PriceCharTable()
+_PRICE_NUM_RE = re.compile(r"\d+(?:\.\d+)?")
+
+
 def _normalise_price(value: Any) -> float | None:
     """
     Convert various price formats into a single float if possible.
@@ -275,15 +412,17 @@ def _normalise_price(value: Any) -> float | None:
       - "12$/100g"
       - "CHF 20 - 55"
     """
-    if value is None:
-        return None
     if isinstance(value, (int, float)):
         return float(value)
     if not isinstance(value, str):
         return None
+    # Plain numbers like "12" or "12.5" need no cleaning
+    head, _, tail = value.partition(".")
+    if head.isdecimal() and (not tail or tail.isdecimal()):
+        return float(value)
 
     # Extract the first number or range "x-y"
-    cleaned = re.sub(r"[^\d\.\-]", "", value)
+    cleaned = value.translate(_PRICE_STRIP)
     if "-" in cleaned:
         parts = [p for p in cleaned.split("-") if p]
         if len(parts) == 2:
@@ -293,7 +432,7 @@ def _normalise_price(value: Any) -> float | None:
             except Exception:
                 return None
 
-    match = re.search(r"\d+(\.\d+)?", cleaned)
+    match = _PRICE_NUM_RE.search(cleaned)
     if not match:
         return None
     try:
@@ -314,70 +453,184 @@ def _maybe_str_list_to_str(value: Any) -> str | None:
     return str(value)
 
 
-def _extract_products_from_json(obj: Any) -> list[dict]:
+# Keys whose values the product heuristic reads (kept in full while streaming)
+_PRODUCT_VALUE_KEYS = frozenset(
+    {
+        "name",
+        "compound",
+        "CAS",
+        "cas",
+        "CAS-Number",
+        "cas_number",
+        "CAS number",
+        "supplier",
+        "purity",
+        "package_size",
+        "price",
+        "price_usd",
+        "price_per_kg",
+        "price_estimate",
+    }
+)
+
+
+def _product_from_node(node: dict) -> tuple | None:
+    """Build a product row from a JSON object that looks like a product entry."""
+    # Heuristic: candidates that look like product entries (name- or CAS-like key).
+    # Only these exact keys are read, so looking them up directly doubles as the
+    # detection step; other spellings could never produce a product anyway.
+    name = node.get("name") or node.get("compound")
+    cas = (
+        node.get("CAS")
+        or node.get("cas")
+        or node.get("CAS-Number")
+        or node.get("cas_number")
+        or node.get("CAS number")
+    )
+    if name is None and cas is None:
+        return None
+
+    supplier = node.get("supplier")
+    # Clean strings (the common case) need no conversion
+    if supplier is not None and type(supplier) is not str:
+        supplier = _maybe_str_list_to_str(supplier)
+
+    # Price variants
+    price_raw = (
+        node.get("price")
+        or node.get("price_usd")
+        or node.get("price_per_kg")
+        or node.get("price_estimate")
+    )
+    if type(price_raw) in (int, float):
+        price = float(price_raw)
+    else:
+        price = _normalise_price(price_raw)
+
+    name = str(name) if name is not None else None
+    cas = str(cas) if cas is not None else None
+
+    # only keep entries that at least have a name or CAS
+    if not (name or cas):
+        return None
+    # Positional row in PRODUCT_IMPORT_FIELDS order (fed straight to executemany);
+    # CAS-only entries use the CAS number as name
+    return (
+        name or cas,
+        cas,
+        supplier,
+        node.get("purity"),
+        node.get("package_size"),
+        price,
+        "CHF",  # normalise to single currency for now
+    )
+
+
+def _iter_products_from_json(fp: BinaryIO) -> Iterator[tuple]:
     """
-    Recursively walk an arbitrary JSON structure and extract
-    product-like entries (name/compound + CAS and optional fields).
+    Stream an arbitrary JSON document and yield product-like entries
+    (name/compound + CAS and optional fields) as soon as each object closes.
+
+    Nested product objects are yielded before the object containing them.
+    Values of product fields (e.g. a supplier object) are not searched.
     """
-    products: list[dict] = []
+    # Each frame is [container, pending map key, keep]. "keep" marks values the
+    # heuristic reads (e.g. a supplier list); other containers are dropped once
+    # closed so memory stays bounded by the current JSON path.
+    frames: list[list[Any]] = []
+
+    for _prefix, event, value in ijson.parse(fp, use_float=True):
+        if event == "map_key":
+            frames[-1][1] = value
+            continue
+        if event == "start_map" or event == "start_array":
+            keep = False
+            if frames:
+                parent, key, parent_keep = frames[-1]
+                keep = parent_keep or (
+                    isinstance(parent, dict) and key in _PRODUCT_VALUE_KEYS
+                )
+            frames.append([{} if event == "start_map" else [], None, keep])
+            continue
+        if event == "end_map" or event == "end_array":
+            value, _key, keep = frames.pop()
+            # Kept containers sit under a product field and are never products
+            if event == "end_map" and not keep:
+                product = _product_from_node(value)
+                if product is not None:
+                    yield product
+            if not keep:
+                # Placeholder keeps the key visible for the product marker check
+                value = None
+
+        if not frames:
+            continue
+        parent, key, parent_keep = frames[-1]
+        if isinstance(parent, dict):
+            parent[key] = value
+        elif parent_keep:
+            parent.append(value)
+
+
+def _iter_products_from_obj(obj: Any) -> Iterator[tuple]:
+    """In-memory counterpart of _iter_products_from_json (same order)."""
+    # Explicit stack instead of recursion: deep catalogs cannot hit the
+    # recursion limit. A dict is pushed twice: once to expand its children,
+    # once more (flag True) to be checked after all of them.
+    stack: list[tuple[Any, bool]] = [(obj, False)]
+    while stack:
+        node, children_done = stack.pop()
+        if children_done:
+            product = _product_from_node(node)
+            if product is not None:
+                yield product
+            continue
 
-    def visit(node: Any) -> None:
+        # Only containers can hold products; scalars never touch the stack.
+        # dict views and lists are reversible, no copy needed.
         if isinstance(node, dict):
-            # Heuristic: candidates that look like product entries
-            keys = {k.lower() for k in node.keys()}
-            has_name_like = any(k in keys for k in ("name", "compound"))
-            has_cas_like = any(
-                k in keys for k in ("cas", "cas_number", "cas-number", "cas number")
+            stack.append((node, True))
+            # Values of product fields (supplier lists, price objects, ...) are
+            # read by _product_from_node and never hold products themselves
+            stack.extend(
+                (v, False)
+                for k, v in reversed(node.items())
+                if isinstance(v, (dict, list)) and k not in _PRODUCT_VALUE_KEYS
             )
+        elif isinstance(node, list):
+            stack.extend((v, False) for v in reversed(node) if isinstance(v, (dict, list)))
 
-            if has_name_like or has_cas_like:
-                name = node.get("name") or node.get("compound")
-                cas = (
-                    node.get("CAS")
-                    or node.get("cas")
-                    or node.get("CAS-Number")
-                    or node.get("cas_number")
-                    or node.get("CAS number")
-                )
-                supplier = node.get("supplier")
-                supplier = _maybe_str_list_to_str(supplier)
-
-                # Price variants
-                price_raw = (
-                    node.get("price")
-                    or node.get("price_usd")
-                    or node.get("price_per_kg")
-                    or node.get("price_estimate")
-                )
-                price = _normalise_price(price_raw)
-
-                product = {
-                    "name": str(name) if name is not None else None,
-                    "cas_number": str(cas) if cas is not None else None,
-                    "supplier": supplier,
-                    "purity": node.get("purity"),
-                    "package_size": node.get("package_size"),
-                    "price": price,
-                    "currency": "CHF",  # normalise to single currency for now
-                }
-
-                # only keep entries that at least have a name or CAS
-                if product["name"] or product["cas_number"]:
-                    products.append(product)
 
-            # Recurse into children
-            for v in node.values():
-                visit(v)
+def _open_json_path(path: str) -> tuple[Path, BinaryIO]:
+    """Resolve (cached) and open a JSON file; re-resolves once if the file moved."""
+    resolved = _resolve_json_path(path)
+    try:
+        return resolved, resolved.open("rb")
+    except FileNotFoundError:
+        _resolve_json_path.cache_clear()
+        resolved = _resolve_json_path(path)
+        return resolved, resolved.open("rb")
 
-        elif isinstance(node, list):
-            for item in node:
-                visit(item)
 
-    visit(obj)
-    return products
+def _load_json_bytes(fp: BinaryIO, size: int) -> Any:
+    """
+    Parse an open JSON file via mmap: the kernel pages the file in on demand
+    and orjson reads the mapped bytes without an intermediate copy or str.
+    """
+    if size == 0:
+        # mmap cannot map empty files; let the parser report the error
+        return json.loads(fp.read())
+    with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        with memoryview(mm) as view:
+            try:
+                return orjson.loads(view)
+            except orjson.JSONDecodeError:
+                # NaN/Infinity are rejected by orjson but accepted by json
+                return json.loads(mm[:])
 
 
 @SERVER.tool()
+@_offload
 def read_json_file_tool(path: str) -> dict:
     """
     Reads a JSON file from disk and returns its parsed content.
@@ -387,8 +640,15 @@ def read_json_file_tool(path: str) -> dict:
       - src/database/
       - the project root.
     """
-    resolved = _resolve_json_path(path)
-    data = json.loads(resolved.read_text(encoding="utf-8"))
+    resolved, fp = _open_json_path(path)
+    with fp:
+        size = os.fstat(fp.fileno()).st_size
+        if size > READ_JSON_MAX_BYTES:
+            raise ValueError(
+                f"JSON file '{resolved}' is {size} bytes (limit {READ_JSON_MAX_BYTES}); "
+                "use import_products_from_json_tool to stream large catalogs."
+            )
+        data = _load_json_bytes(fp, size)
     return {
         "status": "ok",
         "path": str(resolved),
@@ -397,7 +657,7 @@ def read_json_file_tool(path: str) -> dict:
 
 
 @SERVER.tool()
-def import_products_from_json_tool(path: str) -> dict:
+async def import_products_from_json_tool(path: str) -> dict:
     """
     Parses a (possibly messy) JSON file and inserts detected products
     into the `products` table.
@@ -407,40 +667,116 @@ def import_products_from_json_tool(path: str) -> dict:
         name / compound, CAS / cas / CAS-Number, supplier, price.
       - Normalises diverse price formats into a single float.
     """
-    resolved = _resolve_json_path(path)
-    raw = json.loads(resolved.read_text(encoding="utf-8"))
-    products = _extract_products_from_json(raw)
+    resolved, fp = await asyncio.to_thread(_open_json_path, path)
 
+    # Parsing and inserting overlap: one thread parses and queues batches, the
+    # other inserts them. The bounded queue stops the parser from running ahead.
+    batches: queue.Queue[list[tuple] | None] = queue.Queue(maxsize=IMPORT_QUEUE_SIZE)
+    detected = 0
     inserted_ids: list[int] = []
-    for p in products:
-        if not p.get("name") and not p.get("cas_number"):
-            continue
 
-        product_id = add_product(
-            name=p.get("name") or (p.get("cas_number") or "Unnamed product"),
-            cas_number=p.get("cas_number"),
-            supplier=p.get("supplier"),
-            purity=p.get("purity"),
-            package_size=p.get("package_size"),
-            price=p.get("price"),
-            currency=p.get("currency") or "CHF",
-            delivery_time_days=None,
-        )
-        inserted_ids.append(product_id)
+    def produce() -> None:
+        nonlocal detected
+        batch: list[tuple] = []
+
+        def insert(row: tuple) -> None:
+            nonlocal detected, batch
+            detected += 1
+            batch.append(row)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                batches.put(batch)
+                batch = []
+
+        try:
+            with fp:
+                size = os.fstat(fp.fileno()).st_size
+                if ijson is None or size < IMPORT_STREAM_MIN_BYTES:
+                    # Small files: one orjson parse beats ijson's per-event overhead
+                    for p in _iter_products_from_obj(_load_json_bytes(fp, size)):
+                        insert(p)
+                else:
+                    try:
+                        for p in _iter_products_from_json(fp):
+                            insert(p)
+                    except ijson.JSONError:
+                        # Messy exports contain NaN/Infinity, which only json accepts.
+                        # Both walkers yield in the same order, so skip what is already queued.
+                        raw = json.loads(resolved.read_bytes())
+                        for p in itertools.islice(_iter_products_from_obj(raw), detected, None):
+                            insert(p)
+            if batch:
+                batches.put(batch)
+        finally:
+            batches.put(None)
+
+    def consume() -> None:
+        # Keep draining after a failure so the producer never blocks on a full queue
+        error: Exception | None = None
+        while (batch := batches.get()) is not None:
+            if error is not None:
+                continue
+            try:
+                # Pro Batch sperren, damit andere Schreib-Tools dazwischen drankommen
+                with _WRITE_LOCK:
+                    inserted_ids.extend(add_product_rows_bulk(batch))
+            except Exception as exc:
+                error = exc
+        if error is not None:
+            raise error
+
+    await asyncio.gather(asyncio.to_thread(produce), asyncio.to_thread(consume))
 
     return {
         "status": "ok",
         "path": str(resolved),
-        "detected_products": len(products),
+        "detected_products": detected,
         "inserted_products": len(inserted_ids),
         "product_ids": inserted_ids,
     }
 
 
+@SERVER.tool()
+async def import_products_from_json_batch_tool(paths: list[str]) -> dict:
+    """
+    Imports several JSON catalogs concurrently (same heuristics as
+    import_products_from_json_tool). Returns one result per path, in order.
+    """
+    # Parsing overlaps across files; inserts still go through the single writer
+    limit = asyncio.Semaphore(IMPORT_MAX_PARALLEL_FILES)
+
+    async def run(path: str) -> dict:
+        async with limit:
+            try:
+                return await import_products_from_json_tool(path)
+            except Exception as e:
+                return {"status": "error", "path": path, "message": str(e)}
+
+    results = await asyncio.gather(*(run(p) for p in paths))
+    return {
+        "status": "ok",
+        "inserted_products": sum(r.get("inserted_products", 0) for r in results),
+        "results": results,
+    }
+
+
 # -----------------------------
 # Order Tools
 # -----------------------------
+# Audit-Felder von create_order_tool; externe Orders speichern die Produktangaben
+# unter external_* (Audit-Key, Argumentname)
+_ORDER_AUDIT_FIELDS = ("product_id", "quantity", "unit", "customer_reference")
+_EXTERNAL_ORDER_AUDIT_FIELDS = _ORDER_AUDIT_FIELDS + (
+    ("external_name", "name"),
+    ("external_supplier", "supplier"),
+    ("external_purity", "purity"),
+    ("external_package_size", "package_size"),
+    ("external_price_range", "price_range"),
+)
+
+
 @SERVER.tool()
+@_offload
+@_write_locked
 def create_order_tool(
     product_id: int,
     quantity: float,
@@ -466,6 +802,7 @@ def create_order_tool(
     2. Order Agent calls request_inventory_revision_tool (creates alert file)
     3. Data Agent calls process_inventory_alert_tool (updates inventory)
     """
+    values = locals()
     set_agent_context(agent_name)
 
     if product_id == 0:
@@ -489,17 +826,7 @@ def create_order_tool(
             action="INSERT",
             table_name="orders",
             record_id=order["order_id"],
-            new_values={
-                "product_id": 0,
-                "quantity": quantity,
-                "unit": unit,
-                "customer_reference": customer_reference,
-                "external_name": name,
-                "external_supplier": supplier,
-                "external_purity": purity,
-                "external_package_size": package_size,
-                "external_price_range": price_range,
-            },
+            new_values=_audit_values(values, _EXTERNAL_ORDER_AUDIT_FIELDS),
             details="External order (product not in database)",
             agent_name=agent_name,
         )
@@ -521,19 +848,129 @@ def create_order_tool(
         action="INSERT",
         table_name="orders",
         record_id=order["order_id"],
-        new_values={
-            "product_id": product_id,
-            "quantity": quantity,
-            "unit": unit,
-            "customer_reference": customer_reference,
-        },
+        new_values=_audit_values(values, _ORDER_AUDIT_FIELDS),
         details="Internal order created (inventory pending - Data Agent will process via inventory alert)",
         agent_name=agent_name,
     )
     
     return order
 
+_BULK_ORDER_TEXT_FIELDS = ("customer_reference", "name", "supplier", "purity", "package_size", "price_range")
+
+
+def _bulk_order_values(order: Any) -> dict:
+    """
+    Validates one create_orders_bulk_tool entry and coerces it to the types of
+    create_order_tool. Raises ValueError naming the offending field.
+    """
+    if not isinstance(order, dict):
+        raise ValueError("order must be an object")
+
+    product_id = order.get("product_id")
+    if product_id is None:
+        product_id = 0  # external order, as in create_order_tool
+    elif isinstance(product_id, bool):
+        raise ValueError(f"product_id must be an integer, got {product_id!r}")
+    else:
+        try:
+            product_id = int(product_id)
+        except (TypeError, ValueError):
+            raise ValueError(f"product_id must be an integer, got {product_id!r}") from None
+        if product_id < 0:
+            raise ValueError(f"product_id must be >= 0, got {product_id}")
+
+    raw_quantity = order.get("quantity")
+    if raw_quantity is None:
+        raise ValueError("quantity is required")
+    try:
+        quantity = float(raw_quantity) if not isinstance(raw_quantity, bool) else None
+    except (TypeError, ValueError):
+        quantity = None
+    if quantity is None or not quantity > 0 or quantity == float("inf"):
+        raise ValueError(f"quantity must be a positive number, got {raw_quantity!r}")
+
+    values = {
+        "product_id": product_id,
+        "quantity": quantity,
+        "unit": str(order.get("unit") or "g"),
+    }
+    for field in _BULK_ORDER_TEXT_FIELDS:
+        value = order.get(field)
+        values[field] = str(value) if value is not None else None
+    return values
+
+
+@SERVER.tool()
+@_offload
+@_write_locked
+def create_orders_bulk_tool(orders: list[dict], agent_name: str = "order_agent") -> dict:
+    """
+    Creates several orders in one transaction.
+
+    Each order is an object with the fields of create_order_tool
+    (product_id, quantity, unit, customer_reference, name, supplier,
+    purity, package_size, price_range). Like create_order_tool, this does
+    NOT modify inventory: call request_inventory_revision_tool for every
+    internal order afterwards.
+    """
+    set_agent_context(agent_name)
+
+    # Validate everything before the transaction, so one bad entry does not
+    # abort the batch halfway with a bare KeyError/TypeError
+    values_list = []
+    errors = []
+    for i, order in enumerate(orders):
+        try:
+            values_list.append(_bulk_order_values(order))
+        except ValueError as e:
+            errors.append({"position": i, "message": str(e)})
+    if errors:
+        return {
+            "status": "error",
+            "message": f"Invalid orders at positions {[e['position'] for e in errors]}; nothing was created",
+            "errors": errors,
+        }
+
+    rows = [
+        {
+            "product_id": v["product_id"],
+            "quantity": v["quantity"],
+            "unit": v["unit"],
+            "customer_reference": v["customer_reference"],
+            "external_name": v["name"],
+            "external_supplier": v["supplier"],
+            "external_purity": v["purity"],
+            "external_package_size": v["package_size"],
+            "external_price_range": v["price_range"],
+        }
+        for v in values_list
+    ]
+    created = create_orders_bulk(rows, auto_reduce_inventory=False)
+
+    # Same per-order audit values as create_order_tool
+    audit_entries = []
+    for order, values in zip(created, values_list):
+        external = order["product_id"] == 0
+        order["external"] = external
+        if external:
+            audit_entries.append((
+                order["order_id"],
+                _audit_values(values, _EXTERNAL_ORDER_AUDIT_FIELDS),
+                "External order (product not in database), bulk insert",
+            ))
+        else:
+            audit_entries.append((
+                order["order_id"],
+                _audit_values(values, _ORDER_AUDIT_FIELDS),
+                "Internal order created in bulk (inventory pending - Data Agent will process via inventory alert)",
+            ))
+    log_audit_many("INSERT", "orders", audit_entries, agent_name=agent_name)
+
+    return {"status": "ok", "orders": created}
+
+
 @SERVER.tool()
+@_offload
 def get_order_status_tool(order_id: str) -> dict:
     """Gibt den Status einer Bestellung zurück."""
     order = get_order_status(order_id)
@@ -543,18 +980,21 @@ def get_order_status_tool(order_id: str) -> dict:
 
 
 @SERVER.tool()
-def list_open_orders_tool() -> list[dict]:
+@_offload
+def list_open_orders_tool() -> str:
     """Listet alle offenen Bestellungen."""
-    return list_open_orders()
+    return list_open_orders_json()
 
 
 @SERVER.tool()
+@_offload
 def list_all_orders_tool(
     status: str | None = None,
     sort_by: str = "created_at",
     sort_order: str = "DESC",
     limit: int | None = None,
-) -> list[dict]:
+    format: Literal["rows", "columns"] = "rows",
+) -> list[dict] | dict:
     """
     Lists all orders with optional filtering and sorting.
     
@@ -569,15 +1009,24 @@ def list_all_orders_tool(
         sort_by: Column to sort by. Options: 'created_at' (default), 'order_id', 'quantity', 'status'.
         sort_order: 'DESC' for newest first (default), 'ASC' for oldest first.
         limit: Maximum number of orders to return. None for all orders.
+        format: 'rows' (default) for a list of order dicts, 'columns' for
+            {"columns": [...], "data": [[...], ...]} (more compact for many orders).
     
     Returns:
-        List of order dictionaries with all order details.
+        List of order dictionaries with all order details (or the columns object).
     
     Examples:
         - Show latest 5 orders: list_all_orders_tool(limit=5)
         - Show all completed orders: list_all_orders_tool(status='COMPLETED')
         - Show oldest orders first: list_all_orders_tool(sort_order='ASC')
     """
+    if format == "columns":
+        return list_all_orders_columns(
+            status=status,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            limit=limit,
+        )
     return list_all_orders(
         status=status,
         sort_by=sort_by,
@@ -587,6 +1036,7 @@ def list_all_orders_tool(
 
 
 @SERVER.tool()
+@_offload
 def monthly_spending_tool(year: int, month: int) -> dict:
     """
     Returns aggregated chemical spending for a given month.
@@ -597,13 +1047,28 @@ def monthly_spending_tool(year: int, month: int) -> dict:
 # -----------------------------
 # Customer notification helpers
 # -----------------------------
-def _write_text_file(path, lines: list[str]) -> str:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+# Verzeichnisse, die bereits angelegt wurden (spart mkdir pro Datei)
+_created_dirs: set[Path] = set()
+
+
+def _write_text_file(path, content: str) -> str:
+    parent = path.parent
+    if parent not in _created_dirs:
+        parent.mkdir(parents=True, exist_ok=True)
+        _created_dirs.add(parent)
+    try:
+        path.write_text(content, encoding="utf-8")
+    except FileNotFoundError:
+        # Verzeichnis wurde zwischenzeitlich gelöscht
+        _created_dirs.discard(parent)
+        parent.mkdir(parents=True, exist_ok=True)
+        _created_dirs.add(parent)
+        path.write_text(content, encoding="utf-8")
     return str(path)
 
 
 @SERVER.tool()
+@_offload
 def notify_customer_tool(
     order_id: str,
     message: str,
@@ -614,24 +1079,24 @@ def notify_customer_tool(
     Sends a fake confirmation email if an address is provided,
     otherwise writes a confirmation text file for traceability.
     """
-    timestamp = datetime.utcnow().isoformat()
+    timestamp = utc_now_iso_seconds()
     mode = "email" if customer_email else "file"
 
     filename = f"{mode}_{order_id}.txt"
     target = NOTIFICATIONS_DIR / filename
 
-    lines = [
-        f"timestamp: {timestamp}",
-        f"order_id: {order_id}",
-        f"mode: {mode}",
-        f"customer_email: {customer_email or 'not provided'}",
-        f"customer_name: {customer_name or 'not provided'}",
-        "",
-        "message:",
-        message or "Your order has been recorded. Thank you.",
-    ]
+    content = (
+        f"timestamp: {timestamp}\n"
+        f"order_id: {order_id}\n"
+        f"mode: {mode}\n"
+        f"customer_email: {customer_email or 'not provided'}\n"
+        f"customer_name: {customer_name or 'not provided'}\n"
+        "\n"
+        "message:\n"
+        f"{message or 'Your order has been recorded. Thank you.'}\n"
+    )
 
-    path = _write_text_file(target, lines)
+    path = _write_text_file(target, content)
     return {
         "status": "ok",
         "method": mode,
@@ -643,6 +1108,7 @@ def notify_customer_tool(
 # Inventory handoff for Data Agent
 # -----------------------------
 @SERVER.tool()
+@_offload
 def request_inventory_revision_tool(
     order_id: str,
     product_id: int | None = None,
@@ -655,26 +1121,98 @@ def request_inventory_revision_tool(
     Note: For internal orders (product_id > 0), inventory is automatically reduced when the order is created.
     This tool is mainly for tracking and external orders.
     """
-    timestamp = datetime.utcnow().isoformat()
+    timestamp = utc_now_iso_seconds()
     filename = f"inventory_{order_id}.txt"
     target = INVENTORY_ALERTS_DIR / filename
 
-    lines = [
-        f"timestamp: {timestamp}",
-        f"order_id: {order_id}",
-        f"product_id: {product_id if product_id is not None else 'unknown'}",
-        f"ordered_quantity: {ordered_quantity if ordered_quantity is not None else 'unspecified'} {unit}",
-        f"note: {note or 'please revise remaining quantity in the database'}",
-    ]
+    # JSON statt "key: value"-Zeilen: process_inventory_alert_tool liest die
+    # Werte typisiert zurück, ohne Menge und Einheit aus einem String zu parsen
+    content = json.dumps(
+        {
+            "timestamp": timestamp,
+            "order_id": order_id,
+            "product_id": product_id,
+            "ordered_quantity": ordered_quantity,
+            "unit": unit,
+            "note": note or "please revise remaining quantity in the database",
+        },
+        indent=2,
+    ) + "\n"
 
-    path = _write_text_file(target, lines)
+    path = _write_text_file(target, content)
     return {
         "status": "ok",
         "path": path,
     }
 
 
+def _parse_inventory_alert(content: bytes) -> dict:
+    """
+    Reads an inventory alert file written by request_inventory_revision_tool.
+
+    Current files are JSON; older ones use "key: value" lines with the quantity
+    as "2.0 g". Returns product_id (int, None if invalid), quantity, unit and
+    error: None or (details, message) if the quantity cannot be used.
+    """
+    unspecified = (
+        "Ordered quantity not specified",
+        "Ordered quantity not specified in alert file for order {order_id}",
+    )
+
+    if content.lstrip().startswith(b"{"):
+        data = orjson.loads(content)
+        product_id = data.get("product_id")
+        if type(product_id) is not int or product_id < 0:
+            product_id = None
+        quantity = data.get("ordered_quantity")
+        if type(quantity) not in (int, float):
+            return {"product_id": product_id, "quantity": None, "unit": None, "error": unspecified}
+        return {
+            "product_id": product_id,
+            "quantity": float(quantity),
+            "unit": data.get("unit") or "g",
+            "error": None,
+        }
+
+    # Legacy format
+    alert_data = {}
+    for line in content.decode("utf-8").strip().split("\n"):
+        if ":" in line:
+            key, value = line.split(":", 1)
+            alert_data[key.strip()] = value.strip()
+
+    product_id_str = alert_data.get("product_id", "unknown")
+    product_id = int(product_id_str) if product_id_str.isdigit() else None
+    result = {"product_id": product_id, "quantity": None, "unit": None, "error": None}
+
+    ordered_qty_str = alert_data.get("ordered_quantity", "")
+    if not ordered_qty_str or ordered_qty_str == "unspecified":
+        result["error"] = unspecified
+        return result
+
+    # Parse quantity and unit from string like "2.0 g" or "100.5 kg"
+    parts = ordered_qty_str.split()
+    if len(parts) < 2:
+        result["error"] = (
+            f"Could not parse quantity from '{ordered_qty_str}'",
+            f"Could not parse quantity and unit from '{ordered_qty_str}'",
+        )
+        return result
+    try:
+        result["quantity"] = float(parts[0])
+    except ValueError:
+        result["error"] = (
+            f"Could not parse quantity '{parts[0]}' as number",
+            f"Could not parse quantity '{parts[0]}' as a number",
+        )
+        return result
+    result["unit"] = " ".join(parts[1:])
+    return result
+
+
 @SERVER.tool()
+@_offload
+@_write_locked
 def process_inventory_alert_tool(order_id: str, agent_name: str = "data_agent") -> dict:
     """
     Processes an inventory alert file and automatically reduces available quantity for internal orders.
@@ -705,16 +1243,10 @@ def process_inventory_alert_tool(order_id: str, agent_name: str = "data_agent")
             "message": f"Inventory alert file not found for order {order_id}",
         }
     
-    # Parse the alert file
-    lines = alert_file.read_text(encoding="utf-8").strip().split("\n")
-    alert_data = {}
-    for line in lines:
-        if ":" in line:
-            key, value = line.split(":", 1)
-            alert_data[key.strip()] = value.strip()
-    
-    product_id_str = alert_data.get("product_id", "unknown")
-    if product_id_str == "unknown" or not product_id_str.isdigit():
+    alert = _parse_inventory_alert(alert_file.read_bytes())
+
+    product_id = alert["product_id"]
+    if product_id is None:
         # Mark as processed with skip status
         mark_inventory_alert_processed(
             order_id=order_id,
@@ -727,8 +1259,6 @@ def process_inventory_alert_tool(order_id: str, agent_name: str = "data_agent")
             "message": f"Invalid or missing product_id in alert file for order {order_id}",
         }
     
-    product_id = int(product_id_str)
-    
     # Only process internal orders (product_id > 0)
     if product_id == 0:
         mark_inventory_alert_processed(
@@ -742,119 +1272,91 @@ def process_inventory_alert_tool(order_id: str, agent_name: str = "data_agent")
             "message": f"Order {order_id} is an external order (product_id=0), no inventory to update",
         }
     
-    # Get ordered quantity
-    ordered_qty_str = alert_data.get("ordered_quantity", "")
-    if not ordered_qty_str or ordered_qty_str == "unspecified":
-        mark_inventory_alert_processed(
-            order_id=order_id,
-            result="error",
-            details="Ordered quantity not specified",
-            processed_by=agent_name,
-        )
-        return {
-            "status": "error",
-            "message": f"Ordered quantity not specified in alert file for order {order_id}",
-        }
-    
-    # Parse quantity and unit from string like "2.0 g" or "100.5 kg"
-    parts = ordered_qty_str.split()
-    if len(parts) < 2:
-        mark_inventory_alert_processed(
-            order_id=order_id,
-            result="error",
-            details=f"Could not parse quantity from '{ordered_qty_str}'",
-            processed_by=agent_name,
-        )
-        return {
-            "status": "error",
-            "message": f"Could not parse quantity and unit from '{ordered_qty_str}'",
-        }
-    
-    try:
-        quantity = float(parts[0])
-        unit = " ".join(parts[1:])
-    except ValueError:
+    if alert["error"] is not None:
+        details, message = alert["error"]
         mark_inventory_alert_processed(
             order_id=order_id,
             result="error",
-            details=f"Could not parse quantity '{parts[0]}' as number",
+            details=details,
             processed_by=agent_name,
         )
         return {
             "status": "error",
-            "message": f"Could not parse quantity '{parts[0]}' as a number",
+            "message": message.replace("{order_id}", str(order_id)),
         }
+    quantity = alert["quantity"]
+    unit = alert["unit"]
     
-    # Get current product info
-    product = get_product(product_id)
-    if product is None:
-        mark_inventory_alert_processed(
-            order_id=order_id,
-            result="error",
-            details=f"Product {product_id} not found",
-            processed_by=agent_name,
-        )
+    # Bestand reduzieren, Audit-Eintrag und Verarbeitungs-Status in einer Transaktion
+    applied = apply_inventory_alert(order_id, product_id, quantity, unit, processed_by=agent_name)
+
+    if applied["result"] == "not_found":
         return {
             "status": "error",
             "message": f"Product {product_id} not found in database",
         }
-    
-    # Reduce quantity
-    success = reduce_product_quantity(product_id, quantity, unit)
-    
-    if success:
-        # Get updated product info
-        updated_product = get_product(product_id)
-        
-        # Log the inventory change
-        log_audit(
-            action="UPDATE",
-            table_name="products",
-            record_id=product_id,
-            old_values={"available_quantity": product.get("available_quantity")},
-            new_values={"available_quantity": updated_product.get("available_quantity") if updated_product else None},
-            details=f"Inventory reduced via alert for order {order_id}",
-            agent_name=agent_name,
-        )
-        
-        # Mark as processed
-        mark_inventory_alert_processed(
-            order_id=order_id,
-            result="ok",
-            details=f"Reduced product {product_id} by {quantity} {unit}",
-            processed_by=agent_name,
-        )
-        
+
+    if applied["result"] == "ok":
         return {
             "status": "ok",
             "message": f"Successfully reduced available quantity for product {product_id}",
             "product_id": product_id,
             "reduced_quantity": quantity,
             "unit": unit,
-            "previous_quantity": product.get("available_quantity"),
-            "new_quantity": updated_product.get("available_quantity") if updated_product else None,
-        }
-    else:
-        mark_inventory_alert_processed(
-            order_id=order_id,
-            result="warning",
-            details=f"Could not reduce quantity (units mismatch or NULL)",
-            processed_by=agent_name,
-        )
-        return {
-            "status": "warning",
-            "message": f"Could not reduce quantity (possibly units don't match or quantity was NULL)",
-            "product_id": product_id,
-            "current_quantity": product.get("available_quantity"),
-            "current_unit": product.get("available_unit"),
-            "requested_quantity": quantity,
-            "requested_unit": unit,
+            "previous_quantity": applied["previous_quantity"],
+            "new_quantity": applied["new_quantity"],
         }
 
+    return {
+        "status": "warning",
+        "message": f"Could not reduce quantity (possibly units don't match or quantity was NULL)",
+        "product_id": product_id,
+        "current_quantity": applied["previous_quantity"],
+        "current_unit": applied["available_unit"],
+        "requested_quantity": quantity,
+        "requested_unit": unit,
+    }
+
 # -----------------------------
 # Notification Display Tools
 # -----------------------------
+# Dateiname -> (mtime_ns, size, geparste Felder); neu gelesen wird nur,
+# wenn sich die Datei geändert hat
+_notification_cache: dict[str, tuple[int, int, dict]] = {}
+
+
+def _parse_notification(content: str) -> dict:
+    """Parses "key: value" lines; everything after "message:" is the message body."""
+    content = content.strip()
+    # Header und Body einmal am "message:"-Zeilenanfang trennen, statt jede
+    # Body-Zeile einzeln zu prüfen
+    if content.startswith("message:"):
+        head, body = "", content[len("message:"):]
+    else:
+        head, _, body = content.partition("\nmessage:")
+    notification_data = {}
+    for line in head.split("\n"):
+        key, sep, value = line.partition(":")
+        if sep:
+            notification_data[key.strip()] = value.strip()
+
+    # Rest der "message:"-Zeile wird wie bisher ignoriert
+    notification_data["message"] = body.partition("\n")[2].strip()
+    return notification_data
+
+
+def _read_notification(path: Path, st: os.stat_result) -> dict:
+    """Returns the parsed notification, re-reading the file only if it changed."""
+    cached = _notification_cache.get(path.name)
+    if cached is not None and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+    data = _parse_notification(path.read_text(encoding="utf-8"))
+    _notification_cache[path.name] = (st.st_mtime_ns, st.st_size, data)
+    return data
+
+
 @SERVER.tool()
+@_offload
 def list_notifications_tool(
     limit: int = 20,
     order_id: str | None = None,
@@ -871,47 +1373,40 @@ def list_notifications_tool(
     """
     notifications = []
     
-    if not NOTIFICATIONS_DIR.exists():
+    # scandir liefert die stat-Daten ohne extra Syscall pro Datei (glob + stat)
+    try:
+        with os.scandir(NOTIFICATIONS_DIR) as it:
+            entries = [
+                (entry.stat(), entry)
+                for entry in it
+                if entry.name.endswith(".txt") and entry.is_file()
+            ]
+    except FileNotFoundError:
         return {"status": "ok", "notifications": [], "total": 0}
-    
-    # Get all notification files
-    files = list(NOTIFICATIONS_DIR.glob("*.txt"))
+
+    # Cache-Einträge gelöschter Dateien verwerfen
+    present = {entry.name for _, entry in entries}
+    for name in _notification_cache.keys() - present:
+        _notification_cache.pop(name, None)
     
     # Sort by modification time (newest first)
-    files.sort(key=lambda f: f.stat().st_mtime, reverse=True)
+    entries.sort(key=lambda e: e[0].st_mtime, reverse=True)
     
-    for file_path in files[:limit * 2]:  # Read more to filter if needed
+    for st, entry in entries[:limit * 2]:  # Read more to filter if needed
         try:
-            content = file_path.read_text(encoding="utf-8")
-            lines = content.strip().split("\n")
-            
-            # Parse notification data
-            notification_data = {"filename": file_path.name}
-            message_lines = []
-            in_message = False
-            
-            for line in lines:
-                if in_message:
-                    message_lines.append(line)
-                elif line.startswith("message:"):
-                    in_message = True
-                elif ":" in line:
-                    key, value = line.split(":", 1)
-                    notification_data[key.strip()] = value.strip()
-            
-            notification_data["message"] = "\n".join(message_lines).strip()
-            
-            # Filter by order_id if specified
-            if order_id and notification_data.get("order_id") != order_id:
-                continue
-            
-            notifications.append(notification_data)
-            
-            if len(notifications) >= limit:
-                break
-                
-        except Exception as e:
+            data = _read_notification(Path(entry.path), st)
+        except Exception:
             continue  # Skip files that can't be parsed
+            
+        # Filter by order_id if specified
+        if order_id and data.get("order_id") != order_id:
+            continue
+
+        # Kopie, damit der Cache-Eintrag unverändert bleibt
+        notifications.append({"filename": entry.name, **data})
+
+        if len(notifications) >= limit:
+            break
     
     return {
         "status": "ok",
@@ -921,6 +1416,7 @@ def list_notifications_tool(
 
 
 @SERVER.tool()
+@_offload
 def get_notification_tool(order_id: str) -> dict:
     """
     Gets the full notification details for a specific order.
@@ -935,40 +1431,28 @@ def get_notification_tool(order_id: str) -> dict:
     for prefix in ["email", "file"]:
         filename = f"{prefix}_{order_id}.txt"
         file_path = NOTIFICATIONS_DIR / filename
-        
-        if file_path.exists():
-            try:
-                content = file_path.read_text(encoding="utf-8")
-                lines = content.strip().split("\n")
-                
-                # Parse notification data
-                notification_data = {
-                    "filename": filename,
-                    "notification_type": prefix,
-                }
-                message_lines = []
-                in_message = False
-                
-                for line in lines:
-                    if in_message:
-                        message_lines.append(line)
-                    elif line.startswith("message:"):
-                        in_message = True
-                    elif ":" in line:
-                        key, value = line.split(":", 1)
-                        notification_data[key.strip()] = value.strip()
-                
-                notification_data["message"] = "\n".join(message_lines).strip()
-                
-                return {
-                    "status": "ok",
-                    "notification": notification_data,
-                }
-            except Exception as e:
-                return {
-                    "status": "error",
-                    "message": f"Error reading notification file: {str(e)}",
-                }
+
+        try:
+            st = file_path.stat()
+        except FileNotFoundError:
+            continue
+
+        try:
+            data = _read_notification(file_path, st)
+        except Exception as e:
+            return {
+                "status": "error",
+                "message": f"Error reading notification file: {str(e)}",
+            }
+
+        return {
+            "status": "ok",
+            "notification": {
+                "filename": filename,
+                "notification_type": prefix,
+                **data,
+            },
+        }
     
     return {
         "status": "not_found",
@@ -980,11 +1464,14 @@ def get_notification_tool(order_id: str) -> dict:
 # Audit Log Tools
 # -----------------------------
 @SERVER.tool()
+@_offload
 def get_audit_log_tool(
     limit: int = 50,
     table_name: str | None = None,
     agent_name: str | None = None,
     action: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
 ) -> dict:
     """
     Retrieves the database audit log showing all changes made by agents.
@@ -994,24 +1481,128 @@ def get_audit_log_tool(
         table_name: Filter by table name ('products', 'orders')
         agent_name: Filter by agent name ('data_agent', 'order_agent', 'user')
         action: Filter by action type ('INSERT', 'UPDATE', 'DELETE')
+        since: UTC date/timestamp (ISO, e.g. '2025-01-31') of the oldest entry (default: 30 days ago)
+        until: UTC date/timestamp (ISO) before which entries must lie (default: no upper bound)
     
     Returns:
         List of audit log entries showing who changed what and when.
     """
+    if not since:
+        since = utc_days_ago_iso(AUDIT_LOG_DEFAULT_WINDOW_DAYS)
     entries = get_audit_log(
         limit=limit,
         table_name=table_name,
         agent_name=agent_name,
         action=action,
+        since=since,
+        until=until,
     )
     
     return {
         "status": "ok",
         "entries": entries,
         "total": len(entries),
+        "since": since,
     }
 
 
+# -----------------------------
+# Batch Tool
+# -----------------------------
+# Read-only tools that batch_execute may dispatch to. Write tools stay out, so
+# every data change goes through its own call and the agent whitelists.
+_BATCH_TOOLS = frozenset({
+    "search_products_tool",
+    "list_products_tool",
+    "read_json_file_tool",
+    "get_order_status_tool",
+    "list_open_orders_tool",
+    "list_all_orders_tool",
+    "monthly_spending_tool",
+    "list_notifications_tool",
+    "get_notification_tool",
+    "get_audit_log_tool",
+})
+
+
+def _batch_result(content: Any) -> Any:
+    """Turns the content blocks of a nested tool call back into JSON values."""
+    if isinstance(content, tuple):
+        # (content blocks, structured output): keep what an MCP client would read
+        content = content[0]
+    values = []
+    for block in content:
+        text = getattr(block, "text", None)
+        if text is None:
+            values.append(str(block))
+            continue
+        try:
+            values.append(orjson.loads(text))
+        except orjson.JSONDecodeError:
+            values.append(text)
+    return values[0] if len(values) == 1 else values
+
+
+@SERVER.tool()
+async def batch_execute(
+    calls: list[dict],
+    max_concurrent: int = 8,
+    stop_on_error: bool = False,
+) -> dict:
+    """
+    Executes several read-only tool calls in one request.
+
+    Allowed tools: search_products_tool, list_products_tool, read_json_file_tool,
+    get_order_status_tool, list_open_orders_tool, list_all_orders_tool,
+    monthly_spending_tool, list_notifications_tool, get_notification_tool,
+    get_audit_log_tool. Each call is validated against that tool's own schema.
+
+    Args:
+        calls: List of {"tool": "<tool name>", "args": {...}} objects
+        max_concurrent: How many calls may run at the same time (default 8).
+            Use 1 to run the calls strictly in the given order.
+        stop_on_error: Skip calls that have not started yet once one call fails
+
+    Returns:
+        One entry per call, in order: {"tool", "status": "ok" | "error" | "skipped",
+        "result" or "message"}.
+    """
+    limit = asyncio.Semaphore(max(1, max_concurrent))
+    failed = asyncio.Event()
+
+    async def run(call: dict) -> dict:
+        name = call.get("tool")
+        async with limit:
+            if stop_on_error and failed.is_set():
+                return {"tool": name, "status": "skipped"}
+
+            if name not in _BATCH_TOOLS:
+                failed.set()
+                return {
+                    "tool": name,
+                    "status": "error",
+                    "message": f"Tool '{name}' is not available in batch_execute",
+                }
+
+            args = call.get("args") or {}
+            if not isinstance(args, dict):
+                failed.set()
+                return {"tool": name, "status": "error", "message": "args must be an object"}
+
+            try:
+                # Same path as a real MCP call: argument validation/coercion
+                # by FastMCP, then result serialisation
+                content = await SERVER.call_tool(name, args)
+            except Exception as e:
+                failed.set()
+                return {"tool": name, "status": "error", "message": str(e)}
+
+        return {"tool": name, "status": "ok", "result": _batch_result(content)}
+
+    results = await asyncio.gather(*(run(c) for c in calls))
+    return {"status": "ok", "results": results}
+
+
 # -----------------------------
 # Server Start
 # -----------------------------
@@ -1,15 +1,14 @@
 # src/tools/mcp_manager.py
 
 from chem_scout_ai.common.tools import ToolManager
-from src.config import MCP_SERVER_URL, ALLOWED_TOOLS_DATA, ALLOWED_TOOLS_ORDER
+from src.config import MCP_SERVER_URL, ALLOWED_TOOLS_DATA, ALLOWED_TOOLS_ORDER, CACHEABLE_TOOLS
 
-# Separate tool managers per agent role
+# Separate tool managers per agent role; both share the session factory and
+# the tool catalog, only the whitelist differs
 data_tool_manager = ToolManager.from_url(
     MCP_SERVER_URL,
     allowed_tools=ALLOWED_TOOLS_DATA,
+    cacheable_tools=CACHEABLE_TOOLS,
 )
 
-order_tool_manager = ToolManager.from_url(
-    MCP_SERVER_URL,
-    allowed_tools=ALLOWED_TOOLS_ORDER,
-)
+order_tool_manager = data_tool_manager.with_allowed_tools(ALLOWED_TOOLS_ORDER)
@@ -0,0 +1,94 @@
+"""
+Audit retention: prunes old audit_log rows and rotates AuditLogObserver files.
+"""
+
+import gzip
+import shutil
+import threading
+import time
+
+from src.config import (
+    AUDIT_LOG_DIR,
+    AUDIT_LOG_RETENTION_DAYS,
+    AUDIT_LOG_COMPRESS_AFTER_DAYS,
+    AUDIT_LOG_PRUNE_INTERVAL_SECONDS,
+)
+from src.database.db import prune_audit_log
+from src.utils.chat_history_logger import live_audit_log_paths
+from src.utils.logger import get_logger
+from src.utils.timestamps import utc_days_ago_iso
+
+logger = get_logger(__name__)
+
+_retention_thread: threading.Thread | None = None
+
+
+def prune_audit_log_files(
+    retention_days: float = AUDIT_LOG_RETENTION_DAYS,
+    compress_after_days: float = AUDIT_LOG_COMPRESS_AFTER_DAYS,
+) -> tuple[int, int]:
+    """
+    Gzips audit_*.jsonl files older than `compress_after_days` and deletes
+    audit files older than `retention_days` (by mtime). Files still held
+    open by a live AuditLogObserver are skipped, however old they are.
+    Returns (compressed, deleted).
+    """
+    now = time.time()
+    compress_before = now - compress_after_days * 86400
+    delete_before = now - retention_days * 86400
+    compressed = deleted = 0
+    live_paths = live_audit_log_paths()
+
+    for path in AUDIT_LOG_DIR.glob("audit_*.jsonl*"):
+        if path in live_paths:
+            continue
+        try:
+            mtime = path.stat().st_mtime
+            if mtime < delete_before:
+                path.unlink()
+                deleted += 1
+            elif path.suffix == ".jsonl" and mtime < compress_before:
+                gz_path = path.with_name(path.name + ".gz")
+                with open(path, "rb") as src, gzip.open(gz_path, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                shutil.copystat(path, gz_path)  # keep mtime so retention still applies
+                path.unlink()
+                compressed += 1
+        except OSError as e:
+            logger.warning(f"Audit retention: could not process {path.name}: {e}")
+
+    return compressed, deleted
+
+
+def prune_audit_logs(retention_days: float = AUDIT_LOG_RETENTION_DAYS) -> None:
+    """One retention run over the audit_log table and the audit files."""
+    rows = prune_audit_log(utc_days_ago_iso(retention_days))
+    compressed, deleted = prune_audit_log_files(retention_days)
+    if rows or compressed or deleted:
+        logger.info(
+            f"Audit retention: {rows} DB rows pruned, "
+            f"{compressed} files compressed, {deleted} files deleted."
+        )
+
+
+def _retention_loop(interval_seconds: float) -> None:
+    while True:
+        try:
+            prune_audit_logs()
+        except Exception as e:
+            logger.warning(f"Audit retention run failed: {e}")
+        time.sleep(interval_seconds)
+
+
+def start_audit_retention(interval_seconds: float = AUDIT_LOG_PRUNE_INTERVAL_SECONDS) -> None:
+    """Starts the periodic retention job (once per process) in a daemon thread."""
+    global _retention_thread
+    if _retention_thread is not None and _retention_thread.is_alive():
+        return
+    _retention_thread = threading.Thread(
+        target=_retention_loop,
+        args=(interval_seconds,),
+        name="audit-retention",
+        daemon=True,
+    )
+    _retention_thread.start()
@@ -3,13 +3,21 @@ Chat observers implementing ChatObserver protocol.
 Includes: history logging, analytics, rate limiting, audit logging, tool use tracking.
 """
 
+import atexit
 import json
 import hashlib
+import os
+import queue
+import sys
+import threading
 import time
-from collections import deque
+import weakref
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from functools import lru_cache
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Callable
+from typing import Any, BinaryIO, Callable, Iterator
 
 from chem_scout_ai.common import types
 from chem_scout_ai.common.chat import ChatObserver
@@ -22,14 +30,239 @@ from src.config import (
     RATE_LIMIT_COOLDOWN_SECONDS,
 )
 from src.utils.logger import get_logger
+from src.utils.timestamps import local_now_iso
 
 logger = get_logger(__name__)
 
+try:
+    import orjson
+except ImportError:  # optional: fall back to the stdlib encoder
+    orjson = None
+
+
+def _dump_json(obj: Any, indent: bool = False) -> bytes:
+    """Serialize an observer record (orjson if installed, else json); non-serializable values via str."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, default=str, option=option)
+    return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False, default=str).encode()
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    """Replace path with data in one write (tmp file + os.replace), never half-written."""
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def export_pretty(path: Path) -> Path:
+    """
+    Write an indented copy (<name>.pretty.json) of a compact observer JSON file.
+
+    The observers write compact JSON; this is for reading a file by hand.
+    """
+    path = Path(path)
+    pretty_path = path.with_suffix(".pretty.json")
+    data = orjson.loads(path.read_bytes()) if orjson is not None else json.loads(path.read_bytes())
+    pretty_path.write_bytes(_dump_json(data, indent=True))
+    return pretty_path
+
+
+def _intern_role(role: Any) -> Any:
+    """Intern role strings from the SDK so the per-role dict lookups compare by identity."""
+    return sys.intern(role) if type(role) is str else role
+
+
+@dataclass(slots=True)
+class MessageEnvelope:
+    """
+    The message fields the observers read, extracted once per message.
+
+    Messages are either SDK objects (assistant) or TypedDicts (user, system,
+    tool output); both are handled here instead of in every observer.
+    """
+
+    message: Any
+    role: str
+    content: Any
+    tool_calls: list[tuple[str, str, str | None]]  # (id, function name, arguments)
+    tool_call_id: str | None
+    time: float
+    timestamp: str
+    perf_ns: int  # perf_counter_ns() when the message was appended, for durations
+
+    @classmethod
+    def from_message(cls, message: types.Message) -> "MessageEnvelope":
+        if isinstance(message, dict):
+            get = message.get
+        else:
+            def get(key: str, default: Any = None) -> Any:
+                return getattr(message, key, default)
+
+        tool_calls = []
+        for tc in get("tool_calls") or ():
+            if isinstance(tc, dict):
+                function = tc.get("function") or {}
+                tool_calls.append(
+                    (tc.get("id", "unknown"), function.get("name", "unknown"), function.get("arguments"))
+                )
+            else:
+                # SDK tool calls always have id/function.name/function.arguments;
+                # the getattr defaults are only needed for odd objects
+                try:
+                    function = tc.function
+                    tool_calls.append((tc.id, function.name, function.arguments))
+                except AttributeError:
+                    function = getattr(tc, "function", None)
+                    tool_calls.append(
+                        (
+                            getattr(tc, "id", "unknown"),
+                            getattr(function, "name", "unknown"),
+                            getattr(function, "arguments", None),
+                        )
+                    )
+
+        return cls(
+            message=message,
+            role=_intern_role(get("role", "unknown")),
+            content=get("content", ""),
+            tool_calls=tool_calls,
+            tool_call_id=get("tool_call_id"),
+            time=time.time(),
+            timestamp=local_now_iso(),
+            perf_ns=time.perf_counter_ns(),
+        )
+
+
+# ============================================================================
+# BACKGROUND WRITER
+# ============================================================================
+
+# Pending lines before update() blocks (backpressure instead of unbounded memory)
+WRITER_QUEUE_SIZE = 4096
+
+
+class _BackgroundWriter:
+    """
+    One daemon thread that appends the JSONL lines of the history and audit
+    observers, so update() does not wait for disk I/O.
+
+    Lines stay in queue order (the audit hash chain relies on it). Files are
+    flushed whenever the queue runs empty; sync() waits until everything
+    queued so far is written.
+    """
+
+    def __init__(self) -> None:
+        self._queue: queue.Queue[tuple[BinaryIO | None, Any]] = queue.Queue(maxsize=WRITER_QUEUE_SIZE)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._drain, name="observer-writer", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.sync)
+
+    def write(self, fh: BinaryIO, data: bytes) -> None:
+        self._ensure_thread()
+        self._queue.put((fh, data))
+
+    def close(self, fh: BinaryIO) -> None:
+        """Close fh once the lines queued before have been written."""
+        if self._thread is None:
+            fh.close()
+        else:
+            self._queue.put((fh, None))
+
+    def sync(self, timeout: float = 5.0) -> None:
+        """Block until all lines queued so far are on disk (flushed)."""
+        if self._thread is None:
+            return
+        done = threading.Event()
+        self._queue.put((None, done))
+        done.wait(timeout)
+
+    def _drain(self) -> None:
+        dirty: set[BinaryIO] = set()
+        while True:
+            fh, data = self._queue.get()
+            try:
+                if fh is None:
+                    self._flush(dirty)
+                    data.set()
+                elif data is None:
+                    dirty.discard(fh)
+                    fh.close()
+                else:
+                    fh.write(data)
+                    dirty.add(fh)
+            except Exception as e:
+                logger.error(f"Failed to write observer log: {e}")
+            if self._queue.empty():
+                self._flush(dirty)
+
+    @staticmethod
+    def _flush(dirty: set[BinaryIO]) -> None:
+        for fh in dirty:
+            try:
+                fh.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush observer log: {e}")
+        dirty.clear()
+
+
+_writer = _BackgroundWriter()
+
+
+# Observers with a debounced aggregate file; flushed once more at exit.
+# Weak references so ended Streamlit sessions can still be collected.
+_pending_flush: "weakref.WeakSet[Any]" = weakref.WeakSet()
+
+
+def _flush_pending_observers() -> None:
+    for observer in list(_pending_flush):
+        try:
+            observer.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush {type(observer).__name__}: {e}")
+
+
+# Registered at import, so it runs after the dispatcher/writer handlers at exit
+atexit.register(_flush_pending_observers)
+
+
+# Audit observers of this process whose log file is still open
+_live_audit_observers: "weakref.WeakSet[Any]" = weakref.WeakSet()
+
+
+def live_audit_log_paths() -> set[Path]:
+    """Audit log files still being written by an observer in this process."""
+    return {
+        observer.filepath
+        for observer in list(_live_audit_observers)
+        if not observer.closed
+    }
+
+
+# ============================================================================
+# CHAT HISTORY LOGGER
+# ============================================================================
+
+# Message contents from this length on are written once per session and referenced after
+HISTORY_DEDUP_MIN_CHARS = 64
+
 
 class ChatHistoryLogger(ChatObserver):
     """
     Implements ChatObserver to persist chat messages to disk.
-    Each session creates a timestamped JSON file that is incrementally updated.
+    Each session creates a timestamped JSONL file: a header line with the
+    session info, one line per message and a final "ended" line.
+    Messages are appended, the file is never rewritten; repeated long
+    contents are stored once (see _dedup_content). At session end a
+    consolidated <name>.snapshot.json is written atomically.
     """
 
     def __init__(self, session_name: str | None = None):
@@ -42,12 +275,15 @@ class ChatHistoryLogger(ChatObserver):
         """
         self._session_name = session_name or "chat"
         self._timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self._filename = f"{self._session_name}_{self._timestamp}.json"
+        self._filename = f"{self._session_name}_{self._timestamp}.jsonl"
         self._filepath = CHAT_HISTORY_DIR / self._filename
-        self._messages: list[dict[str, Any]] = []
+        # Digest of already written long contents -> content_id
+        self._content_ids: dict[bytes, int] = {}
+        # Lines are written by the background writer
+        self._fh: BinaryIO = open(self._filepath, "ab")
 
-        # Initialize empty file
-        self._save()
+        # Header line with the session info
+        self._append({"session": self._session_name, "started": self._timestamp})
         logger.info(f"Chat history logger initialized: {self._filepath}")
 
     @property
@@ -58,68 +294,127 @@ class ChatHistoryLogger(ChatObserver):
     def update(self, message: types.Message) -> None:
         """
         Called when a new message is appended to the chat.
-        Persists the message to the log file.
+        Appends the message to the log file.
         """
+        self.observe(MessageEnvelope.from_message(message))
+
+    def observe(self, envelope: MessageEnvelope) -> None:
+        """Append an already extracted message (shared with the other observers)."""
         try:
-            msg_dict = self._message_to_dict(message)
-            msg_dict["timestamp"] = datetime.now().isoformat()
-            self._messages.append(msg_dict)
-            self._save()
+            msg_dict = self._message_to_dict(envelope.message)
+            msg_dict["timestamp"] = envelope.timestamp
+            self._dedup_content(msg_dict)
+            self._append(msg_dict)
         except Exception as e:
             logger.error(f"Failed to log chat message: {e}")
 
+    # Message type -> converter; all messages of a type take the same branch
+    _serializers: dict[type, Callable[[Any], dict[str, Any]]] = {}
+
     def _message_to_dict(self, message: types.Message) -> dict[str, Any]:
         """Convert a message to a serializable dictionary."""
+        serializer = self._serializers.get(type(message))
+        if serializer is None:
+            serializer = self._resolve_serializer(message)
+            self._serializers[type(message)] = serializer
+        return serializer(message)
+
+    @staticmethod
+    def _resolve_serializer(message: types.Message) -> Callable[[Any], dict[str, Any]]:
+        """Pick the conversion for a message type."""
         if hasattr(message, "to_dict"):
-            return message.to_dict()
+            return lambda m: m.to_dict()
         elif hasattr(message, "model_dump"):
-            return message.model_dump()
+            return lambda m: m.model_dump()
         elif isinstance(message, dict):
-            return dict(message)
+            return dict
         else:
             # Fallback: extract role and content
-            return {
-                "role": getattr(message, "role", "unknown"),
-                "content": getattr(message, "content", str(message)),
+            return lambda m: {
+                "role": getattr(m, "role", "unknown"),
+                "content": getattr(m, "content", str(m)),
             }
 
-    def _save(self) -> None:
-        """Save messages to the JSON file."""
+    def _dedup_content(self, msg_dict: dict[str, Any]) -> None:
+        """
+        Write repeated long contents (system prompts, tool output) only once.
+
+        The first occurrence gets a "content_id"; later ones are stored as
+        "content_ref" instead of "content". read_chat_history resolves them.
+        """
+        content = msg_dict.get("content")
+        if type(content) is not str or len(content) < HISTORY_DEDUP_MIN_CHARS:
+            return
+        digest = hashlib.sha1(content.encode()).digest()[:12]
+        content_id = self._content_ids.get(digest)
+        if content_id is None:
+            msg_dict["content_id"] = self._content_ids[digest] = len(self._content_ids)
+        else:
+            del msg_dict["content"]
+            msg_dict["content_ref"] = content_id
+
+    def _append(self, entry: dict[str, Any]) -> None:
+        """Append one JSON line to the history file."""
         try:
-            with open(self._filepath, "w", encoding="utf-8") as f:
-                json.dump(
-                    {
-                        "session": self._session_name,
-                        "started": self._timestamp,
-                        "messages": self._messages,
-                    },
-                    f,
-                    indent=2,
-                    ensure_ascii=False,
-                    default=str,  # Handle non-serializable objects
-                )
+            _writer.write(self._fh, _dump_json(entry) + b"\n")
         except Exception as e:
             logger.error(f"Failed to save chat history: {e}")
 
     def log_session_end(self) -> None:
-        """Mark the session as ended and save final state."""
+        """Mark the session as ended and wait until the history is on disk."""
+        self._append({"event": "ended", "ended": local_now_iso()})
+        _writer.sync()
+        self._write_snapshot()
+        logger.info(f"Chat session ended, saved to: {self._filepath}")
+
+    def _write_snapshot(self) -> None:
+        """Write the whole session as one JSON document (tmp file + os.replace)."""
+        snapshot_path = self._filepath.with_suffix(".snapshot.json")
         try:
-            with open(self._filepath, "w", encoding="utf-8") as f:
-                json.dump(
-                    {
-                        "session": self._session_name,
-                        "started": self._timestamp,
-                        "ended": datetime.now().isoformat(),
-                        "messages": self._messages,
-                    },
-                    f,
-                    indent=2,
-                    ensure_ascii=False,
-                    default=str,
-                )
-            logger.info(f"Chat session ended, saved to: {self._filepath}")
+            entries = read_chat_history(self._filepath)
+            snapshot = next(entries)
+            snapshot["messages"] = messages = []
+            for entry in entries:
+                if entry.get("event") == "ended":
+                    snapshot["ended"] = entry["ended"]
+                else:
+                    messages.append(entry)
+            _write_atomic(snapshot_path, _dump_json(snapshot))
         except Exception as e:
-            logger.error(f"Failed to save session end: {e}")
+            logger.error(f"Failed to write chat history snapshot: {e}")
+
+    def close(self) -> None:
+        """Close the history file after the pending lines are written."""
+        if not self._fh.closed:
+            _writer.close(self._fh)
+
+
+def read_chat_history(path: Path) -> Iterator[dict[str, Any]]:
+    """
+    Streams the entries of a chat history file (header, messages, end marker).
+
+    Older sessions saved as a single JSON document are read as well.
+    """
+    with open(path, encoding="utf-8") as f:
+        if Path(path).suffix == ".json":
+            data = json.load(f)
+            messages = data.pop("messages", [])
+            ended = data.pop("ended", None)
+            yield data
+            yield from messages
+            if ended is not None:
+                yield {"event": "ended", "ended": ended}
+            return
+        contents: dict[int, str] = {}
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if "content_id" in entry:
+                contents[entry.pop("content_id")] = entry["content"]
+            elif "content_ref" in entry:
+                entry["content"] = contents.get(entry.pop("content_ref"))
+            yield entry
 
 
 def create_session_logger(session_name: str = "chat") -> ChatHistoryLogger:
@@ -139,6 +434,14 @@ def create_session_logger(session_name: str = "chat") -> ChatHistoryLogger:
 # ANALYTICS OBSERVER
 # ============================================================================
 
+# Analytics are written at most this often; get_summary()/flush() write immediately
+ANALYTICS_FLUSH_INTERVAL_SECONDS = 5.0
+
+
+# Roles counted by ChatAnalyticsObserver
+_TRACKED_ROLES = frozenset({"user", "assistant", "system", "tool"})
+
+
 class ChatAnalyticsObserver(ChatObserver):
     """
     Tracks chat analytics and metrics:
@@ -170,11 +473,23 @@ class ChatAnalyticsObserver(ChatObserver):
             "system": 0,
             "tool": 0,
         }
-        self._response_times: list[float] = []  # Time between user and assistant
-        self._tool_calls: list[dict[str, Any]] = []
+        # Time between user and assistant, as running count/sum/min/max
+        self._rt_count = 0
+        self._rt_sum = 0.0
+        self._rt_min = float("inf")
+        self._rt_max = 0.0
+        # Only the last 10 tool calls are reported; the total is counted separately
+        self._tool_calls: deque[dict[str, Any]] = deque(maxlen=10)
+        self._tool_call_count = 0
         self._pending_user_time: float | None = None
+        self._dirty = False
+        self._last_flush = 0.0
+        # Counter version and the last computed metrics (without session duration)
+        self._metrics_version = 0
+        self._metrics_cache: tuple[int, dict[str, Any] | None] = (-1, None)
         
         self._save()
+        _pending_flush.add(self)
         logger.info(f"Analytics observer initialized: {self._filepath}")
 
     @property
@@ -183,13 +498,17 @@ class ChatAnalyticsObserver(ChatObserver):
 
     def update(self, message: types.Message) -> None:
         """Track analytics for each message."""
+        self.observe(MessageEnvelope.from_message(message))
+
+    def observe(self, envelope: MessageEnvelope) -> None:
+        """Track analytics for an already extracted message."""
         try:
-            current_time = time.time()
-            role = getattr(message, "role", "unknown")
-            content = getattr(message, "content", "") or ""
+            current_time = envelope.time
+            role = envelope.role
+            content = envelope.content or ""
             
             # Update counts
-            if role in self._message_counts:
+            if role in _TRACKED_ROLES:
                 self._message_counts[role] += 1
                 self._total_chars[role] += len(str(content))
             
@@ -198,48 +517,61 @@ class ChatAnalyticsObserver(ChatObserver):
                 self._pending_user_time = current_time
             elif role == "assistant" and self._pending_user_time:
                 response_time = current_time - self._pending_user_time
-                self._response_times.append(response_time)
+                self._rt_count += 1
+                self._rt_sum += response_time
+                self._rt_min = min(self._rt_min, response_time)
+                self._rt_max = max(self._rt_max, response_time)
                 self._pending_user_time = None
             
             # Track tool calls
             if role == "tool":
-                self._track_tool_call(message, current_time)
+                self._track_tool_call(envelope)
             
             # Check for tool_calls in assistant messages
-            tool_calls = getattr(message, "tool_calls", None)
-            if tool_calls:
-                for tc in tool_calls:
-                    self._tool_calls.append({
-                        "timestamp": datetime.now().isoformat(),
-                        "tool_id": getattr(tc, "id", "unknown"),
-                        "function": getattr(getattr(tc, "function", None), "name", "unknown"),
-                    })
+            for tool_id, function_name, _arguments in envelope.tool_calls:
+                self._tool_call_count += 1
+                self._tool_calls.append({
+                    "timestamp": envelope.timestamp,
+                    "tool_id": tool_id,
+                    "function": function_name,
+                })
             
             self._last_message_time = current_time
-            self._save()
+            self._metrics_version += 1
+            self._dirty = True
+            if current_time - self._last_flush >= ANALYTICS_FLUSH_INTERVAL_SECONDS:
+                self._save()
         except Exception as e:
             logger.error(f"Analytics tracking error: {e}")
 
-    def _track_tool_call(self, message: types.Message, timestamp: float) -> None:
+    def _track_tool_call(self, envelope: MessageEnvelope) -> None:
         """Extract and track tool call information."""
-        tool_call_id = getattr(message, "tool_call_id", None)
-        content = getattr(message, "content", "")
+        content = envelope.content
         
+        self._tool_call_count += 1
         self._tool_calls.append({
-            "timestamp": datetime.now().isoformat(),
-            "tool_call_id": tool_call_id,
+            "timestamp": envelope.timestamp,
+            "tool_call_id": envelope.tool_call_id,
             "output_length": len(str(content)) if content else 0,
         })
 
     def _calculate_metrics(self) -> dict[str, Any]:
         """Calculate summary metrics."""
+        version, metrics = self._metrics_cache
+        if version != self._metrics_version or metrics is None:
+            metrics = self._calculate_counter_metrics()
+            self._metrics_cache = (self._metrics_version, metrics)
+        # Without a new message only the session duration changes
+        return {
+            **metrics,
+            "session_duration_seconds": round(time.time() - self._start_time, 2),
+        }
+
+    def _calculate_counter_metrics(self) -> dict[str, Any]:
+        """Metrics derived from the message counters; recomputed only after updates."""
         total_messages = sum(self._message_counts.values())
-        session_duration = time.time() - self._start_time
         
-        avg_response_time = (
-            sum(self._response_times) / len(self._response_times)
-            if self._response_times else 0
-        )
+        avg_response_time = self._rt_sum / self._rt_count if self._rt_count else 0
         
         # Rough token estimate (1 token ≈ 4 chars for English)
         estimated_tokens = {
@@ -253,45 +585,60 @@ class ChatAnalyticsObserver(ChatObserver):
             "estimated_tokens": estimated_tokens,
             "total_estimated_tokens": sum(estimated_tokens.values()),
             "response_times": {
-                "count": len(self._response_times),
+                "count": self._rt_count,
                 "avg_seconds": round(avg_response_time, 3),
-                "min_seconds": round(min(self._response_times), 3) if self._response_times else 0,
-                "max_seconds": round(max(self._response_times), 3) if self._response_times else 0,
+                "min_seconds": round(self._rt_min, 3) if self._rt_count else 0,
+                "max_seconds": round(self._rt_max, 3) if self._rt_count else 0,
             },
             "tool_usage": {
-                "total_calls": len(self._tool_calls),
-                "calls": self._tool_calls[-10:],  # Last 10 calls
+                "total_calls": self._tool_call_count,
+                "calls": list(self._tool_calls),  # Last 10 calls
             },
-            "session_duration_seconds": round(session_duration, 2),
         }
 
     def _save(self) -> None:
         """Save analytics to file."""
+        self._dirty = False
+        self._last_flush = time.time()
         try:
-            with open(self._filepath, "w", encoding="utf-8") as f:
-                json.dump(
-                    {
-                        "session": self._session_name,
-                        "started": self._timestamp,
-                        "last_updated": datetime.now().isoformat(),
-                        "metrics": self._calculate_metrics(),
-                    },
-                    f,
-                    indent=2,
-                    default=str,
-                )
+            data = _dump_json(
+                {
+                    "session": self._session_name,
+                    "started": self._timestamp,
+                    "last_updated": local_now_iso(),
+                    "metrics": self._calculate_metrics(),
+                },
+            )
+            _write_atomic(self._filepath, data)
         except Exception as e:
             logger.error(f"Failed to save analytics: {e}")
 
+    def flush(self) -> None:
+        """Write pending analytics to file."""
+        if self._dirty:
+            self._save()
+
     def get_summary(self) -> dict[str, Any]:
         """Get current analytics summary."""
+        self.flush()
         return self._calculate_metrics()
 
+    def __del__(self) -> None:
+        # Streamlit sessions never end explicitly; write what is still pending
+        if getattr(self, "_dirty", False):
+            self._save()
+
 
 # ============================================================================
 # RATE LIMIT OBSERVER
 # ============================================================================
 
+# Bits of RateLimitObserver._warn_flags (each warning is issued once per session)
+_WARN_SESSION_EXCEEDED = 1
+_WARN_REMAINING_10 = 2
+_WARN_REMAINING_25 = 4
+
+
 class RateLimitObserver(ChatObserver):
     """
     Monitors message rates to prevent abuse:
@@ -320,9 +667,12 @@ class RateLimitObserver(ChatObserver):
         
         # Tracking
         self._total_user_messages = 0
-        self._message_timestamps: deque[float] = deque()  # Rolling window
+        # Ring buffer with the last max_per_minute user-message timestamps;
+        # _ring_head is the oldest slot (next one to be overwritten)
+        self._ring: list[float] = [float("-inf")] * max(max_per_minute, 1)
+        self._ring_head = 0
         self._cooldown_until: float | None = None
-        self._warnings_issued: set[str] = set()
+        self._warn_flags = 0
         
         logger.info(f"Rate limit observer initialized: max {max_per_minute}/min, {max_per_session}/session")
 
@@ -340,19 +690,21 @@ class RateLimitObserver(ChatObserver):
 
     @property
     def messages_this_minute(self) -> int:
-        """Count messages in the last 60 seconds."""
-        self._cleanup_old_timestamps()
-        return len(self._message_timestamps)
+        """Count messages in the last 60 seconds (up to max_per_minute)."""
+        cutoff = time.time() - 60
+        return sum(1 for ts in self._ring if ts >= cutoff)
 
     def update(self, message: types.Message) -> None:
         """Track message rates and check limits."""
-        role = getattr(message, "role", "")
-        
+        self.observe(MessageEnvelope.from_message(message))
+
+    def observe(self, envelope: MessageEnvelope) -> None:
+        """Track message rates for an already extracted message."""
         # Only track user messages for rate limiting
-        if role != "user":
+        if envelope.role != "user":
             return
         
-        current_time = time.time()
+        current_time = envelope.time
         
         # Check if in cooldown
         if self._cooldown_until and current_time < self._cooldown_until:
@@ -366,11 +718,13 @@ class RateLimitObserver(ChatObserver):
         
         # Track this message
         self._total_user_messages += 1
-        self._message_timestamps.append(current_time)
-        self._cleanup_old_timestamps()
+        ring = self._ring
+        ring[self._ring_head] = current_time
+        self._ring_head = (self._ring_head + 1) % len(ring)
         
-        # Check per-minute limit
-        if len(self._message_timestamps) >= self._max_per_minute:
+        # Check per-minute limit: reached if even the oldest of the last
+        # max_per_minute messages is less than 60 seconds old
+        if ring[self._ring_head] >= current_time - 60:
             self._cooldown_until = current_time + self._cooldown_seconds
             self._on_exceeded(
                 f"🚫 Rate limit exceeded ({self._max_per_minute} messages/minute). "
@@ -379,27 +733,22 @@ class RateLimitObserver(ChatObserver):
             return
         
         # Check session limit warnings
-        remaining = self.remaining_messages
+        remaining = self._max_per_session - self._total_user_messages
+        flags = self._warn_flags
         
-        if remaining <= 0 and "session_exceeded" not in self._warnings_issued:
-            self._warnings_issued.add("session_exceeded")
+        if remaining <= 0 and not flags & _WARN_SESSION_EXCEEDED:
+            self._warn_flags = flags | _WARN_SESSION_EXCEEDED
             self._on_exceeded(
                 f"🚫 Session limit reached ({self._max_per_session} messages). "
                 "Please start a new session."
             )
-        elif remaining <= 10 and "session_warning_10" not in self._warnings_issued:
-            self._warnings_issued.add("session_warning_10")
+        elif remaining <= 10 and not flags & _WARN_REMAINING_10:
+            self._warn_flags = flags | _WARN_REMAINING_10
             self._on_warning(f"⚠️ Approaching session limit: {remaining} messages remaining.")
-        elif remaining <= 25 and "session_warning_25" not in self._warnings_issued:
-            self._warnings_issued.add("session_warning_25")
+        elif remaining <= 25 and not flags & _WARN_REMAINING_25:
+            self._warn_flags = flags | _WARN_REMAINING_25
             self._on_warning(f"📊 Session message count: {self._total_user_messages}/{self._max_per_session}")
 
-    def _cleanup_old_timestamps(self) -> None:
-        """Remove timestamps older than 60 seconds."""
-        cutoff = time.time() - 60
-        while self._message_timestamps and self._message_timestamps[0] < cutoff:
-            self._message_timestamps.popleft()
-
     def get_status(self) -> dict[str, Any]:
         """Get current rate limit status."""
         return {
@@ -443,7 +792,11 @@ class AuditLogObserver(ChatObserver):
         self._filename = f"audit_{self._session_id}_{self._timestamp}.jsonl"
         self._filepath = AUDIT_LOG_DIR / self._filename
         self._entry_count = 0
-        self._previous_hash: str | None = None
+        # Previous hash as ASCII bytes for the hash chain
+        self._previous_hash: bytes = b""
+        # One open file for the whole session, written by the background writer
+        self._fh: BinaryIO = open(self._filepath, "ab")
+        _live_audit_observers.add(self)
         
         # Write session start entry
         self._write_entry({
@@ -462,18 +815,26 @@ class AuditLogObserver(ChatObserver):
     def session_id(self) -> str:
         return self._session_id
 
+    @property
+    def closed(self) -> bool:
+        return self._fh.closed
+
     def _generate_session_id(self) -> str:
         """Generate a unique session ID."""
-        import uuid
-        return str(uuid.uuid4())[:8].upper()
+        import secrets
+        return secrets.token_hex(4).upper()
 
     def update(self, message: types.Message) -> None:
         """Log message as audit entry."""
+        self.observe(MessageEnvelope.from_message(message))
+
+    def observe(self, envelope: MessageEnvelope) -> None:
+        """Log an already extracted message as audit entry."""
         try:
-            role = getattr(message, "role", "unknown")
-            content = getattr(message, "content", "")
+            role = envelope.role
+            content = envelope.content
             
-            event_type = self._get_event_type(role, message)
+            event_type = self._get_event_type(role, envelope)
             
             entry = {
                 "event_type": event_type,
@@ -484,33 +845,29 @@ class AuditLogObserver(ChatObserver):
             
             # Add tool-specific info
             if role == "tool":
-                entry["tool_call_id"] = getattr(message, "tool_call_id", None)
+                entry["tool_call_id"] = envelope.tool_call_id
             
             # Check for tool calls in assistant messages
-            tool_calls = getattr(message, "tool_calls", None)
-            if tool_calls:
+            if envelope.tool_calls:
                 entry["tool_calls"] = [
                     {
-                        "id": getattr(tc, "id", "unknown"),
-                        "function": getattr(getattr(tc, "function", None), "name", "unknown"),
-                        "arguments_preview": self._safe_preview(
-                            getattr(getattr(tc, "function", None), "arguments", "")
-                        ),
+                        "id": tool_id,
+                        "function": function_name,
+                        "arguments_preview": self._safe_preview(arguments),
                     }
-                    for tc in tool_calls
+                    for tool_id, function_name, arguments in envelope.tool_calls
                 ]
             
-            self._write_entry(entry)
+            self._write_entry(entry, timestamp=envelope.timestamp)
         except Exception as e:
             logger.error(f"Audit log error: {e}")
 
-    def _get_event_type(self, role: str, message: types.Message) -> str:
+    def _get_event_type(self, role: str, envelope: MessageEnvelope) -> str:
         """Determine the event type based on message role and content."""
         if role == "user":
             return "USER_INPUT"
         elif role == "assistant":
-            tool_calls = getattr(message, "tool_calls", None)
-            if tool_calls:
+            if envelope.tool_calls:
                 return "ASSISTANT_TOOL_REQUEST"
             return "ASSISTANT_RESPONSE"
         elif role == "tool":
@@ -523,37 +880,44 @@ class AuditLogObserver(ChatObserver):
         """Create a safe preview of content for logging."""
         if content is None:
             return ""
-        content_str = str(content)
+        # Most common case: already a str, no str() call needed
+        content_str = content if type(content) is str else str(content)
         if len(content_str) <= max_length:
             return content_str
         return content_str[:max_length] + "..."
 
-    def _calculate_hash(self, entry: dict[str, Any]) -> str:
+    def _calculate_hash(self, payload: str) -> str:
         """Calculate hash for integrity verification (chain with previous)."""
-        data = json.dumps(entry, sort_keys=True, default=str)
-        if self._previous_hash:
-            data = self._previous_hash + data
-        return hashlib.sha256(data.encode()).hexdigest()[:16]
+        # Incremental instead of string concatenation; gives the same hash as
+        # sha256(previous_hash + payload)
+        h = hashlib.sha256(self._previous_hash)
+        h.update(payload.encode())
+        return h.hexdigest()[:16]
 
-    def _write_entry(self, entry: dict[str, Any]) -> None:
-        """Write an audit entry (append-only)."""
+    def _write_entry(self, entry: dict[str, Any], timestamp: str | None = None) -> None:
+        """
+        Write an audit entry (append-only). Message entries pass the time the
+        message was appended; session/custom events are stamped now.
+        """
         self._entry_count += 1
         
         full_entry = {
             "entry_id": self._entry_count,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": timestamp or local_now_iso(),
             "session_id": self._session_id,
             "user_id": self._user_id,
             **entry,
         }
         
-        # Add integrity hash
-        full_entry["hash"] = self._calculate_hash(full_entry)
-        self._previous_hash = full_entry["hash"]
+        # Serialize once (canonical, sorted keys): the hash covers exactly this
+        # text, and the line is the same text plus the "hash" field.
+        # Deliberately stdlib json: orjson's more compact output would change the hashes
+        payload = json.dumps(full_entry, sort_keys=True, default=str)
+        entry_hash = self._calculate_hash(payload)
+        self._previous_hash = entry_hash.encode("ascii")
         
         try:
-            with open(self._filepath, "a", encoding="utf-8") as f:
-                f.write(json.dumps(full_entry, default=str) + "\n")
+            _writer.write(self._fh, f'{payload[:-1]}, "hash": "{entry_hash}"}}\n'.encode())
         except Exception as e:
             logger.error(f"Failed to write audit entry: {e}")
 
@@ -564,8 +928,14 @@ class AuditLogObserver(ChatObserver):
             "reason": reason,
             "total_entries": self._entry_count,
         })
+        _writer.sync()
         logger.info(f"Audit session ended: {self._filepath}")
 
+    def close(self) -> None:
+        """Close the audit log file after the pending entries are written."""
+        if not self._fh.closed:
+            _writer.close(self._fh)
+
     def log_custom_event(self, event_type: str, details: dict[str, Any]) -> None:
         """Log a custom audit event."""
         self._write_entry({
@@ -578,6 +948,23 @@ class AuditLogObserver(ChatObserver):
 # TOOL USE LOGGER
 # ============================================================================
 
+# Tool outputs up to this length go through the parse cache (long ones rarely repeat)
+TOOL_PARSE_CACHE_MAX_CHARS = 4096
+# Tool outputs above this length are logged as preview + length + sha1 only
+TOOL_RESULT_PARSE_MAX_CHARS = 64 * 1024
+
+
+@lru_cache(maxsize=1024)
+def _loads_cached(raw: str) -> Any:
+    """
+    json.loads for tool arguments/results, which repeat a lot within a session.
+
+    The returned object is shared between calls; it is only stored and
+    serialized by ToolUseLogger, never modified.
+    """
+    return json.loads(raw)
+
+
 class ToolUseLogger(ChatObserver):
     """
     Specifically tracks tool usage:
@@ -585,6 +972,10 @@ class ToolUseLogger(ChatObserver):
     - Input arguments
     - Output results
     - Execution patterns
+
+    Every call start/completion is appended as one line to a JSONL event
+    log; the aggregated JSON (stats + calls) is only written by flush(),
+    get_stats() and log_session_end().
     """
 
     def __init__(self, session_name: str = "tools"):
@@ -592,13 +983,25 @@ class ToolUseLogger(ChatObserver):
         self._timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         self._filename = f"tools_{session_name}_{self._timestamp}.json"
         self._filepath = ANALYTICS_DIR / self._filename
+        self._events_path = self._filepath.with_suffix(".jsonl")
         
         self._tool_calls: list[dict[str, Any]] = []
         self._tool_results: dict[str, dict[str, Any]] = {}  # tool_call_id -> result
         self._pending_calls: dict[str, dict[str, Any]] = {}  # tool_call_id -> call info
+        self._pending_start_ns: dict[str, int] = {}  # tool_call_id -> perf_counter_ns at call
+        # Running stats, updated per call instead of rescanning _tool_calls
+        self._function_counts: dict[str, int] = defaultdict(int)
+        self._duration_count = 0
+        self._duration_sum = 0
+        self._duration_min: int | None = None
+        self._duration_max: int | None = None
+        self._dirty = False
+        # Event lines are written by the background writer
+        self._fh: BinaryIO = open(self._events_path, "ab")
         
-        self._save()
-        logger.info(f"Tool use logger initialized: {self._filepath}")
+        self._append({"session": self._session_name, "started": self._timestamp})
+        _pending_flush.add(self)
+        logger.info(f"Tool use logger initialized: {self._events_path}")
 
     @property
     def filepath(self) -> Path:
@@ -606,55 +1009,80 @@ class ToolUseLogger(ChatObserver):
 
     def update(self, message: types.Message) -> None:
         """Track tool calls and results."""
+        self.observe(MessageEnvelope.from_message(message))
+
+    def observe(self, envelope: MessageEnvelope) -> None:
+        """Track tool calls and results of an already extracted message."""
+        role = envelope.role
+        # Plain user/assistant/system text: nothing to track
+        if not envelope.tool_calls and role != "tool":
+            return
         try:
-            role = getattr(message, "role", "")
             
             # Track tool calls from assistant messages
-            tool_calls = getattr(message, "tool_calls", None)
-            if tool_calls:
-                for tc in tool_calls:
-                    call_id = getattr(tc, "id", "unknown")
-                    function = getattr(tc, "function", None)
-                    
+            if envelope.tool_calls:
+                for call_id, function_name, arguments in envelope.tool_calls:
                     call_info = {
                         "call_id": call_id,
-                        "function_name": getattr(function, "name", "unknown") if function else "unknown",
-                        "arguments": self._parse_arguments(getattr(function, "arguments", "{}") if function else "{}"),
-                        "called_at": datetime.now().isoformat(),
+                        "function_name": function_name,
+                        "arguments": self._parse_arguments(arguments or "{}"),
+                        "called_at": envelope.timestamp,
                         "result": None,
                         "completed_at": None,
                         "duration_ms": None,
                     }
                     
                     self._pending_calls[call_id] = call_info
+                    self._pending_start_ns[call_id] = envelope.perf_ns
                     self._tool_calls.append(call_info)
+                    self._function_counts[function_name] += 1
+                    self._append({
+                        "event": "call_started",
+                        "call_id": call_id,
+                        "function_name": function_name,
+                        "arguments": call_info["arguments"],
+                        "called_at": call_info["called_at"],
+                    })
+                    self._dirty = True
             
             # Track tool results
             if role == "tool":
-                call_id = getattr(message, "tool_call_id", None)
-                content = getattr(message, "content", "")
+                call_id = envelope.tool_call_id
                 
                 if call_id and call_id in self._pending_calls:
                     call_info = self._pending_calls[call_id]
-                    call_info["result"] = self._parse_result(content)
-                    call_info["completed_at"] = datetime.now().isoformat()
+                    call_info["result"] = self._parse_result(envelope.content)
+                    call_info["completed_at"] = envelope.timestamp
                     
-                    # Calculate duration if we have both timestamps
-                    if call_info["called_at"]:
-                        called = datetime.fromisoformat(call_info["called_at"])
-                        completed = datetime.fromisoformat(call_info["completed_at"])
-                        call_info["duration_ms"] = int((completed - called).total_seconds() * 1000)
+                    # Duration from the monotonic clock (no ISO re-parsing)
+                    start_ns = self._pending_start_ns.pop(call_id, None)
+                    if start_ns is not None:
+                        duration = (envelope.perf_ns - start_ns) // 1_000_000
+                        call_info["duration_ms"] = duration
+                        if duration:
+                            self._duration_count += 1
+                            self._duration_sum += duration
+                            if self._duration_min is None or duration < self._duration_min:
+                                self._duration_min = duration
+                            if self._duration_max is None or duration > self._duration_max:
+                                self._duration_max = duration
                     
                     del self._pending_calls[call_id]
-            
-            self._save()
+                    self._append({
+                        "event": "call_completed",
+                        "call_id": call_id,
+                        "result": call_info["result"],
+                        "completed_at": call_info["completed_at"],
+                        "duration_ms": call_info["duration_ms"],
+                    })
+                    self._dirty = True
         except Exception as e:
             logger.error(f"Tool use logging error: {e}")
 
     def _parse_arguments(self, args_str: str) -> dict[str, Any]:
         """Parse tool arguments from JSON string."""
         try:
-            return json.loads(args_str) if args_str else {}
+            return _loads_cached(args_str) if args_str else {}
         except json.JSONDecodeError:
             return {"raw": args_str}
 
@@ -663,84 +1091,219 @@ class ToolUseLogger(ChatObserver):
         if not content:
             return {"empty": True}
         
-        content_str = str(content)
+        content_str = content if type(content) is str else str(content)
+        length = len(content_str)
+        
+        if length > TOOL_RESULT_PARSE_MAX_CHARS:
+            # Large outputs (e.g. product dumps) are not parsed and kept in the
+            # log; a preview plus digest identifies them
+            return {
+                "raw_preview": content_str[:500],
+                "length": length,
+                "sha1": hashlib.sha1(content_str.encode()).hexdigest(),
+            }
         
         try:
-            parsed = json.loads(content_str)
-            return {"parsed": parsed, "length": len(content_str)}
+            if length <= TOOL_PARSE_CACHE_MAX_CHARS:
+                parsed = _loads_cached(content_str)
+            else:
+                parsed = json.loads(content_str)
+            return {"parsed": parsed, "length": length}
         except json.JSONDecodeError:
-            return {"raw_preview": content_str[:500], "length": len(content_str)}
+            return {"raw_preview": content_str[:500], "length": length}
 
     def _calculate_stats(self) -> dict[str, Any]:
         """Calculate tool usage statistics."""
         if not self._tool_calls:
             return {"total_calls": 0}
         
-        # Count by function
-        function_counts: dict[str, int] = {}
-        durations: list[int] = []
-        
-        for call in self._tool_calls:
-            name = call.get("function_name", "unknown")
-            function_counts[name] = function_counts.get(name, 0) + 1
-            if call.get("duration_ms"):
-                durations.append(call["duration_ms"])
-        
+        count = self._duration_count
         return {
             "total_calls": len(self._tool_calls),
-            "by_function": function_counts,
+            "by_function": dict(self._function_counts),
             "pending_calls": len(self._pending_calls),
-            "avg_duration_ms": sum(durations) // len(durations) if durations else None,
-            "min_duration_ms": min(durations) if durations else None,
-            "max_duration_ms": max(durations) if durations else None,
+            "avg_duration_ms": self._duration_sum // count if count else None,
+            "min_duration_ms": self._duration_min,
+            "max_duration_ms": self._duration_max,
         }
 
+    def _append(self, event: dict[str, Any]) -> None:
+        """Append one JSON line to the event log."""
+        try:
+            _writer.write(self._fh, _dump_json(event) + b"\n")
+        except Exception as e:
+            logger.error(f"Failed to append tool use event: {e}")
+
     def _save(self) -> None:
-        """Save tool usage log."""
+        """Save the aggregated tool usage log."""
+        self._dirty = False
         try:
-            with open(self._filepath, "w", encoding="utf-8") as f:
-                json.dump(
-                    {
-                        "session": self._session_name,
-                        "started": self._timestamp,
-                        "last_updated": datetime.now().isoformat(),
-                        "stats": self._calculate_stats(),
-                        "calls": self._tool_calls,
-                    },
-                    f,
-                    indent=2,
-                    default=str,
-                )
+            data = _dump_json(
+                {
+                    "session": self._session_name,
+                    "started": self._timestamp,
+                    "last_updated": local_now_iso(),
+                    "stats": self._calculate_stats(),
+                    "calls": self._tool_calls,
+                },
+            )
+            _write_atomic(self._filepath, data)
         except Exception as e:
             logger.error(f"Failed to save tool use log: {e}")
 
+    def flush(self) -> None:
+        """Write the aggregated log if calls changed since the last write."""
+        if self._dirty:
+            self._save()
+
     def get_stats(self) -> dict[str, Any]:
         """Get current tool usage statistics."""
+        self.flush()
         return self._calculate_stats()
 
+    def log_session_end(self) -> None:
+        """Write the aggregated log and wait until the event log is on disk."""
+        self._save()
+        _writer.sync()
+
+    def close(self) -> None:
+        """Close the event log after the pending lines are written."""
+        if not self._fh.closed:
+            _writer.close(self._fh)
+
+    def __del__(self) -> None:
+        # Streamlit sessions never end explicitly; write what is still pending
+        if getattr(self, "_dirty", False):
+            self._save()
+
 
 # ============================================================================
 # COMPOSITE OBSERVER (COMBINES ALL)
 # ============================================================================
 
+class _ObserverDispatcher:
+    """
+    One daemon thread that runs the child observers of all composites, so
+    Chat.append (and with it the agent loop) only pays for extracting the
+    message fields. Messages are handled in the order they were appended.
+    """
+
+    def __init__(self) -> None:
+        self._queue: queue.Queue[tuple[Any, Any]] = queue.Queue(maxsize=WRITER_QUEUE_SIZE)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._drain, name="observer-dispatch", daemon=True)
+                    self._thread.start()
+                    # Registered after the writer's sync, so it runs before it at exit
+                    atexit.register(self.flush)
+
+    def submit(self, composite: "CompositeChatObserver", envelope: MessageEnvelope) -> None:
+        self._ensure_thread()
+        self._queue.put((composite, envelope))
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Block until all messages submitted so far went through the observers."""
+        if self._thread is None or threading.current_thread() is self._thread:
+            return
+        done = threading.Event()
+        self._queue.put((None, done))
+        done.wait(timeout)
+
+    def _drain(self) -> None:
+        while True:
+            composite, item = self._queue.get()
+            if composite is None:
+                item.set()
+            else:
+                composite._dispatch(item)
+
+
+_dispatcher = _ObserverDispatcher()
+
+
 class CompositeChatObserver(ChatObserver):
     """
     Combines multiple observers into one for easy attachment.
-    Delegates to all child observers.
+    Delegates to all child observers on the background dispatch thread;
+    call flush() before reading observer state that must include the
+    latest messages.
     """
 
     def __init__(self, *observers: ChatObserver):
         self._observers = list(observers)
+        self._lock = threading.Lock()
+        self._handlers = self._bind_handlers(self._observers)
+
+    @staticmethod
+    def _bind_handlers(
+        observers: list[ChatObserver],
+    ) -> tuple[tuple[ChatObserver, Callable[[Any], None], bool], ...]:
+        """Resolve each observer's observe/update method once: (observer, method, takes_envelope)."""
+        handlers = []
+        for observer in observers:
+            observe = getattr(observer, "observe", None)
+            if observe is not None:
+                handlers.append((observer, observe, True))
+            else:
+                handlers.append((observer, observer.update, False))
+        return tuple(handlers)
 
     def add_observer(self, observer: ChatObserver) -> None:
         """Add an observer to the composite."""
-        self._observers.append(observer)
+        # Copy-on-write: the dispatch thread iterates the old tuple undisturbed
+        with self._lock:
+            self._observers = [*self._observers, observer]
+            self._handlers = self._bind_handlers(self._observers)
 
     def update(self, message: types.Message) -> None:
-        """Delegate to all child observers."""
+        """Queue the message for all child observers (fields extracted once for all of them)."""
+        _dispatcher.submit(self, MessageEnvelope.from_message(message))
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Wait until the queued messages have reached all child observers."""
+        _dispatcher.flush(timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """
+        Flush, then close the files of all child observers that keep one open
+        (history, audit, tools) and wait until they are closed on disk.
+        """
+        self.flush(timeout)
+        for observer in self._observers:
+            close = getattr(observer, "close", None)
+            if close is None:
+                continue
+            try:
+                close()
+            except Exception as e:
+                logger.error(f"Failed to close {type(observer).__name__}: {e}")
+        _writer.sync(timeout)
+
+    def end_session(self, reason: str = "normal", timeout: float = 5.0) -> None:
+        """Log the session end in every child observer that tracks it, then close()."""
+        self.flush(timeout)
         for observer in self._observers:
+            log_session_end = getattr(observer, "log_session_end", None)
+            if log_session_end is None:
+                continue
+            try:
+                if isinstance(observer, AuditLogObserver):
+                    log_session_end(reason=reason)
+                else:
+                    log_session_end()
+            except Exception as e:
+                logger.error(f"Failed to end session of {type(observer).__name__}: {e}")
+        self.close(timeout)
+
+    def _dispatch(self, envelope: MessageEnvelope) -> None:
+        for observer, handler, takes_envelope in self._handlers:
             try:
-                observer.update(message)
+                handler(envelope if takes_envelope else envelope.message)
             except Exception as e:
                 logger.error(f"Observer {type(observer).__name__} error: {e}")
 
@@ -785,3 +1348,15 @@ def create_full_observer_suite(
     
     return composite, observers
 
+
+
+# ============================================================================
+# CLI: python -m src.utils.chat_history_logger pretty <file> [...]
+# ============================================================================
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3 or sys.argv[1] != "pretty":
+        print("usage: python -m src.utils.chat_history_logger pretty <file.json> [...]")
+        sys.exit(2)
+    for arg in sys.argv[2:]:
+        print(export_pretty(Path(arg)))
@@ -0,0 +1,52 @@
+"""
+ISO timestamp helpers that avoid building a datetime object per call.
+"""
+
+import time
+
+# The formatted prefix is built only once per second: (second, prefix)
+_prefix_cache: tuple[int, str] = (-1, "")
+_local_prefix_cache: tuple[int, str] = (-1, "")
+
+
+def _second_prefix(second: int) -> str:
+    global _prefix_cache
+    cached_second, prefix = _prefix_cache
+    if second != cached_second:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+        _prefix_cache = (second, prefix)
+    return prefix
+
+
+def _local_second_prefix(second: int) -> str:
+    global _local_prefix_cache
+    cached_second, prefix = _local_prefix_cache
+    if second != cached_second:
+        prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(second))
+        _local_prefix_cache = (second, prefix)
+    return prefix
+
+
+def utc_now_iso() -> str:
+    """
+    UTC timestamp as YYYY-MM-DDTHH:MM:SS.ffffff (naive, like the former
+    utcnow().isoformat()), without creating a datetime object per call.
+    """
+    second, nanos = divmod(time.time_ns(), 1_000_000_000)
+    return f"{_second_prefix(second)}.{nanos // 1000:06d}"
+
+
+def utc_days_ago_iso(days: float) -> str:
+    """UTC timestamp `days` days ago as YYYY-MM-DDTHH:MM:SS (comparable with utc_now_iso)."""
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(time.time() - days * 86400))
+
+
+def utc_now_iso_seconds() -> str:
+    """UTC timestamp as YYYY-MM-DDTHH:MM:SS+00:00 (like datetime.now(timezone.utc).isoformat(timespec="seconds"))."""
+    return _second_prefix(time.time_ns() // 1_000_000_000) + "+00:00"
+
+
+def local_now_iso() -> str:
+    """Local timestamp as YYYY-MM-DDTHH:MM:SS.ffffff (like datetime.now().isoformat())."""
+    second, nanos = divmod(time.time_ns(), 1_000_000_000)
+    return f"{_local_second_prefix(second)}.{nanos // 1000:06d}"
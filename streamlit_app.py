@@ -1,23 +1,26 @@
+import concurrent.futures
+import logging
+import queue
+import random
+import socket
 import threading
 import time
 import asyncio
 
+import orjson
 import streamlit as st
 from dotenv import load_dotenv
 
 load_dotenv()
 
 from src.utils.logger import get_logger
-from src.tools.chem_scout_mcp_tools import SERVER
 from src.database.db import init_db
-from src.utils.chat_history_logger import create_full_observer_suite
 
 import openai
 
-from chem_scout_ai.common.backend import Gemini2p5Flash
 from src.agents.router import classify_intent
-from src.agents.factory import build_agents
 from chem_scout_ai.common import types
+from chem_scout_ai.common.tools import start_tool_cache
 
 logger = get_logger(__name__)
 
@@ -78,6 +81,7 @@ class AsyncLoopThread:
             return
         self._loop = None
         self._thread = None
+        self._ready = threading.Event()
         self._initialized = True
     
     def _run_loop(self):
@@ -86,6 +90,7 @@ class AsyncLoopThread:
         asyncio.set_event_loop(self._loop)
         # Set custom exception handler to suppress Windows socket cleanup errors
         self._loop.set_exception_handler(_windows_exception_handler)
+        self._ready.set()
         self._loop.run_forever()
     
     def start(self):
@@ -95,17 +100,23 @@ class AsyncLoopThread:
         self._thread = threading.Thread(target=self._run_loop, daemon=True)
         self._thread.start()
         # Wait for loop to be ready
-        while self._loop is None:
-            time.sleep(0.01)
+        self._ready.wait()
     
+    def submit(self, coro) -> concurrent.futures.Future:
+        """
+        Schedule a coroutine on the persistent event loop without waiting.
+        Several submitted coroutines run concurrently; collect them with
+        concurrent.futures.wait().
+        """
+        self.start()
+        return asyncio.run_coroutine_threadsafe(coro, self._loop)
+
     def run_coroutine(self, coro):
         """
         Submit a coroutine to the persistent event loop and wait for result.
         Thread-safe: can be called from any thread.
         """
-        self.start()
-        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
-        return future.result()
+        return self.submit(coro).result()
 
 
 # Global instance
@@ -125,6 +136,7 @@ def run_async(coro):
 # ================================================================
 def _run_mcp():
     import uvicorn
+    from src.tools.chem_scout_mcp_tools import SERVER
 
     uvicorn.run(
         SERVER.streamable_http_app,
@@ -134,20 +146,68 @@ def _run_mcp():
     )
 
 
+def _mcp_port_open() -> bool:
+    """True if something already accepts connections on the MCP port."""
+    with socket.socket() as sock:
+        return sock.connect_ex(("127.0.0.1", 8000)) == 0
+
+
 def start_mcp_background():
     """
-    Start the MCP server only once per Streamlit session.
+    Start the MCP server only once per process (all Streamlit sessions share it).
     """
     if "mcp_thread" in st.session_state:
         return
+    if _mcp_port_open():
+        # Started by an earlier session; a second uvicorn would fail on the port
+        st.session_state["mcp_thread"] = None
+        return
 
     thread = threading.Thread(target=_run_mcp, daemon=True)
     thread.start()
     st.session_state["mcp_thread"] = thread
     logger.info("MCP server started in background on http://127.0.0.1:8000/mcp")
     
-    # Give the server time to start up before accepting requests
-    time.sleep(2)
+    # Wait until the server accepts connections (at most ~2 s, as before)
+    for _ in range(100):
+        if _mcp_port_open():
+            break
+        time.sleep(0.02)
+
+
+# ================================================================
+# Live progress of a running request
+# ================================================================
+class _ProgressObserver:
+    """Chat observer that forwards the agents' tool calls to the UI thread."""
+
+    def __init__(self, progress_queue: queue.SimpleQueue):
+        self._queue = progress_queue
+
+    def observe(self, envelope) -> None:
+        for _call_id, function_name, _arguments in envelope.tool_calls:
+            self._queue.put_nowait(function_name)
+
+    def update(self, message) -> None:
+        pass  # CompositeChatObserver always calls observe()
+
+
+def _run_with_progress(coro, progress_queue: queue.SimpleQueue, status) -> dict:
+    """
+    Run a coroutine on the background loop and show each tool call in the
+    st.status container as it happens, instead of one opaque spinner.
+    """
+    # Drop leftovers from requests started in other tabs
+    while not progress_queue.empty():
+        progress_queue.get_nowait()
+
+    future = _async_loop.submit(coro)
+    while True:
+        concurrent.futures.wait([future], timeout=0.2)
+        while not progress_queue.empty():
+            status.write(f"🛠️ `{progress_queue.get_nowait()}`")
+        if future.done():
+            return future.result()
 
 
 # ================================================================
@@ -157,12 +217,21 @@ def init_app():
     if st.session_state.get("initialized"):
         return
 
+    # Only needed once per session; imported here so the page header renders
+    # before the MCP tools, backends, agents and observers are loaded
+    from chem_scout_ai.common.backend import Gemini2p5Flash
+    from src.agents.factory import build_agents
+    from src.utils.audit_retention import start_audit_retention
+    from src.utils.chat_history_logger import create_full_observer_suite
+
     # 1) DB
     init_db()
     logger.info("Database initialized (Streamlit).")
+    start_audit_retention()
 
-    # 2) MCP server
+    # 2) MCP server + persistent event loop for all UI callbacks
     start_mcp_background()
+    _async_loop.start()
 
     # 3) LLM backend (Gemini 2.5 Flash via Google)
     backend_cfg = Gemini2p5Flash()
@@ -174,11 +243,17 @@ def init_app():
     # agents = { "data": (agent, chat), "order": (agent, chat) }
 
     # 5) Set up full observer suite (history, analytics, rate limiting, audit, tools)
+    # Observers run off the script thread, so rate-limit toasts are queued
+    # and shown by main() on the next rerun (no cross-thread st.* calls)
+    toast_queue: queue.SimpleQueue[tuple[str, str]] = queue.SimpleQueue()
     composite_observer, observers = create_full_observer_suite(
         session_name="streamlit",
-        rate_limit_warning_callback=lambda msg: st.toast(msg, icon="⚠️"),
-        rate_limit_exceeded_callback=lambda msg: st.toast(msg, icon="🚫"),
+        rate_limit_warning_callback=lambda msg: toast_queue.put_nowait(("⚠️", msg)),
+        rate_limit_exceeded_callback=lambda msg: toast_queue.put_nowait(("🚫", msg)),
     )
+    # Tool calls are forwarded to the chat tab while a request is running
+    progress_queue: queue.SimpleQueue[str] = queue.SimpleQueue()
+    composite_observer.add_observer(_ProgressObserver(progress_queue))
     for agent_name, (agent, chat) in agents.items():
         chat.add_observer(composite_observer)
     logger.info(f"Observer suite enabled - History: {observers['history'].filepath}")
@@ -186,6 +261,8 @@ def init_app():
     st.session_state["backend"] = backend
     st.session_state["agents"] = agents
     st.session_state["observers"] = observers
+    st.session_state["toast_queue"] = toast_queue
+    st.session_state["progress_queue"] = progress_queue
     st.session_state["initialized"] = True
     st.session_state.setdefault("chat_history", [])
     st.session_state.setdefault("processing", False)  # Track if a request is in progress
@@ -198,10 +275,52 @@ def init_app():
     st.session_state.setdefault("spending_result", "")
 
 
+# ================================================================
+# Retry backoff for transient API errors (429/5xx)
+# ================================================================
+BACKOFF_BASE_SECONDS = 2.0
+BACKOFF_CAP_SECONDS = 30.0
+
+
+def _backoff_delay(attempt: int, error: Exception | None = None) -> float:
+    """
+    Exponential backoff with jitter (2-3s, 4-6s, 8-12s, ... capped), so
+    clients hitting the same overloaded endpoint do not retry in lockstep.
+    A Retry-After header from the provider takes precedence (clamped to the cap).
+    """
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(BACKOFF_CAP_SECONDS, max(0.0, float(retry_after)))
+        except ValueError:
+            pass  # HTTP-date form; fall back to the computed delay
+    delay = min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * (2 ** attempt))
+    return delay * (1 + random.random() * 0.5)
+
+
 # ================================================================
 # Cross-agent handoff detection (similar to main.py)
 # ================================================================
 HANDOFF_PREFIX = "HANDOFF:"
+HANDOFF_NOTICE_PREFIX = "🔄 *Handing off"
+
+
+def _role_and_content(message) -> tuple:
+    """
+    Role and content of an agent response. AssistantMessage (the common case)
+    is read directly; tool outputs are plain dicts, which getattr never read
+    (so they stay without role/content here); other objects fall back to
+    getattr, with text/message as alternative content attributes.
+    """
+    if isinstance(message, types.AssistantMessage):
+        return "assistant", message.content
+    if isinstance(message, dict):
+        return None, ""
+    return (
+        getattr(message, "role", None),
+        getattr(message, "content", "") or getattr(message, "text", "") or getattr(message, "message", ""),
+    )
 
 
 async def process_handoff(message, user_text: str, agents, chat_updates: list) -> list:
@@ -212,10 +331,10 @@ async def process_handoff(message, user_text: str, agents, chat_updates: list) -
     
     chat_updates: list to append chat history updates (thread-safe accumulator)
     """
-    if getattr(message, "role", None) != "assistant":
+    role, content = _role_and_content(message)
+    if role != "assistant":
         return []
 
-    content = getattr(message, "content", None)
     if not (isinstance(content, str) and content.startswith(HANDOFF_PREFIX)):
         return []
 
@@ -243,7 +362,8 @@ async def process_handoff(message, user_text: str, agents, chat_updates: list) -
     # Add handoff notification to chat updates
     chat_updates.append({
         "role": "assistant",
-        "content": f"🔄 *Handing off to **{target}** agent: {reason}*"
+        "content": f"🔄 *Handing off to **{target}** agent: {reason}*",
+        "kind": "handoff",
     })
 
     # Invoke the target agent with retry logic for transient errors
@@ -256,8 +376,8 @@ async def process_handoff(message, user_text: str, agents, chat_updates: list) -
             # Handle 503 (overloaded) and other transient API errors
             status_code = getattr(e, 'status_code', None)
             if status_code in (503, 429, 500, 502, 504) and attempt < max_retries:
-                wait_time = (attempt + 1) * 2  # Exponential backoff: 2s, 4s, 6s
-                logger.warning(f"Handoff API error {status_code} (attempt {attempt + 1}/{max_retries + 1}), retrying in {wait_time}s...")
+                wait_time = _backoff_delay(attempt, e)
+                logger.warning(f"Handoff API error {status_code} (attempt {attempt + 1}/{max_retries + 1}), retrying in {wait_time:.1f}s...")
                 await asyncio.sleep(wait_time)
                 continue
             logger.exception("Handoff agent error after retries")
@@ -272,7 +392,7 @@ async def process_handoff(message, user_text: str, agents, chat_updates: list) -
 # ================================================================
 # Helper: send one message through router + proper agent
 # ================================================================
-async def handle_user_message(user_text: str, backend, agents) -> dict:
+async def handle_user_message(user_text: str, backend, agents, intent_key: str | None = None) -> dict:
     """
     1) Use router to choose data / order agent
     2) Call that agent
@@ -283,6 +403,7 @@ async def handle_user_message(user_text: str, backend, agents) -> dict:
         user_text: The user's input message
         backend: The LLM backend (passed from main thread)
         agents: The agents dict (passed from main thread)
+        intent_key: Stable router cache key for templated form prompts
     
     Returns a dict with:
         - success: bool
@@ -293,18 +414,21 @@ async def handle_user_message(user_text: str, backend, agents) -> dict:
     result = {"success": False, "error": None, "retried": False, "chat_updates": []}
     chat_updates = result["chat_updates"]
 
+    # Fresh per-turn tool cache: router agent and handoff target share it
+    start_tool_cache()
+
     # 1) Decide which agent to use (with retry for transient errors)
     intent = None
     for attempt in range(3):
         try:
-            intent = await classify_intent(user_text, backend)
+            intent = await classify_intent(user_text, backend, cache_key=intent_key)
             logger.info(f"Router selected agent: {intent}")
             break
         except (openai.InternalServerError, openai.APIStatusError) as e:
             status_code = getattr(e, 'status_code', None)
             if status_code in (503, 429, 500, 502, 504) and attempt < 2:
-                wait_time = (attempt + 1) * 2
-                logger.warning(f"Router API error {status_code} (attempt {attempt + 1}/3), retrying in {wait_time}s...")
+                wait_time = _backoff_delay(attempt, e)
+                logger.warning(f"Router API error {status_code} (attempt {attempt + 1}/3), retrying in {wait_time:.1f}s...")
                 result["retried"] = True
                 await asyncio.sleep(wait_time)
                 continue
@@ -353,8 +477,8 @@ async def handle_user_message(user_text: str, backend, agents) -> dict:
             # Handle 503 (overloaded), 429 (rate limit), and other transient API errors
             status_code = getattr(e, 'status_code', None)
             if status_code in (503, 429, 500, 502, 504) and attempt < max_retries:
-                wait_time = (attempt + 1) * 2  # Exponential backoff: 2s, 4s, 6s
-                logger.warning(f"API error {status_code} (attempt {attempt + 1}/{max_retries + 1}), retrying in {wait_time}s...")
+                wait_time = _backoff_delay(attempt, e)
+                logger.warning(f"API error {status_code} (attempt {attempt + 1}/{max_retries + 1}), retrying in {wait_time:.1f}s...")
                 result["retried"] = True
                 await asyncio.sleep(wait_time)
                 continue
@@ -395,71 +519,79 @@ async def handle_user_message(user_text: str, backend, agents) -> dict:
 
     # 4) Process responses for display, with handoff detection
     logger.info(f"Processing {len(responses)} responses from agent")
-    
+    debug_enabled = logger.isEnabledFor(logging.DEBUG)
+
+    # Collect this turn's display messages locally, merged with one extend
+    turn_updates: list[dict] = []
+    add_update = turn_updates.append
+
     for msg in responses:
         # Check for cross-agent handoff
-        handoff_responses = await process_handoff(msg, user_text, agents, chat_updates)
+        handoff_responses = await process_handoff(msg, user_text, agents, turn_updates)
         if handoff_responses:
             # Process responses from the handoff target agent
             logger.info(f"Processing {len(handoff_responses)} handoff responses")
             for hmsg in handoff_responses:
-                role = getattr(hmsg, "role", None)
-                content = getattr(hmsg, "content", "")
+                if isinstance(hmsg, dict):
+                    # Tool outputs of the handoff agent (plain dicts)
+                    role, content = hmsg.get("role"), hmsg.get("content")
+                else:
+                    role, content = _role_and_content(hmsg)
                 
                 # Log for debugging
-                logger.debug(f"Handoff message - role: {role}, content length: {len(content) if content else 0}")
+                if debug_enabled:
+                    logger.debug("Handoff message - role: %s, content length: %d", role, len(content) if content else 0)
                 
                 if not content:
                     continue
                     
                 if role == "assistant":
-                    chat_updates.append({
+                    add_update({
                         "role": "assistant",
                         "content": str(content)
                     })
                 elif role == "tool":
                     # Also show tool outputs from handoff agent for transparency
                     # But only if they contain meaningful data (not just status messages)
+                    if isinstance(content, str) and not content.lstrip().startswith("{"):
+                        # Plain text (or a list): never an order/notification result
+                        logger.debug("Non-JSON tool output: %.100s", content)
+                        continue
                     try:
-                        import json
-                        tool_data = json.loads(content) if isinstance(content, str) else content
+                        tool_data = orjson.loads(content) if isinstance(content, str) else content
                         # Check if it's an order creation result (has order_id)
                         if isinstance(tool_data, dict) and "order_id" in tool_data:
-                            chat_updates.append({
+                            add_update({
                                 "role": "assistant",
-                                "content": f"✅ **Order Created:**\n```json\n{json.dumps(tool_data, indent=2)}\n```"
+                                "content": f"✅ **Order Created:**\n```json\n{orjson.dumps(tool_data, option=orjson.OPT_INDENT_2).decode()}\n```"
                             })
                         # Check for notification result
                         elif isinstance(tool_data, dict) and tool_data.get("status") == "ok" and "method" in tool_data:
                             method = tool_data.get("method", "file")
-                            chat_updates.append({
+                            add_update({
                                 "role": "assistant",
                                 "content": f"📧 **Notification sent** ({method})"
                             })
-                    except (json.JSONDecodeError, TypeError):
+                    except (orjson.JSONDecodeError, TypeError):
                         # Not JSON, skip or show raw if it's meaningful
                         if len(content) > 10 and len(content) < 500:
-                            logger.debug(f"Non-JSON tool output: {content[:100]}")
+                            logger.debug("Non-JSON tool output: %.100s", content)
             continue  # Skip original handoff message
         
-        role = getattr(msg, "role", None)
-        content = getattr(msg, "content", "")
-        
-        # Try alternative content attributes if content is empty
-        if not content:
-            content = getattr(msg, "text", "") or getattr(msg, "message", "")
+        role, content = _role_and_content(msg)
         
         # Log what we're seeing for debugging
-        logger.debug(f"Message - role: {role}, content length: {len(content) if content else 0}, type: {type(msg)}")
+        if debug_enabled:
+            logger.debug("Message - role: %s, content length: %d, type: %s", role, len(content) if content else 0, type(msg))
 
         if not content:
             continue
 
         if role == "assistant":
-            chat_updates.append({"role": "assistant", "content": str(content)})
+            add_update({"role": "assistant", "content": str(content)})
         elif role == "tool":
             # Show tool output as JSON block
-            chat_updates.append({
+            add_update({
                 "role": "assistant",
                 "content": f"🛠️ Tool output:\n```json\n{content}\n```"
             })
@@ -467,34 +599,27 @@ async def handle_user_message(user_text: str, backend, agents) -> dict:
             # Capture any other role with content (might be useful)
             logger.info(f"Unknown role '{role}' with content: {content[:100]}...")
             if content:
-                chat_updates.append({
+                add_update({
                     "role": "assistant", 
                     "content": str(content)
                 })
-    
+
+    chat_updates.extend(turn_updates)
+
     # If we processed responses but didn't add any assistant content, add a fallback
-    has_assistant_content = any(
-        msg.get("role") == "assistant" and msg.get("content") 
-        for msg in chat_updates 
-        if msg.get("role") != "user"
-    )
+    # (turn_updates only ever holds assistant messages)
+    has_assistant_content = any(msg["content"] for msg in turn_updates)
     
     if not has_assistant_content and responses:
-        # Extract the last assistant message with content
-        for msg in reversed(responses):
-            content = getattr(msg, "content", None)
-            if content:
-                chat_updates.append({
-                    "role": "assistant",
-                    "content": content
-                })
-                break
-        else:
-            # No content found - show a generic message
-            chat_updates.append({
-                "role": "assistant",
-                "content": "⚠️ The agent completed processing but didn't provide a text response."
-            })
+        # Last message with content, or a generic notice if there is none
+        last_content = next(
+            (content for msg in reversed(responses) if (content := _role_and_content(msg)[1])),
+            None,
+        )
+        chat_updates.append({
+            "role": "assistant",
+            "content": last_content or "⚠️ The agent completed processing but didn't provide a text response."
+        })
 
     result["success"] = True
     return result
@@ -508,15 +633,81 @@ def _extract_assistant_response(chat_updates: list) -> str:
     Extracts and combines all assistant responses from chat updates.
     Filters out user messages and tool outputs, keeping only meaningful responses.
     """
-    responses = []
-    for msg in chat_updates:
-        if msg.get("role") == "assistant":
-            content = msg.get("content", "")
-            # Skip handoff messages and empty content
-            if content and not content.startswith("🔄 *Handing off"):
-                responses.append(content)
-    
-    return "\n\n".join(responses) if responses else ""
+    # Skip handoff notices (tagged via "kind"; older entries by prefix) and empty content
+    return "\n\n".join(
+        content
+        for msg in chat_updates
+        if msg.get("role") == "assistant"
+        and (content := msg.get("content"))
+        and not (
+            msg["kind"] == "handoff" if "kind" in msg
+            else content.startswith(HANDOFF_NOTICE_PREFIX)
+        )
+    )
+
+
+# ================================================================
+# Chat history rendering
+# ================================================================
+def _render_chat_history():
+    """Renders the chat history of the current session in the chat tab."""
+    for msg in st.session_state["chat_history"]:
+        with st.chat_message("user" if msg["role"] == "user" else "assistant"):
+            st.markdown(msg["content"])
+
+
+# ================================================================
+# Form prompt templates (parsed once at import, filled per submit)
+# ================================================================
+_SEARCH_PROMPT_TEMPLATE = (
+    "Search the product database for matching chemicals and show "
+    "a compact table of results.\n\n"
+    "Name: {name}\n"
+    "CAS: {cas}\n"
+    "Supplier: {supplier}\n"
+    "Max price: {max_price}"
+)
+
+_ADD_PRODUCT_TEMPLATE = (
+    "Add a new product to the database using add_product_tool with these values:\n"
+    "- name: {name}\n"
+    "- cas_number: {cas}\n"
+    "- supplier: {supplier}\n"
+    "- price: {price}\n"
+    "- currency: {currency}\n"
+    "- package_size: {package}\n"
+    "- purity: {purity}\n"
+    "- delivery_time_days: {delivery}\n\n"
+    "Call the tool, then confirm the insertion with the returned product_id."
+)
+
+_ORDERS_PROMPT = (
+    "List all currently open chemical orders from the database. "
+    "Show them in a table with product, supplier, quantity, price, and status."
+)
+
+_ORDER_PROMPT_TEMPLATE = (
+    "AUTOMATED ORDER REQUEST - Execute immediately without asking for confirmation.\n\n"
+    "Chemical: {prod_name}\n"
+    "Quantity: {qty_value} {qty_unit}\n"
+    "{supplier_instruction}\n\n"
+    "REQUIRED ACTIONS (execute all in sequence):\n"
+    "1. Search: search_products_tool(query=\"{search_query}\")\n"
+    "2. Create order: Use found product_id, OR product_id=0 for external\n"
+    "3. Notify: Call notify_customer_tool with the order_id\n"
+    "4. Inventory: Call request_inventory_revision_tool\n\n"
+    "FINAL RESPONSE MUST INCLUDE:\n"
+    "- Order ID (e.g., ORD-XXXXXXXX)\n"
+    "- Product details and supplier\n"
+    "- Confirmation that notification was sent"
+)
+
+_SPENDING_TEMPLATE = (
+    "Calculate monthly chemical spending.\n"
+    "Month: {month}\n"
+    "Year: {year}\n"
+    "Show the total amount spent and a breakdown per supplier."
+)
 
 
 # ================================================================
@@ -529,6 +720,18 @@ def main():
 
     # Initialize once per session
     init_app()
+    ss = st.session_state
+    backend = ss["backend"]
+    agents = ss["agents"]
+
+    # Show rate-limit toasts queued by the observers
+    toast_queue = ss["toast_queue"]
+    while True:
+        try:
+            icon, msg = toast_queue.get_nowait()
+        except queue.Empty:
+            break
+        st.toast(msg, icon=icon)
 
     # Sidebar
     with st.sidebar:
@@ -538,8 +741,8 @@ def main():
         st.markdown("---")
         
         # Analytics display
-        if "observers" in st.session_state:
-            observers = st.session_state["observers"]
+        if "observers" in ss:
+            observers = ss["observers"]
             
             # Rate limit status
             rate_status = observers["rate_limit"].get_status()
@@ -564,15 +767,15 @@ def main():
         )
 
         if st.button("Clear chat"):
-            st.session_state["chat_history"] = []
+            ss["chat_history"] = []
             st.success("Chat history cleared.")
         
         if st.button("Clear tab results"):
-            st.session_state["search_result"] = ""
-            st.session_state["add_product_result"] = ""
-            st.session_state["orders_result"] = ""
-            st.session_state["create_order_result"] = ""
-            st.session_state["spending_result"] = ""
+            ss["search_result"] = ""
+            ss["add_product_result"] = ""
+            ss["orders_result"] = ""
+            ss["create_order_result"] = ""
+            ss["spending_result"] = ""
             st.success("Tab results cleared.")
             st.rerun()
 
@@ -586,19 +789,10 @@ def main():
         st.subheader("Chat with ChemScout")
 
         # Show history
-        for msg in st.session_state["chat_history"]:
-            role = msg["role"]
-            content = msg["content"]
-
-            if role == "user":
-                with st.chat_message("user"):
-                    st.markdown(content)
-            else:
-                with st.chat_message("assistant"):
-                    st.markdown(content)
+        _render_chat_history()
 
         # Chat input (disabled while processing to prevent double-submission)
-        is_processing = st.session_state.get("processing", False)
+        is_processing = ss.get("processing", False)
         
         user_input = st.chat_input(
             "⏳ Processing... please wait" if is_processing else "Ask about chemicals, suppliers, orders…",
@@ -607,24 +801,25 @@ def main():
         
         if user_input:
             # Mark as processing immediately
-            st.session_state["processing"] = True
-            
-            # Get backend and agents from session state (in main thread)
-            backend = st.session_state["backend"]
-            agents = st.session_state["agents"]
+            ss["processing"] = True
             
             # Show the user message right away
             with st.chat_message("user"):
                 st.markdown(user_input)
             
-            # Process with visible spinner
+            # Process with live progress (tool calls appear as they run)
             with st.chat_message("assistant"):
-                with st.spinner("🧪 ChemScout is thinking..."):
-                    result = run_async(handle_user_message(user_input, backend, agents))
+                with st.status("🧪 ChemScout is thinking...") as status:
+                    result = _run_with_progress(
+                        handle_user_message(user_input, backend, agents),
+                        ss["progress_queue"],
+                        status,
+                    )
+                    status.update(label="🧪 Done", state="complete")
             
             # Apply chat updates to session state (in main thread)
-            st.session_state["chat_history"].extend(result.get("chat_updates", []))
-            st.session_state["processing"] = False
+            ss["chat_history"].extend(result.get("chat_updates", []))
+            ss["processing"] = False
             
             # Show retry notification if applicable
             if result.get("retried"):
@@ -644,31 +839,27 @@ def main():
             max_price = st.text_input("Max price (optional, e.g. 50 CHF)")
             submitted = st.form_submit_button(
                 "Search",
-                disabled=st.session_state.get("processing", False)
+                disabled=ss.get("processing", False)
             )
 
-        if submitted and not st.session_state.get("processing"):
-            query = (
-                "Search the product database for matching chemicals and show "
-                "a compact table of results.\n\n"
-                f"Name: {name or 'any'}\n"
-                f"CAS: {cas or 'any'}\n"
-                f"Supplier: {supplier or 'any'}\n"
-                f"Max price: {max_price or 'no limit'}"
+        if submitted and not ss.get("processing"):
+            query = _SEARCH_PROMPT_TEMPLATE.format(
+                name=name or "any",
+                cas=cas or "any",
+                supplier=supplier or "any",
+                max_price=max_price or "no limit",
             )
-            st.session_state["processing"] = True
-            backend = st.session_state["backend"]
-            agents = st.session_state["agents"]
+            ss["processing"] = True
             with st.spinner("🔍 Searching..."):
-                result = run_async(handle_user_message(query, backend, agents))
-            st.session_state["chat_history"].extend(result.get("chat_updates", []))
-            st.session_state["processing"] = False
+                result = run_async(handle_user_message(query, backend, agents, intent_key="form:search"))
+            ss["chat_history"].extend(result.get("chat_updates", []))
+            ss["processing"] = False
             
             if result.get("success"):
                 # Store the last assistant response for display
                 extracted = _extract_assistant_response(result.get("chat_updates", []))
                 if extracted:
-                    st.session_state["search_result"] = extracted
+                    ss["search_result"] = extracted
                 else:
                     # Fallback: show all non-user content
                     all_content = "\n\n".join([
@@ -676,16 +867,16 @@ def main():
                         for msg in result.get("chat_updates", []) 
                         if msg.get("role") != "user"
                     ])
-                    st.session_state["search_result"] = all_content or "⚠️ Search completed but no results returned."
+                    ss["search_result"] = all_content or "⚠️ Search completed but no results returned."
             else:
-                st.session_state["search_result"] = f"❌ Search failed: {result.get('error', 'Unknown error')}"
+                ss["search_result"] = f"❌ Search failed: {result.get('error', 'Unknown error')}"
             st.rerun()
         
         # Display search results directly in this tab
-        if "search_result" in st.session_state and st.session_state["search_result"]:
+        if "search_result" in ss and ss["search_result"]:
             st.markdown("---")
             st.markdown("### 🔍 Search Results")
-            st.markdown(st.session_state["search_result"])
+            st.markdown(ss["search_result"])
 
     # ===================== TAB 3: ADD PRODUCT =====================
     with tab_add:
@@ -702,89 +893,80 @@ def main():
             delivery = st.text_input("Delivery time (days)", placeholder="3")
             submitted_add = st.form_submit_button(
                 "Add product",
-                disabled=st.session_state.get("processing", False)
+                disabled=ss.get("processing", False)
             )
 
-        if submitted_add and not st.session_state.get("processing"):
-            prompt = (
-                "Add a new product to the database using add_product_tool with these values:\n"
-                f"- name: {name}\n"
-                f"- cas_number: {cas}\n"
-                f"- supplier: {supplier}\n"
-                f"- price: {price}\n"
-                f"- currency: {currency}\n"
-                f"- package_size: {package}\n"
-                f"- purity: {purity}\n"
-                f"- delivery_time_days: {delivery}\n\n"
-                "Call the tool, then confirm the insertion with the returned product_id."
+        if submitted_add and not ss.get("processing"):
+            prompt = _ADD_PRODUCT_TEMPLATE.format(
+                name=name,
+                cas=cas,
+                supplier=supplier,
+                price=price,
+                currency=currency,
+                package=package,
+                purity=purity,
+                delivery=delivery,
             )
-            st.session_state["processing"] = True
-            backend = st.session_state["backend"]
-            agents = st.session_state["agents"]
+            ss["processing"] = True
             with st.spinner("➕ Adding product..."):
-                result = run_async(handle_user_message(prompt, backend, agents))
-            st.session_state["chat_history"].extend(result.get("chat_updates", []))
-            st.session_state["processing"] = False
+                result = run_async(handle_user_message(prompt, backend, agents, intent_key="form:add_product"))
+            ss["chat_history"].extend(result.get("chat_updates", []))
+            ss["processing"] = False
             
             if result.get("success"):
                 extracted = _extract_assistant_response(result.get("chat_updates", []))
                 if extracted:
-                    st.session_state["add_product_result"] = extracted
+                    ss["add_product_result"] = extracted
                 else:
                     all_content = "\n\n".join([
                         msg.get("content", "") 
                         for msg in result.get("chat_updates", []) 
                         if msg.get("role") != "user"
                     ])
-                    st.session_state["add_product_result"] = all_content or "⚠️ Product operation completed but no details returned."
+                    ss["add_product_result"] = all_content or "⚠️ Product operation completed but no details returned."
             else:
-                st.session_state["add_product_result"] = f"❌ Failed to add product: {result.get('error', 'Unknown error')}"
+                ss["add_product_result"] = f"❌ Failed to add product: {result.get('error', 'Unknown error')}"
             st.rerun()
         
         # Display add product results directly in this tab
-        if "add_product_result" in st.session_state and st.session_state["add_product_result"]:
+        if "add_product_result" in ss and ss["add_product_result"]:
             st.markdown("---")
             st.markdown("### ✅ Result")
-            st.markdown(st.session_state["add_product_result"])
+            st.markdown(ss["add_product_result"])
 
     # ===================== TAB 4: ORDERS & SPENDING =====================
     with tab_orders:
         st.subheader("Orders & Monthly Spending")
 
         st.markdown("### Open Orders")
-        is_processing = st.session_state.get("processing", False)
+        is_processing = ss.get("processing", False)
         
         if st.button("List open orders", disabled=is_processing):
-            prompt = (
-                "List all currently open chemical orders from the database. "
-                "Show them in a table with product, supplier, quantity, price, and status."
-            )
-            st.session_state["processing"] = True
-            backend = st.session_state["backend"]
-            agents = st.session_state["agents"]
+            prompt = _ORDERS_PROMPT
+            ss["processing"] = True
             with st.spinner("📦 Fetching orders..."):
-                result = run_async(handle_user_message(prompt, backend, agents))
-            st.session_state["chat_history"].extend(result.get("chat_updates", []))
-            st.session_state["processing"] = False
+                result = run_async(handle_user_message(prompt, backend, agents, intent_key="form:open_orders"))
+            ss["chat_history"].extend(result.get("chat_updates", []))
+            ss["processing"] = False
             
             if result.get("success"):
                 extracted = _extract_assistant_response(result.get("chat_updates", []))
                 if extracted:
-                    st.session_state["orders_result"] = extracted
+                    ss["orders_result"] = extracted
                 else:
                     all_content = "\n\n".join([
                         msg.get("content", "") 
                         for msg in result.get("chat_updates", []) 
                         if msg.get("role") != "user"
                     ])
-                    st.session_state["orders_result"] = all_content or "⚠️ Orders fetched but no details returned."
+                    ss["orders_result"] = all_content or "⚠️ Orders fetched but no details returned."
             else:
-                st.session_state["orders_result"] = f"❌ Failed to fetch orders: {result.get('error', 'Unknown error')}"
+                ss["orders_result"] = f"❌ Failed to fetch orders: {result.get('error', 'Unknown error')}"
             st.rerun()
         
         # Display orders results
-        if "orders_result" in st.session_state and st.session_state["orders_result"]:
-            st.markdown(st.session_state["orders_result"])
+        if "orders_result" in ss and ss["orders_result"]:
+            st.markdown(ss["orders_result"])
 
         st.markdown("---")
         st.markdown("### Create a Simple Order")
@@ -799,14 +981,13 @@ def main():
             )
 
         if submitted_order and not is_processing:
-            # Parse quantity and unit
-            qty_parts = quantity.strip().split()
+            # Parse quantity and unit (split() already drops surrounding whitespace)
+            qty_parts = quantity.split()
             qty_value = qty_parts[0] if qty_parts else quantity
             qty_unit = qty_parts[1] if len(qty_parts) > 1 else "g"
             
-            # Build clear supplier instructions
-            supplier_instruction = ""
-            if pref_supplier and pref_supplier.lower() not in ("any", ""):
+            # Build clear supplier instructions ("" is already falsy)
+            if pref_supplier and pref_supplier.lower() != "any":
                 supplier_instruction = f"Preferred supplier: {pref_supplier} (if not available, use any available supplier or create external order)"
             else:
                 supplier_instruction = "No supplier preference - use best available option"
@@ -814,33 +995,23 @@ def main():
             # Use the FULL product name for search, not just first word
             search_query = prod_name.strip() if prod_name else "chemical"
             
-            prompt = (
-                "AUTOMATED ORDER REQUEST - Execute immediately without asking for confirmation.\n\n"
-                f"Chemical: {prod_name}\n"
-                f"Quantity: {qty_value} {qty_unit}\n"
-                f"{supplier_instruction}\n\n"
-                "REQUIRED ACTIONS (execute all in sequence):\n"
-                f"1. Search: search_products_tool(query=\"{search_query}\")\n"
-                "2. Create order: Use found product_id, OR product_id=0 for external\n"
-                "3. Notify: Call notify_customer_tool with the order_id\n"
-                "4. Inventory: Call request_inventory_revision_tool\n\n"
-                "FINAL RESPONSE MUST INCLUDE:\n"
-                "- Order ID (e.g., ORD-XXXXXXXX)\n"
-                "- Product details and supplier\n"
-                "- Confirmation that notification was sent"
+            prompt = _ORDER_PROMPT_TEMPLATE.format(
+                prod_name=prod_name,
+                qty_value=qty_value,
+                qty_unit=qty_unit,
+                supplier_instruction=supplier_instruction,
+                search_query=search_query,
             )
-            st.session_state["processing"] = True
-            backend = st.session_state["backend"]
-            agents = st.session_state["agents"]
+            ss["processing"] = True
             with st.spinner("📝 Creating order..."):
-                result = run_async(handle_user_message(prompt, backend, agents))
-            st.session_state["chat_history"].extend(result.get("chat_updates", []))
-            st.session_state["processing"] = False
+                result = run_async(handle_user_message(prompt, backend, agents, intent_key="form:create_order"))
+            ss["chat_history"].extend(result.get("chat_updates", []))
+            ss["processing"] = False
             
             if result.get("success"):
                 extracted = _extract_assistant_response(result.get("chat_updates", []))
                 if extracted:
-                    st.session_state["create_order_result"] = extracted
+                    ss["create_order_result"] = extracted
                 else:
                     # Fallback: show all chat updates if extraction is empty
                     all_content = "\n\n".join([
@@ -848,15 +1019,15 @@ def main():
                         for msg in result.get("chat_updates", []) 
                         if msg.get("role") != "user"
                     ])
-                    st.session_state["create_order_result"] = all_content or "⚠️ Order processed but no details returned. Check the Chat tab."
+                    ss["create_order_result"] = all_content or "⚠️ Order processed but no details returned. Check the Chat tab."
             else:
-                st.session_state["create_order_result"] = f"❌ Failed to create order: {result.get('error', 'Unknown error')}"
+                ss["create_order_result"] = f"❌ Failed to create order: {result.get('error', 'Unknown error')}"
             st.rerun()
         
         # Display create order results
-        if "create_order_result" in st.session_state and st.session_state["create_order_result"]:
+        if "create_order_result" in ss and ss["create_order_result"]:
             st.markdown("#### 📋 Order Result")
-            st.markdown(st.session_state["create_order_result"])
+            st.markdown(ss["create_order_result"])
 
         st.markdown("---")
         st.markdown("### Monthly Spending Overview")
@@ -870,39 +1041,32 @@ def main():
             )
 
         if submitted_spend and not is_processing:
-            prompt = (
-                "Calculate monthly chemical spending.\n"
-                f"Month: {month}\n"
-                f"Year: {year}\n"
-                "Show the total amount spent and a breakdown per supplier."
-            )
-            st.session_state["processing"] = True
-            backend = st.session_state["backend"]
-            agents = st.session_state["agents"]
+            prompt = _SPENDING_TEMPLATE.format(month=month, year=year)
+            ss["processing"] = True
             with st.spinner("💰 Calculating spending..."):
-                result = run_async(handle_user_message(prompt, backend, agents))
-            st.session_state["chat_history"].extend(result.get("chat_updates", []))
-            st.session_state["processing"] = False
+                result = run_async(handle_user_message(prompt, backend, agents, intent_key="form:spending"))
+            ss["chat_history"].extend(result.get("chat_updates", []))
+            ss["processing"] = False
             
             if result.get("success"):
                 extracted = _extract_assistant_response(result.get("chat_updates", []))
                 if extracted:
-                    st.session_state["spending_result"] = extracted
+                    ss["spending_result"] = extracted
                 else:
                     all_content = "\n\n".join([
                         msg.get("content", "") 
                         for msg in result.get("chat_updates", []) 
                         if msg.get("role") != "user"
                     ])
-                    st.session_state["spending_result"] = all_content or "⚠️ Spending calculated but no details returned."
+                    ss["spending_result"] = all_content or "⚠️ Spending calculated but no details returned."
             else:
-                st.session_state["spending_result"] = f"❌ Failed to calculate spending: {result.get('error', 'Unknown error')}"
+                ss["spending_result"] = f"❌ Failed to calculate spending: {result.get('error', 'Unknown error')}"
             st.rerun()
         
         # Display spending results
-        if "spending_result" in st.session_state and st.session_state["spending_result"]:
+        if "spending_result" in ss and ss["spending_result"]:
             st.markdown("#### 💰 Spending Report")
-            st.markdown(st.session_state["spending_result"])
+            st.markdown(ss["spending_result"])
 
 
 if __name__ == "__main__":